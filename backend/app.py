@@ -4,36 +4,77 @@ from flask_migrate import Migrate
 from flask_socketio import SocketIO
 from config.database import Config
 from models import db
-from controllers.user_controller import user_bp
-from controllers.conversation_controller import conversation_bp
-from controllers.message_controller import message_bp
-from controllers.invitation_controller import invitation_bp
 from manage import create_database_if_not_exists
+from modules.message_queue import create_client_manager
+from modules import metrics
+from modules.auth import check_secret_key
 
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Bound to the app by create_app
+socketio = SocketIO()
+migrate = Migrate()
 
-# Ensure the physical database exists before SQLAlchemy initialization.
-# This will create the database itself (server-level) if it does not exist.
-create_database_if_not_exists()
 
-db.init_app(app)
-migrate = Migrate(app, db)
+def create_app(debug=None):
+    """
+    Builds the server: database, SocketIO, blueprints, socket handlers and
+    background writers. Nothing of it runs at import: inference pool workers
+    are spawned, and spawn re-runs the main module in every worker, so with
+    `python app.py` module-level setup would boot a server in each of them.
+    The Flask CLI (`flask db upgrade`) finds this factory on its own.
 
+    `debug` defaults to FLASK_DEBUG. Outside debug, the server refuses to
+    start without AUTH_SECRET_KEY while AUTH_REQUIRED is on.
+    """
+    app = Flask(__name__)
+    if debug is not None:
+        app.debug = debug
+    check_secret_key(app.debug)
+    app.config.from_object(Config)
+    CORS(app)
 
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/users')
-app.register_blueprint(conversation_bp, url_prefix='/conversations')
-app.register_blueprint(message_bp, url_prefix='/messages')
-app.register_blueprint(invitation_bp, url_prefix='/invitations')
+    # With a message queue, emits reach clients connected to any server process
+    socketio_options = {}
+    if app.config['SOCKETIO_MESSAGE_QUEUE']:
+        socketio_options['client_manager'] = create_client_manager(app.config['SOCKETIO_MESSAGE_QUEUE'])
+    socketio.init_app(app, cors_allowed_origins="*", **socketio_options)
+
+    # Ensure the physical database exists before SQLAlchemy initialization.
+    # This will create the database itself (server-level) if it does not exist.
+    create_database_if_not_exists()
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+
+    # Register blueprints
+    from controllers.user_controller import user_bp
+    from controllers.conversation_controller import conversation_bp
+    from controllers.message_controller import message_bp
+    from controllers.invitation_controller import invitation_bp
+    from controllers.metrics_controller import metrics_bp
+    from controllers.model_controller import model_bp
+    app.register_blueprint(user_bp, url_prefix='/users')
+    app.register_blueprint(conversation_bp, url_prefix='/conversations')
+    app.register_blueprint(message_bp, url_prefix='/messages')
+    app.register_blueprint(invitation_bp, url_prefix='/invitations')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    app.register_blueprint(model_bp, url_prefix='/models')
+    metrics.init_app(app, socketio)
+
+    # Socket handlers need socketio initialized
+    from controllers.socket_controller import register_socket_handlers
+    from controllers.chat_socket_controller import register_chat_handlers
+    register_socket_handlers(socketio)
+    register_chat_handlers(socketio)
+
+    from modules.message_module import MESSAGE_WRITE_BEHIND, message_writer
+    if MESSAGE_WRITE_BEHIND:
+        message_writer.start(app, socketio)
+
+    return app
 
-# Import socket handlers after socketio initialization
-from controllers.socket_controller import register_socket_handlers
-register_socket_handlers(socketio)
 
 if __name__ == '__main__':
+    app = create_app(debug=True)
     # Create missing tables from models if they don't exist yet. Using
     # db.create_all() is a convenience step for development; in production
     # you should rely on migrations (Flask-Migrate / Alembic).
@@ -0,0 +1,38 @@
+"""
+Compares the JSON landmark payload with the packed binary format from
+modules/frame_codec.py: bytes on the wire and server-side decode time for one
+(30, 99) window.
+
+Usage (from backend/): python -m benchmarks.bench_frame_codec
+"""
+import json
+import timeit
+import numpy as np
+from modules.frame_codec import encode_frames, decode_frames
+
+SEQUENCE_LENGTH = 30
+NUM_FEATURES = 99
+ITERATIONS = 2000
+
+
+def main():
+    window = np.random.rand(SEQUENCE_LENGTH, NUM_FEATURES).astype(np.float32)
+
+    json_payload = json.dumps({'sequence': window.tolist()})
+
+    def decode_json():
+        return np.array(json.loads(json_payload)['sequence'], dtype=np.float32)
+
+    rows = [('json', len(json_payload.encode()), decode_json)]
+    for dtype in ('float32', 'float16'):
+        payload = encode_frames(window, dtype=dtype)
+        rows.append((dtype, len(payload), lambda payload=payload: decode_frames(payload)))
+
+    print(f"{'format':<10}{'bytes':>10}{'decode us/window':>20}")
+    for name, size, decode in rows:
+        seconds = timeit.timeit(decode, number=ITERATIONS)
+        print(f"{name:<10}{size:>10}{seconds / ITERATIONS * 1e6:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
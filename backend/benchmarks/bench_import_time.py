@@ -0,0 +1,51 @@
+"""
+Measures how long it takes to import the socket layer in a fresh interpreter,
+with lazy model loading (the default) and with the model forced to load at
+import as it used to be. Also reports whether TensorFlow ended up imported.
+
+Usage (from backend/): python -m benchmarks.bench_import_time
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 3
+
+SCENARIOS = {
+    'lazy': (
+        "import controllers.socket_controller"
+    ),
+    'eager': (
+        "import controllers.socket_controller\n"
+        "from modules.sign_language_module import sign_language_model\n"
+        "sign_language_model.ensure_loaded()"
+    ),
+}
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - start, 'tensorflow' in sys.modules)\n"
+)
+
+
+def measure(code):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(code=code)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    seconds, tf_imported = result.stdout.strip().splitlines()[-1].split()
+    return float(seconds), tf_imported == 'True'
+
+
+def main():
+    print(f"{'scenario':<10}{'best s':>10}{'tensorflow':>12}")
+    for name, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(RUNS)]
+        print(f"{name:<10}{min(seconds for seconds, _ in runs):>10.2f}{str(runs[0][1]):>12}")
+
+
+if __name__ == '__main__':
+    main()
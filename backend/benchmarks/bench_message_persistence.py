@@ -0,0 +1,100 @@
+"""
+Messages/sec at the DB layer for concurrent chat senders, with one commit
+per message (create_message) versus the write-behind MessageWriter, which
+stores each flush with one multi-row INSERT and one commit. Every writer
+waits for its own message to be committed, as the socket ack does.
+
+Uses a SQLite file by default; set BENCH_DATABASE_URI to run against MySQL.
+
+Usage (from backend/): python -m benchmarks.bench_message_persistence
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from flask import Flask
+from flask_socketio import SocketIO
+from models import db, User, Conversation, Message
+from modules.message_module import create_message, MessageWriter
+
+SENDERS = 16
+MESSAGES_PER_SENDER = 100
+
+
+def make_app():
+    app = Flask(__name__)
+    default_uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('BENCH_DATABASE_URI', default_uri)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def reset(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all(User(id=i, name=f'user{i}', email=f'user{i}@example.com', password='x')
+                           for i in range(1, SENDERS + 2))
+        db.session.add_all(Conversation(idconv=i, iduser1=i, iduser2=i + 1) for i in range(1, SENDERS + 1))
+        db.session.commit()
+
+
+def run_senders(app, send):
+    def sender(i):
+        with app.app_context():
+            for n in range(MESSAGES_PER_SENDER):
+                send(i, i, f'message {n}')
+            db.session.remove()
+
+    threads = [threading.Thread(target=sender, args=(i,)) for i in range(1, SENDERS + 1)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def check(app):
+    """Every message stored once, and each conversation summary matches."""
+    with app.app_context():
+        total = Message.query.count()
+        summaries_ok = all(
+            conversation.iduser2_unread == MESSAGES_PER_SENDER
+            and conversation.last_message_id == db.session.query(db.func.max(Message.idmessage))
+            .filter(Message.idcnv == conversation.idconv).scalar()
+            for conversation in Conversation.query.all()
+        )
+    return total == SENDERS * MESSAGES_PER_SENDER and summaries_ok
+
+
+def main():
+    app = make_app()
+    total = SENDERS * MESSAGES_PER_SENDER
+    results = []
+
+    reset(app)
+    elapsed = run_senders(app, create_message)
+    results.append(('commit per message', elapsed, '-', check(app)))
+
+    reset(app)
+    socketio = SocketIO(app, async_mode='threading')
+    writer = MessageWriter(max_rows=100, max_wait_ms=5)
+    writer.start(app, socketio)
+    elapsed = run_senders(app, writer.write)
+    writer.stop()
+    results.append(('write-behind', elapsed, f"{writer.messages / max(writer.batches, 1):.1f}", check(app)))
+
+    print(f"{SENDERS} senders x {MESSAGES_PER_SENDER} messages ({app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]})")
+    print(f"{'mode':<22}{'msgs/sec':>10}{'mean batch':>12}{'consistent':>12}")
+    for mode, elapsed, batch, ok in results:
+        print(f"{mode:<22}{total / elapsed:>10.0f}{batch:>12}{str(ok):>12}")
+
+    if not all(ok for *_, ok in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Cost of the hot-path timers in modules/metrics.py around one packed frame
+decode (the stream_frame path): no timer, timer with metrics disabled (the
+default) and timer with metrics enabled.
+
+Usage (from backend/): python -m benchmarks.bench_metrics_overhead
+"""
+import timeit
+import numpy as np
+from modules import metrics
+from modules.frame_codec import encode_frames, decode_frames
+
+NUM_FEATURES = 99
+ITERATIONS = 200000
+
+
+def main():
+    payload = encode_frames(np.random.rand(1, NUM_FEATURES).astype(np.float32))
+
+    def bare():
+        decode_frames(payload)
+
+    def timed():
+        with metrics.SOCKET_DECODE.time('stream_frame'):
+            decode_frames(payload)
+
+    rows = [('no timer', bare, False), ('timer, disabled', timed, False), ('timer, enabled', timed, True)]
+    print(f"{'mode':<18}{'ns/frame':>10}{'overhead ns':>14}")
+    baseline = None
+    for name, call, enabled in rows:
+        metrics.METRICS_ENABLED = enabled
+        seconds = min(timeit.repeat(call, number=ITERATIONS, repeat=3)) / ITERATIONS
+        baseline = seconds if baseline is None else baseline
+        print(f"{name:<18}{seconds * 1e9:>10.0f}{(seconds - baseline) * 1e9:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
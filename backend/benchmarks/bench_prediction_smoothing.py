@@ -0,0 +1,49 @@
+"""
+Simulates a signing session of noisy softmax outputs and counts outbound
+prediction_result messages: one per window (the previous behaviour), versus
+PredictionSmoother emitting only when the stable label changes.
+
+Usage (from backend/): python -m benchmarks.bench_prediction_smoothing
+"""
+import numpy as np
+from modules.sign_language_module import PredictionSmoother
+
+NUM_CLASSES = 3
+WINDOWS_PER_SIGN = 30  # ~3 s of windows at 10 Hz
+NUM_SIGNS = 20
+NOISE = 0.2
+
+
+def simulate_session(rng):
+    """Yields (true_class, probabilities) for every window of the session."""
+    for _ in range(NUM_SIGNS):
+        true_class = int(rng.integers(NUM_CLASSES))
+        for _ in range(WINDOWS_PER_SIGN):
+            logits = np.full(NUM_CLASSES, 0.0)
+            logits[true_class] = 1.5
+            logits += rng.normal(0, NOISE * 5, NUM_CLASSES)
+            probabilities = np.exp(logits) / np.exp(logits).sum()
+            yield true_class, probabilities
+
+
+def main():
+    session = list(simulate_session(np.random.default_rng(0)))
+    windows = len(session)
+
+    # Previous behaviour: every window is emitted
+    raw_changes = sum(
+        1 for i, (_, p) in enumerate(session)
+        if i == 0 or np.argmax(p) != np.argmax(session[i - 1][1])
+    )
+    print(f"{'mode':<12}{'emitted':>10}{'per window':>12}{'label flips':>13}")
+    print(f"{'raw':<12}{windows:>10}{1.0:>12.2f}{raw_changes:>13}")
+
+    for mode in ('ema', 'vote'):
+        smoother = PredictionSmoother(mode)
+        for _, probabilities in session:
+            smoother.update(probabilities)
+        print(f"{mode:<12}{smoother.emitted:>10}{smoother.emitted / windows:>12.2f}{smoother.emitted:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Cost of the server-side Preprocessor per window, at batch sizes 1 to 256,
+for each stage configuration:
+
+  normalize            center on the shoulders' midpoint, scale by shoulder width
+  normalize+subset     plus keeping the upper-body landmarks 0-24
+  normalize+velocity   plus frame-to-frame differences
+  all                  all of the above
+
+"per-window loop" runs the same stage one window at a time, as a
+per-client implementation would, to show what batching saves.
+
+Usage (from backend/): python -m benchmarks.bench_preprocessing
+"""
+import argparse
+import time
+import numpy as np
+from modules.sign_language_module import Preprocessor, SEQUENCE_LENGTH, NUM_FEATURES, SHOULDERS
+
+BATCH_SIZES = (1, 4, 16, 64, 256)
+UPPER_BODY = list(range(25))
+
+CONFIGURATIONS = {
+    'normalize': {'center': SHOULDERS, 'scale': SHOULDERS},
+    'normalize+subset': {'center': SHOULDERS, 'scale': SHOULDERS, 'landmarks': UPPER_BODY},
+    'normalize+velocity': {'center': SHOULDERS, 'scale': SHOULDERS, 'velocity': True},
+    'all': {'center': SHOULDERS, 'scale': SHOULDERS, 'landmarks': UPPER_BODY, 'velocity': True},
+}
+
+
+def per_call_us(run, min_seconds=0.2):
+    """Mean microseconds per call of run(), repeating for at least min_seconds."""
+    run()
+    calls, start = 0, time.perf_counter()
+    while True:
+        run()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--min-seconds', type=float, default=0.2, help="Timing budget per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    windows = rng.random((max(BATCH_SIZES), SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+
+    print(f"{'configuration':<20}{'features':>9}" + ''.join(f"{f'N={n}':>10}" for n in BATCH_SIZES)
+          + f"{'loop N=256':>12}")
+    print(f"{'':<20}{'':>9}" + ''.join(f"{'us/window':>10}" for _ in BATCH_SIZES) + f"{'us/window':>12}")
+    for name, spec in CONFIGURATIONS.items():
+        preprocessor = Preprocessor.from_spec(spec)
+        row = f"{name:<20}{preprocessor.num_features:>9}"
+        for batch_size in BATCH_SIZES:
+            batch = windows[:batch_size]
+            row += f"{per_call_us(lambda: preprocessor(batch), args.min_seconds) / batch_size:>10.2f}"
+
+        def loop():
+            for window in windows:
+                preprocessor(window[np.newaxis])
+        row += f"{per_call_us(loop, args.min_seconds) / len(windows):>12.2f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
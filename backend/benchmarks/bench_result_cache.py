@@ -0,0 +1,73 @@
+"""
+Hit rate of the inference result cache (WindowResultCache) against how often
+a cached answer disagrees with running the model, for several quantization
+steps and fast-path epsilons.
+
+The stream is synthetic: a signer holds a pose for a while, then moves to the
+next one. Every other pose is held perfectly still, like the client's mock
+timer or a frozen camera; the others jitter by JITTER around it. Windows are
+taken every STRIDE frames as in the stream_frame path, and the model runs
+once on every window for the reference answers.
+
+Usage (from backend/): python -m benchmarks.bench_result_cache
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from modules.sign_language_module import sign_language_model, WindowResultCache, SEQUENCE_LENGTH, NUM_FEATURES
+
+POSES = 20
+FRAMES_PER_POSE = 90
+TRANSITION_FRAMES = 15
+JITTER = 0.0005
+STRIDE = 3
+CONFIGS = [
+    # (step, epsilon)
+    (0.0001, 0.0),
+    (0.001, 0.0),
+    (0.005, 0.0),
+    (0.001, 0.005),
+    (0.001, 0.02),
+    (0.001, 0.05),
+]
+
+
+def make_stream(rng):
+    frames = []
+    pose = rng.random(NUM_FEATURES, dtype=np.float32)
+    for i in range(POSES):
+        target = rng.random(NUM_FEATURES, dtype=np.float32)
+        for t in np.linspace(0, 1, TRANSITION_FRAMES, endpoint=False):
+            frames.append(pose + (target - pose) * t)
+        pose = target
+        jitter = JITTER if i % 2 else 0.0
+        frames.extend(pose + rng.normal(0, jitter, (FRAMES_PER_POSE, NUM_FEATURES)).astype(np.float32))
+    frames = np.asarray(frames, dtype=np.float32)
+    windows = sliding_window_view(frames, SEQUENCE_LENGTH, axis=0)[::STRIDE]
+    return np.ascontiguousarray(windows.transpose(0, 2, 1))
+
+
+def main():
+    windows = make_stream(np.random.default_rng(0))
+    reference = sign_language_model.predict_proba_batch(windows)
+    if reference is None:
+        raise SystemExit("Model failed to load")
+    reference_labels = reference.argmax(axis=1)
+
+    print(f"{len(windows)} windows, jitter {JITTER}")
+    print(f"{'step':>8}{'epsilon':>9}{'hit rate':>10}{'fast path':>11}{'disagree':>10}")
+    for step, epsilon in CONFIGS:
+        cache = WindowResultCache(step=step, max_entries=1024, ttl=60, epsilon=epsilon)
+        disagreements = 0
+        for window, probabilities, label in zip(windows, reference, reference_labels):
+            cached = cache.lookup('sid', window)
+            if cached is None:
+                cache.store('sid', probabilities)
+            elif int(np.argmax(cached)) != label:
+                disagreements += 1
+        stats = cache.stats()
+        print(f"{step:>8}{epsilon:>9}{stats['hit_rate']:>10.1%}{stats['fast_path_hits']:>11}"
+              f"{disagreements / len(windows):>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Multi-process check of Socket.IO fan-out through the local message broker.
+
+Starts a broker, a socket server process (worker A) and a write-only emitter
+process (worker B). A client connected to worker A must receive every
+prediction_result emitted by worker B, and results emitted by worker A for its
+own client must bypass the broker. Reports delivery and latency for both
+paths, and exits non-zero if any result is lost.
+
+Usage (from backend/): python -m benchmarks.bench_socketio_fanout
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import socketio as socketio_client
+from modules.message_queue import run_broker, create_client_manager
+
+NUM_RESULTS = 200
+PORT = int(os.getenv('FANOUT_BENCH_PORT', 5099))
+
+
+def serve_worker_a(url, port):
+    import logging
+    from flask import Flask, request
+    from flask_socketio import SocketIO
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app = Flask(__name__)
+    manager = create_client_manager(url)
+    socketio = SocketIO(app, async_mode='threading', client_manager=manager)
+
+    @socketio.on('predict_local')
+    def predict_local(data):
+        # Same path as handle_result: emit to the requesting client's sid
+        socketio.emit('prediction_result', {'prediction': 'local', 'sent_at': time.time()}, room=request.sid)
+
+    @socketio.on('routing_stats')
+    def routing_stats():
+        return {'local': manager.local_emits, 'published': manager.published_emits}
+
+    socketio.run(app, port=port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def emit_from_worker_b(url, sid, count):
+    manager = create_client_manager(url, write_only=True)
+    for _ in range(count):
+        manager.emit('prediction_result', {'prediction': 'remote', 'sent_at': time.time()},
+                     namespace='/', room=sid)
+        time.sleep(0.002)
+
+
+def wait_for(condition, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+
+def main():
+    context = multiprocessing.get_context('spawn')
+    url = 'unix://' + os.path.join(tempfile.mkdtemp(), 'broker.sock')
+
+    broker = context.Process(target=run_broker, args=(url[len('unix://'):],), daemon=True)
+    broker.start()
+    worker_a = context.Process(target=serve_worker_a, args=(url, PORT), daemon=True)
+    worker_a.start()
+
+    received = {'local': [], 'remote': []}
+    client = socketio_client.Client()
+
+    @client.on('prediction_result')
+    def on_result(data):
+        received[data['prediction']].append(time.time() - data['sent_at'])
+
+    for _ in range(100):
+        try:
+            client.connect(f'http://127.0.0.1:{PORT}', transports=['polling'])
+            break
+        except socketio_client.exceptions.ConnectionError:
+            time.sleep(0.1)
+    sid = client.get_sid()
+    time.sleep(0.5)  # let worker A's listener subscribe to the broker
+
+    worker_b = context.Process(target=emit_from_worker_b, args=(url, sid, NUM_RESULTS))
+    worker_b.start()
+    worker_b.join()
+    for _ in range(NUM_RESULTS):
+        client.emit('predict_local', {})
+        time.sleep(0.002)  # stay under the polling transport's packets-per-payload cap
+
+    wait_for(lambda: all(len(v) >= NUM_RESULTS for v in received.values()), timeout=10)
+    stats = client.call('routing_stats')
+    client.disconnect()
+    worker_a.terminate()
+    broker.terminate()
+
+    print(f"{'path':<20}{'delivered':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for path, label in (('remote', 'worker B -> A'), ('local', 'worker A (sticky)')):
+        latencies = np.array(received[path]) * 1000.0
+        p50, p99 = (np.percentile(latencies, 50), np.percentile(latencies, 99)) if len(latencies) else (0, 0)
+        print(f"{label:<20}{len(latencies):>8}/{NUM_RESULTS:<3}{p50:>10.2f}{p99:>10.2f}")
+    print(f"worker A emits: {stats['local']} delivered locally, {stats['published']} published")
+
+    if any(len(v) != NUM_RESULTS for v in received.values()) or stats['published']:
+        print("FAILED")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Per-frame CPU cost and accuracy of the stateful causal model against the
+windowed Bi-LSTM, for CLIENTS clients streaming FRAMES frames each:
+
+  bilstm stride 3   a (N, 30, 99) batch every 3 frames (the current cadence)
+  bilstm stride 1   a (N, 30, 99) batch every frame
+  stateful          one (N, 99) step per frame, states carried per client
+
+Accuracy is measured on windows: with --data (a .npz holding 'x' (N, 30, 99)
+windows and integer 'y' labels) against the labels, otherwise against the
+Bi-LSTM on random windows. The stateful model is scored both on each window
+from zero states and with its states carried across consecutive windows, as
+when serving a continuous stream.
+
+Requires modules/sign_language_model_causal.h5
+(python -m modules.model_builder causal).
+
+Usage (from backend/): python -m benchmarks.bench_stateful_streaming [--data windows.npz]
+"""
+import argparse
+import time
+import numpy as np
+from modules.model_builder import load_calibration_set
+from modules.sign_language_module import load_runtime, SEQUENCE_LENGTH, NUM_FEATURES
+
+CLIENTS = 16
+FRAMES = 150
+
+
+def measure(run):
+    cpu, wall = time.process_time(), time.perf_counter()
+    run()
+    return time.process_time() - cpu, time.perf_counter() - wall
+
+
+def cost(bilstm, stateful, rng):
+    stream = rng.random((FRAMES + SEQUENCE_LENGTH, CLIENTS, NUM_FEATURES), dtype=np.float32)
+
+    def windowed(stride):
+        def run():
+            for t in range(SEQUENCE_LENGTH, FRAMES + SEQUENCE_LENGTH, stride):
+                bilstm.predict(np.ascontiguousarray(stream[t - SEQUENCE_LENGTH:t].transpose(1, 0, 2)))
+        return run
+
+    def stepped():
+        states = stateful.initial_states(CLIENTS)
+        for t in range(SEQUENCE_LENGTH, FRAMES + SEQUENCE_LENGTH):
+            _, states = stateful.step(stream[t], states)
+
+    # Trace every graph once before timing
+    windowed(FRAMES)()
+    stepped()
+    rows = []
+    for name, run in (('bilstm stride 3', windowed(3)), ('bilstm stride 1', windowed(1)), ('stateful', stepped)):
+        cpu, wall = measure(run)
+        rows.append((name, cpu, wall))
+    return rows
+
+
+def accuracy(bilstm, stateful, windows, labels):
+    reference = labels if labels is not None else bilstm.predict(windows).argmax(axis=1)
+    bilstm_accuracy = float(np.mean(bilstm.predict(windows).argmax(axis=1) == reference))
+    windowed = float(np.mean(stateful.predict(windows).argmax(axis=1) == reference))
+
+    # One continuous stream of consecutive windows, scored at each window end
+    states = stateful.initial_states(1)
+    carried = []
+    for window in windows:
+        for frame in window:
+            probabilities, states = stateful.step(frame[np.newaxis], states)
+        carried.append(int(probabilities[0].argmax()))
+    carried = float(np.mean(np.array(carried) == reference))
+    return bilstm_accuracy, windowed, carried
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--data', help="Labelled windows (.npz with 'x' and 'y')")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bilstm = load_runtime('keras')
+    stateful = load_runtime('stateful')
+
+    print(f"{CLIENTS} clients x {FRAMES} frames")
+    print(f"{'mode':<18}{'cpu ms/frame':>14}{'wall ms/frame':>15}")
+    for name, cpu, wall in cost(bilstm, stateful, rng):
+        print(f"{name:<18}{cpu / (CLIENTS * FRAMES) * 1000:>14.3f}{wall / (CLIENTS * FRAMES) * 1000:>15.3f}")
+
+    if args.data:
+        windows, labels = load_calibration_set(args.data)
+    else:
+        windows, labels = rng.random((256, SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32), None
+    bilstm_accuracy, windowed, carried = accuracy(bilstm, stateful, windows, labels)
+    against = 'labels' if labels is not None else 'Bi-LSTM'
+    print(f"accuracy vs {against} on {len(windows)} windows: bilstm {bilstm_accuracy:.3f}, "
+          f"stateful per window {windowed:.3f}, stateful carried {carried:.3f}")
+
+
+if __name__ == '__main__':
+    main()
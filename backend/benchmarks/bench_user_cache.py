@@ -0,0 +1,73 @@
+"""
+Counts the SQL SELECTs issued by the user lookups a chat session repeats
+(profile screen, get_user_by_email, get_conversation_id), with the user cache
+cold and warm, and checks that creating a friendship invalidates the cached
+friend list.
+
+Usage (from backend/): python -m benchmarks.bench_user_cache
+"""
+import sys
+from flask import Flask
+from sqlalchemy import event
+from models import db
+from modules.user_module import create_user, find_user_by_email, get_user_profile, user_cache
+from modules.conversation_module import create_conversation, get_conversation_id
+
+NUM_USERS = 50
+ROUNDS = 20
+
+
+def session_round():
+    get_user_profile(1)
+    find_user_by_email('user2@example.com')
+    get_conversation_id(1, 'user2@example.com')
+
+
+def count_selects(call):
+    count = 0
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal count
+        count += statement.lstrip().upper().startswith('SELECT')
+
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return count
+
+
+def main():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        for i in range(1, NUM_USERS + 1):
+            create_user(f'user{i}', f'user{i}@example.com', 'password')
+        for i in range(2, NUM_USERS + 1):
+            create_conversation(1, i)
+        user_cache.clear()
+
+        cold = count_selects(session_round)
+        warm = count_selects(lambda: [session_round() for _ in range(ROUNDS)])
+        print(f"cold round: {cold} selects")
+        print(f"warm rounds: {warm} selects over {ROUNDS} rounds")
+
+        create_user('late', 'late@example.com', 'password')
+        late = find_user_by_email('late@example.com')
+        create_conversation(late.id, 1)
+        fresh = 'late@example.com' in get_user_profile(1)['friends']
+        print(f"friend list refreshed after create_conversation: {fresh}")
+        print(f"cache stats: {user_cache.stats()}")
+
+    if warm or not fresh:
+        print("FAILED")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""
+End-to-end load test: starts the backend against a scratch SQLite database
+(or targets a running server), then runs N concurrent virtual users that
+
+  1. register and log in,
+  2. pair up through the invitation flow (send, list, accept),
+  3. chat: REST send/poll, inbox reads and Socket.IO send_message,
+  4. stream synthetic (30, 99) landmark frames over Socket.IO.
+
+Reports throughput and p50/p95/p99 latency per endpoint/event, plus CPU and
+RSS per process sampled from /proc (Linux only), and writes them as JSON so
+runs can be compared:
+
+  python -m benchmarks.load_test --users 20 --duration 30 --output after.json
+  python -m benchmarks.load_test --compare before.json after.json
+
+Usage (from backend/): python -m benchmarks.load_test [options]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import requests
+import socketio as socketio_client
+from modules.frame_codec import encode_frames
+
+SEQUENCE_LENGTH = 30
+NUM_FEATURES = 99
+
+
+def serve(port):
+    """Server process entry point (--serve); DATABASE_URL selects the database."""
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from app import create_app, socketio, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    socketio.run(app, host='127.0.0.1', port=port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+class Recorder:
+    """Thread-safe latency samples per endpoint/event."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+        self.started = None
+        self.stopped = None
+
+    def record(self, name, seconds, ok=True):
+        with self._lock:
+            if ok:
+                self._samples.setdefault(name, []).append(seconds * 1000.0)
+            else:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def timed(self, name, call):
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self.record(name, 0, ok=False)
+            return None
+        self.record(name, time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        elapsed = (self.stopped or time.time()) - self.started
+        results = {}
+        for name in sorted(set(self._samples) | set(self._errors)):
+            latencies = np.array(self._samples.get(name, [0.0]))
+            count = len(self._samples.get(name, []))
+            results[name] = {
+                'count': count,
+                'errors': self._errors.get(name, 0),
+                'throughput_per_s': count / elapsed,
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p95_ms': float(np.percentile(latencies, 95)),
+                'p99_ms': float(np.percentile(latencies, 99)),
+            }
+        return results
+
+
+class ProcessSampler:
+    """Samples CPU% and RSS of processes (and their children) from /proc."""
+
+    def __init__(self, roots, interval=0.5):
+        self.roots = roots  # label -> pid
+        self.interval = interval
+        self.samples = {label: {'cpu_percent': [], 'rss_mb': []} for label in roots}
+        self._running = False
+        self._ticks = os.sysconf('SC_CLK_TCK')
+
+    @staticmethod
+    def _children(pid):
+        children = []
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                            children.append(int(entry))
+                except (OSError, IndexError, ValueError):
+                    pass
+        return children
+
+    def _usage(self, pid):
+        """(cpu seconds, rss MB) of pid and its descendants."""
+        cpu, rss = 0.0, 0.0
+        for p in [pid] + self._children(pid):
+            try:
+                with open(f'/proc/{p}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / self._ticks
+                with open(f'/proc/{p}/status') as f:
+                    for line in f:
+                        if line.startswith('VmRSS:'):
+                            rss += int(line.split()[1]) / 1024.0
+            except (OSError, IndexError, ValueError):
+                pass
+        return cpu, rss
+
+    def _run(self):
+        previous = {label: self._usage(pid)[0] for label, pid in self.roots.items()}
+        last = time.perf_counter()
+        while self._running:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            for label, pid in self.roots.items():
+                cpu, rss = self._usage(pid)
+                self.samples[label]['cpu_percent'].append((cpu - previous[label]) / (now - last) * 100.0)
+                self.samples[label]['rss_mb'].append(rss)
+                previous[label] = cpu
+            last = now
+
+    def start(self):
+        if not os.path.isdir('/proc'):
+            print("No /proc: process CPU/RSS sampling disabled")
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._running:
+            self._running = False
+            self._thread.join()
+
+    def summary(self):
+        results = {}
+        for label, samples in self.samples.items():
+            cpu = samples['cpu_percent'] or [0.0]
+            rss = samples['rss_mb'] or [0.0]
+            results[label] = {
+                'cpu_mean_percent': float(np.mean(cpu)),
+                'cpu_max_percent': float(np.max(cpu)),
+                'rss_max_mb': float(np.max(rss)),
+            }
+        return results
+
+
+class VirtualUser:
+    def __init__(self, index, base_url, recorder, run_id):
+        self.index = index
+        self.base_url = base_url
+        self.recorder = recorder
+        self.email = f'vu{index}-{run_id}@load.test'
+        self.http = requests.Session()
+        self.user_id = None
+        self.token = None
+        self.conversation_id = None
+        self.last_message_id = None
+        self.socket = None
+        self.predictions = 0
+
+    def post(self, name, path, body):
+        response = self.recorder.timed(name, lambda: self.http.post(self.base_url + path, json=body, timeout=10))
+        return response.json() if response is not None and response.ok else None
+
+    def get(self, name, path, params=None):
+        response = self.recorder.timed(name, lambda: self.http.get(self.base_url + path, params=params, timeout=10))
+        return response.json() if response is not None and response.ok else None
+
+    def sign_up(self):
+        self.post('POST /users/add_user', '/users/add_user',
+                  {'name': f'vu{self.index}', 'email': self.email, 'password': 'load-test'})
+        login = self.post('POST /users/login', '/users/login', {'email': self.email, 'password': 'load-test'})
+        self.user_id = login['userId'] if login else None
+        self.token = login['token'] if login else None
+        if self.token:
+            self.http.headers['Authorization'] = f'Bearer {self.token}'
+
+    def invite(self, friend):
+        self.post('POST /invitations/send', '/invitations/send',
+                  {'sender_id': self.user_id, 'receiver_email': friend.email})
+
+    def accept_invitations(self):
+        for invitation in self.get('GET /invitations/received', f'/invitations/received/{self.user_id}') or []:
+            self.post('POST /invitations/respond', '/invitations/respond',
+                      {'invitation_id': invitation['id'], 'status': 'accepted'})
+
+    def find_conversation(self):
+        inbox = self.get('GET /users/<id>/inbox', f'/users/{self.user_id}/inbox') or []
+        if inbox:
+            self.conversation_id = inbox[0]['conversation_id']
+
+    def connect_socket(self):
+        self.socket = socketio_client.Client(reconnection=False)
+        self.socket.on('prediction_result', self._on_prediction)
+        self.recorder.timed('socket connect', lambda: self.socket.connect(
+            self.base_url, auth={'token': self.token}, wait_timeout=10))
+        if self.conversation_id is not None and self.socket.connected:
+            self.recorder.timed('socket join_conversation', lambda: self.socket.call(
+                'join_conversation', {'conversationId': self.conversation_id, 'userId': self.user_id}, timeout=10))
+
+    def _on_prediction(self, data):
+        self.predictions += 1
+
+    def chat_step(self):
+        action = random.random()
+        if action < 0.35:
+            data = self.post('POST /messages/add', '/messages/add', {
+                'conversationId': self.conversation_id, 'userId': self.user_id, 'content': 'hello from load test'})
+            if data:
+                self.last_message_id = data['data']['idmessage']
+        elif action < 0.7:
+            params = {'since': self.last_message_id} if self.last_message_id else {'limit': 50}
+            messages = self.get('GET /conversations/<id>/messages', f'/conversations/{self.conversation_id}/messages', params)
+            if messages:
+                self.last_message_id = messages[-1]['idmessage']
+        elif action < 0.85:
+            self.get('GET /users/<id>/inbox', f'/users/{self.user_id}/inbox')
+        elif self.socket is not None and self.socket.connected:
+            self.recorder.timed('socket send_message', lambda: self.socket.call(
+                'send_message', {'conversationId': self.conversation_id, 'content': 'hello over socket'}, timeout=10))
+
+    def chat(self, deadline, think_time):
+        while time.time() < deadline:
+            if self.conversation_id is not None:
+                self.chat_step()
+            time.sleep(think_time * random.uniform(0.5, 1.5))
+
+    def stream(self, deadline, fps):
+        """Sends one packed landmark frame per tick, like the mobile client."""
+        rng = np.random.default_rng(self.index)
+        interval = 1.0 / fps
+        next_frame = time.perf_counter()
+        while time.time() < deadline and self.socket.connected:
+            frame = encode_frames(rng.random((1, NUM_FEATURES), dtype=np.float32))
+            # The ack only returns once the server has decoded and buffered the frame
+            self.recorder.timed('socket stream_frame', lambda: self.socket.call('stream_frame', frame, timeout=10))
+            next_frame += interval
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+
+    def close(self):
+        if self.socket is not None and self.socket.connected:
+            self.socket.disconnect()
+
+
+def start_server(args):
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load_test.db')
+    env = dict(os.environ, DATABASE_URL=database_url)
+    env.setdefault('AUTH_SECRET_KEY', secrets.token_hex(32))
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.load_test', '--serve', '--port', str(args.port)],
+                              env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("Server exited during startup")
+        try:
+            requests.get(base_url + '/users/cache/stats', timeout=1)
+            return server, base_url, database_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Server did not start in time")
+
+
+def run(args):
+    server = None
+    if args.url:
+        base_url, database_url = args.url.rstrip('/'), 'external'
+    else:
+        server, base_url, database_url = start_server(args)
+
+    recorder = Recorder()
+    roots = {'load_generator': os.getpid()}
+    if server is not None:
+        roots['server'] = server.pid
+    sampler = ProcessSampler(roots)
+    run_id = f'{int(time.time())}{random.randint(0, 999)}'
+    users = [VirtualUser(i, base_url, recorder, run_id) for i in range(args.users)]
+
+    try:
+        # Setup phase: accounts, then friendships in pairs (0-1, 2-3, ...)
+        for user in users:
+            user.sign_up()
+        for sender, receiver in zip(users[::2], users[1::2]):
+            sender.invite(receiver)
+            receiver.accept_invitations()
+        for user in users:
+            user.find_conversation()
+            user.connect_socket()
+
+        # Measured phase
+        recorder.started = time.time()
+        sampler.start()
+        deadline = recorder.started + args.duration
+        threads = [threading.Thread(target=user.chat, args=(deadline, args.think_ms / 1000.0)) for user in users]
+        streamers = users[:args.sign_users if args.sign_users is not None else len(users) // 2]
+        threads += [threading.Thread(target=user.stream, args=(deadline, args.fps))
+                    for user in streamers if user.socket is not None and user.socket.connected]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        recorder.stopped = time.time()
+        sampler.stop()
+    finally:
+        for user in users:
+            user.close()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    elapsed = recorder.stopped - recorder.started
+    return {
+        'config': {
+            'users': args.users,
+            'sign_users': len(streamers),
+            'duration_s': args.duration,
+            'fps': args.fps,
+            'think_ms': args.think_ms,
+            'database': database_url.split(':')[0],
+            'target': base_url,
+        },
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'endpoints': recorder.summary(),
+        'predictions_per_s': sum(user.predictions for user in users) / elapsed,
+        'processes': sampler.summary(),
+    }
+
+
+def print_report(report):
+    print(f"{'endpoint/event':<36}{'count':>8}{'err':>6}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:<36}{row['count']:>8}{row['errors']:>6}{row['throughput_per_s']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+    print(f"prediction_result events: {report['predictions_per_s']:.1f}/s")
+    for label, row in report['processes'].items():
+        print(f"{label:<16} cpu mean {row['cpu_mean_percent']:6.1f}%  max {row['cpu_max_percent']:6.1f}%  "
+              f"rss max {row['rss_max_mb']:7.1f} MB")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'endpoint/event':<36}{'per s':>18}{'p95 ms':>20}")
+    for name, row in after['endpoints'].items():
+        old = before['endpoints'].get(name)
+        if old is None:
+            continue
+        print(f"{name:<36}{old['throughput_per_s']:>8.1f} -> {row['throughput_per_s']:<7.1f}"
+              f"{old['p95_ms']:>9.1f} -> {row['p95_ms']:<8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the SignLink backend.")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument('--sign-users', type=int, help="Users also streaming landmarks (default: half)")
+    parser.add_argument('--duration', type=float, default=30, help="Measured phase, in seconds")
+    parser.add_argument('--fps', type=float, default=30, help="Landmark frames per second per streaming user")
+    parser.add_argument('--think-ms', type=float, default=200, help="Mean pause between chat actions")
+    parser.add_argument('--url', help="Target a running server instead of starting one")
+    parser.add_argument('--database-url', help="Database for the started server (default: scratch SQLite)")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="Compare two JSON reports")
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+    elif args.compare:
+        compare(*args.compare)
+    else:
+        report = run(args)
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+from flask import request, session, current_app
+from flask_socketio import join_room, leave_room, rooms
+from modules.conversation_module import get_conversation_messages, is_participant, mark_conversation_read
+from modules.message_module import persist_message
+from modules.metrics import SOCKET_EMIT
+from modules.auth import AUTH_REQUIRED
+
+def conversation_room(conversation_id):
+    return f"conv:{conversation_id}"
+
+def broadcast_message(message):
+    """
+    Pushes a persisted message to every socket joined to its conversation.
+    Usable from REST routes as well as socket handlers.
+    """
+    socketio = current_app.extensions['socketio']
+    with SOCKET_EMIT.time('new_message'):
+        socketio.emit('new_message', message, room=conversation_room(message['idcnv']))
+
+def register_chat_handlers(socketio):
+    # The user id is kept in the socket's own session (Flask-SocketIO scopes
+    # `session` to the connection), so it is released with the connection.
+    # It is set from the token at connect (see socket_controller).
+
+    @socketio.on('join_conversation')
+    def handle_join_conversation(data):
+        """
+        data: {'conversationId': ..., 'since': <last idmessage seen>}
+        Joins the conversation room and replays every message newer than
+        `since`, so a reconnecting client resumes where it left off.
+        """
+        conversation_id = data.get('conversationId')
+        user_id = session.get('user_id')
+        if user_id is None and not AUTH_REQUIRED:
+            # Unauthenticated connection, only allowed with AUTH_REQUIRED=0
+            user_id = data.get('userId')
+        if conversation_id is None or user_id is None or not is_participant(conversation_id, user_id):
+            return {'status': 'error', 'message': 'Not a participant of this conversation'}
+
+        session['user_id'] = int(user_id)
+        join_room(conversation_room(conversation_id))
+        mark_conversation_read(conversation_id, user_id)
+
+        since = data.get('since')
+        missed = get_conversation_messages(conversation_id, since=since) if since is not None else []
+        return {'status': 'ok', 'messages': missed}
+
+    @socketio.on('leave_conversation')
+    def handle_leave_conversation(data):
+        leave_room(conversation_room(data.get('conversationId')))
+
+    @socketio.on('send_message')
+    def handle_send_message(data):
+        """
+        data: {'conversationId': ..., 'content': ...}
+        The sender must have joined the conversation. The persisted message is
+        broadcast to the room and returned in the ack.
+        """
+        conversation_id = data.get('conversationId')
+        user_id = session.get('user_id')
+        if user_id is None or conversation_room(conversation_id) not in rooms():
+            return {'status': 'error', 'message': 'Join the conversation first'}
+
+        try:
+            message = persist_message(conversation_id, user_id, data.get('content'))
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+        broadcast_message(message)
+        return {'status': 'ok', 'message': message}
+
+    @socketio.on('message_ack')
+    def handle_message_ack(data):
+        """
+        data: {'conversationId': ..., 'idmessage': ...}
+        Sent by a receiver once a pushed message is displayed; relayed to the
+        rest of the room as a delivery receipt, and clears the receiver's
+        unread count.
+        """
+        conversation_id = data.get('conversationId')
+        if conversation_room(conversation_id) not in rooms():
+            return
+        mark_conversation_read(conversation_id, session['user_id'])
+        socketio.emit('message_delivered', {
+            'conversationId': conversation_id,
+            'idmessage': data.get('idmessage'),
+            'userId': session.get('user_id'),
+        }, room=conversation_room(conversation_id), skip_sid=request.sid)
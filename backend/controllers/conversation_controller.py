@@ -1,26 +1,66 @@
-from flask import Blueprint, request, jsonify
-from modules.conversation_module import create_conversation, get_conversation_messages, get_conversation_id
+from flask import Blueprint, request, jsonify, g
+from modules.auth import login_required, is_caller, forbidden
+from modules.conversation_module import (
+    create_conversation, get_conversation_messages, get_conversation_id, mark_conversation_read, is_participant
+)
 
 conversation_bp = Blueprint('conversation', __name__)
 
+def _can_access(conversation_id, user_id=None):
+    """Whether the caller (or, without auth, the claimed user) takes part in the conversation."""
+    user_id = g.user_id if g.user_id is not None else user_id
+    return user_id is None or is_participant(conversation_id, user_id)
+
 @conversation_bp.route('/', methods=['POST'])
+@login_required
 def create_conversation_route():
     data = request.json
-    create_conversation(data['iduser1'], data['iduser2'])
-    return jsonify({'message': 'Conversation created successfully'}), 201
+    if not (is_caller(data['iduser1']) or is_caller(data['iduser2'])):
+        return forbidden()
+    try:
+        create_conversation(data['iduser1'], data['iduser2'])
+        return jsonify({'message': 'Conversation created successfully'}), 201
+    except Exception as e:
+        print(f"Error creating conversation: {e}")
+        return jsonify({'message': str(e)}), 400
 
 @conversation_bp.route('/<conversation_id>/messages', methods=['GET'])
+@login_required
 def get_messages(conversation_id):
-    messages = get_conversation_messages(conversation_id)
+    if not _can_access(conversation_id):
+        return forbidden()
+    messages = get_conversation_messages(
+        conversation_id,
+        since=request.args.get('since', type=int),
+        before=request.args.get('before', type=int),
+        limit=request.args.get('limit', type=int),
+    )
     return jsonify(messages), 200
 
+@conversation_bp.route('/<conversation_id>/read', methods=['POST'])
+@login_required
+def mark_read_route(conversation_id):
+    data = request.json
+    if not is_caller(data['userId']) or not _can_access(conversation_id, data['userId']):
+        return forbidden()
+    try:
+        mark_conversation_read(conversation_id, data['userId'])
+        return jsonify({'message': 'Conversation marked as read'}), 200
+    except Exception as e:
+        return jsonify({'message': str(e)}), 400
+
 @conversation_bp.route('/get_conversation_id', methods=['POST'])
+@login_required
 def get_conversation_id_route():
     data = request.json
     user_id = data['userId']
     friend_email = data['friendEmail']
+    if not is_caller(user_id):
+        return forbidden()
     try:
         conversation_id = get_conversation_id(user_id, friend_email)
+        if not _can_access(conversation_id, user_id):
+            return forbidden()
         return jsonify({'conversationId': str(conversation_id)}), 200  # Ensure it's a string
     except Exception as e:
         return jsonify({'message': str(e)}), 404
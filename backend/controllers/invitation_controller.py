@@ -1,11 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
+from modules.auth import login_required, is_caller, forbidden
 from modules.invitation_module import send_invitation, get_received_invitations, get_sent_invitations, respond_to_invitation
 
 invitation_bp = Blueprint('invitation', __name__)
 
 @invitation_bp.route('/send', methods=['POST'])
+@login_required
 def send_invitation_route():
     data = request.json
+    if not is_caller(data['sender_id']):
+        return forbidden()
     try:
         send_invitation(data['sender_id'], data['receiver_email'])
         return jsonify({'message': 'Invitation sent successfully'}), 201
@@ -14,7 +18,10 @@ def send_invitation_route():
         return jsonify({'message': str(e)}), 400
 
 @invitation_bp.route('/received/<user_id>', methods=['GET'])
+@login_required
 def get_received_invitations_route(user_id):
+    if not is_caller(user_id):
+        return forbidden()
     try:
         invitations = get_received_invitations(user_id)
         return jsonify(invitations), 200
@@ -23,7 +30,10 @@ def get_received_invitations_route(user_id):
         return jsonify({'message': str(e)}), 400
 
 @invitation_bp.route('/sent/<user_id>', methods=['GET'])
+@login_required
 def get_sent_invitations_route(user_id):
+    if not is_caller(user_id):
+        return forbidden()
     try:
         invitations = get_sent_invitations(user_id)
         return jsonify(invitations), 200
@@ -32,10 +42,13 @@ def get_sent_invitations_route(user_id):
         return jsonify({'message': str(e)}), 400
 
 @invitation_bp.route('/respond', methods=['POST'])
+@login_required
 def respond_to_invitation_route():
     data = request.json
     try:
-        respond_to_invitation(data['invitation_id'], data['status'])
+        respond_to_invitation(data['invitation_id'], data['status'], receiver_id=g.user_id)
         return jsonify({'message': f'Invitation {data["status"]}'}), 200
+    except PermissionError:
+        return forbidden()
     except Exception as e:
         return jsonify({'message': str(e)}), 400
@@ -1,21 +1,27 @@
 from flask import Blueprint, request, jsonify
-from modules.message_module import create_message
-from modules.user_module import find_user_by_email
+from modules.auth import login_required, is_caller, forbidden
+from modules.conversation_module import is_participant
+from modules.message_module import persist_message
+from controllers.chat_socket_controller import broadcast_message
 
 message_bp = Blueprint('message', __name__)
 
 
 
 @message_bp.route('/add', methods=['POST'])
+@login_required
 def add_message_route():
     data = request.json
     conversation_id = data['conversationId']
     user_id = data['userId']
     content = data['content']
+    if not is_caller(user_id) or not is_participant(conversation_id, user_id):
+        return forbidden()
 
     try:
-        create_message(conversation_id, user_id, content)
-        return jsonify({'message': 'Message added successfully'}), 201
+        message = persist_message(conversation_id, user_id, content)
+        broadcast_message(message)
+        return jsonify({'message': 'Message added successfully', 'data': message}), 201
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -0,0 +1,43 @@
+from flask import Blueprint, Response, request, jsonify
+from modules.metrics import registry, profile_state, set_profile_rate
+from modules.user_module import user_cache
+from modules.auth import token_cache, admin_required
+from modules.sign_language_module import inference_batcher
+from modules.message_module import message_writer
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Counters the modules already keep, read at scrape time
+registry.register_collector('signlink_user_cache', 'User cache statistics.', user_cache.stats)
+registry.register_collector('signlink_token_cache', 'Verified token cache statistics.', token_cache.stats)
+registry.register_collector('signlink_inference', 'Inference batcher statistics.', inference_batcher.metrics.snapshot)
+if inference_batcher.result_cache is not None:
+    registry.register_collector('signlink_result_cache', 'Inference result cache statistics.',
+                                inference_batcher.result_cache.stats)
+registry.register_collector('signlink_message_writer', 'Write-behind message buffer statistics.', lambda: {
+    'batches': message_writer.batches,
+    'messages': message_writer.messages,
+})
+
+@metrics_bp.route('', methods=['GET'])
+def metrics_route():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@metrics_bp.route('/profile', methods=['GET'])
+@admin_required
+def get_profile_route():
+    """
+    Sample rate and the most recent request profile (cumulative time, top 20).
+    Operator only: the profile exposes internal paths and call timings.
+    """
+    return jsonify({'rate': profile_state['rate'], 'last': profile_state['last']}), 200
+
+@metrics_bp.route('/profile', methods=['POST'])
+@admin_required
+def set_profile_route():
+    data = request.json
+    try:
+        set_profile_rate(data['rate'])
+        return jsonify({'rate': profile_state['rate']}), 200
+    except Exception as e:
+        return jsonify({'message': str(e)}), 400
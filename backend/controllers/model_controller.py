@@ -0,0 +1,54 @@
+from flask import Blueprint, request, jsonify
+from modules.auth import admin_required
+from modules.model_registry import model_registry
+from modules.sign_language_module import sign_language_model, inference_batcher
+
+model_bp = Blueprint('model', __name__)
+
+@model_bp.route('', methods=['GET'])
+def get_models_route():
+    active = sign_language_model.active
+    canary = sign_language_model.canary
+    return jsonify({
+        'state': sign_language_model.state,
+        'active': active.version if active is not None else None,
+        'canary': {'version': canary[0].version, 'percent': canary[1]} if canary is not None else None,
+        'current': model_registry.current() if model_registry else None,
+        'versions': model_registry.versions() if model_registry else [],
+        'workers': inference_batcher.worker_versions(),
+    }), 200
+
+@model_bp.route('/activate', methods=['POST'])
+@admin_required
+def activate_model_route():
+    """Points the registry at a version; this process reloads now, the others on their next check."""
+    data = request.json
+    try:
+        if model_registry is None:
+            raise ValueError("No model registry configured (MODEL_REGISTRY_DIR)")
+        model_registry.activate(data['version'])
+        if not inference_batcher.swap_model(data['version']):
+            return jsonify({'message': 'A model is already loading, retry shortly'}), 409
+        return jsonify({'message': f"Loading model {data['version']}"}), 202
+    except Exception as e:
+        return jsonify({'message': str(e)}), 400
+
+@model_bp.route('/reload', methods=['POST'])
+@admin_required
+def reload_model_route():
+    """Reloads the registry's current version, e.g. after replacing its files."""
+    if not inference_batcher.swap_model():
+        return jsonify({'message': 'A model is already loading, retry shortly'}), 409
+    return jsonify({'message': 'Reloading model'}), 202
+
+@model_bp.route('/canary', methods=['POST'])
+@admin_required
+def set_canary_route():
+    """data: {'version': 'v3', 'percent': 10}; a percent of 0 ends the canary."""
+    data = request.json
+    try:
+        if not inference_batcher.set_canary(data.get('version'), float(data.get('percent', 0))):
+            return jsonify({'message': 'A model is already loading, retry shortly'}), 409
+        return jsonify({'message': 'Canary updated'}), 202
+    except Exception as e:
+        return jsonify({'message': str(e)}), 400
@@ -1,26 +1,170 @@
-from flask import request
-from modules.sign_language_module import sign_language_model
+import os
+from flask import request, session
+from modules.sign_language_module import (
+    sign_language_model, inference_batcher, FrameRingBuffer, ClientRateLimiter, PredictionSmoother
+)
+from modules.frame_codec import decode_frames, is_packed
+from modules.model_registry import model_registry
+from modules.metrics import SOCKET_DECODE, SOCKET_EMIT
+from modules.auth import verify_token, socket_token, AUTH_REQUIRED
+
+# Run inference on every Nth frame received through `stream_frame`. The client
+# captures ~30 FPS, so 3 keeps the previous cadence of one window per 100 ms.
+STREAM_FRAME_STRIDE = int(os.getenv('STREAM_FRAME_STRIDE', 3))
+
+# Maximum windows per second each client may queue for inference (0 = no cap)
+STREAM_MAX_RATE_HZ = float(os.getenv('STREAM_MAX_RATE_HZ', 15))
+
+# Per-client decision layer applied before emitting prediction_result
+SMOOTHING_MODE = os.getenv('SMOOTHING_MODE', 'ema')  # ema | vote
+SMOOTHING_WINDOW = int(os.getenv('SMOOTHING_WINDOW', 5))
+CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.6))
+SMOOTHING_HYSTERESIS = float(os.getenv('SMOOTHING_HYSTERESIS', 0.1))
 
 def register_socket_handlers(socketio):
+    # Per-client sliding windows for the incremental `stream_frame` event
+    frame_buffers = {}
+    rate_limiter = ClientRateLimiter(STREAM_MAX_RATE_HZ)
+    smoothers = {}
+    # Sids already told "Model Error", so a failed model is reported once, not per window
+    model_errors = set()
+
+    def emit_prediction(sid, prediction):
+        with SOCKET_EMIT.time('prediction_result'):
+            socketio.emit('prediction_result', {'prediction': prediction}, room=sid)
+
+    def handle_result(sid, probabilities, version):
+        if probabilities is None:
+            if sid not in model_errors:
+                model_errors.add(sid)
+                emit_prediction(sid, "Model Error")
+            return
+        if sid in model_errors:
+            # The client shows the error; a fresh smoother emits the next stable label
+            model_errors.discard(sid)
+            smoothers.pop(sid, None)
+
+        smoother = smoothers.get(sid)
+        # Class indices only compare within one model version, so a hot swap
+        # (or a canary) starts the client's smoothing afresh
+        if smoother is None or smoother.model_version != version:
+            smoother = smoothers[sid] = PredictionSmoother(
+                SMOOTHING_MODE, SMOOTHING_WINDOW, CONFIDENCE_THRESHOLD, SMOOTHING_HYSTERESIS, model_version=version
+            )
+        # Only emit when the smoothed, stable label actually changes
+        class_idx = smoother.update(probabilities)
+        if class_idx is not None:
+            emit_prediction(sid, sign_language_model.label_for(class_idx, version))
+
+    inference_started = False
+
+    def start_inference():
+        # Started on the first connection rather than at import time, so
+        # processes that never accept sockets (migrations, REST-only workers)
+        # neither load the model nor run the scheduler.
+        nonlocal inference_started
+        if inference_started:
+            return
+        inference_started = True
+        inference_batcher.warm_up()
+        # Single scheduler loop shared by every client; it batches pending
+        # windows across sids and emits each result back to its own room.
+        socketio.start_background_task(inference_batcher.run, handle_result, socketio.sleep)
+        if model_registry is not None:
+            socketio.start_background_task(inference_batcher.watch_registry, socketio.sleep)
+
+    def model_ready():
+        if inference_batcher.is_ready():
+            return True
+        emit_prediction(request.sid, "Warming up")
+        return False
+
+    def accept_window():
+        if rate_limiter.allow(request.sid):
+            return True
+        inference_batcher.metrics.record_dropped()
+        return False
+
     @socketio.on('connect')
-    def handle_connect():
-        print(f"Client connected: {request.sid}")
+    def handle_connect(auth=None):
+        # The token is checked once here; the user id then lives in the
+        # socket's session, so no later event re-verifies it
+        user_id = verify_token(socket_token(auth))
+        if user_id is None and AUTH_REQUIRED:
+            print(f"Rejected unauthenticated client: {request.sid}")
+            raise ConnectionRefusedError('Invalid or missing token')
+        session['user_id'] = user_id
+        start_inference()
+        print(f"Client connected: {request.sid} (user {user_id})")
 
     @socketio.on('disconnect')
     def handle_disconnect():
-        print(f"Client disconnected: {request.sid}")
+        frame_buffers.pop(request.sid, None)
+        rate_limiter.forget(request.sid)
+        inference_batcher.forget(request.sid)
+        model_errors.discard(request.sid)
+        smoother = smoothers.pop(request.sid, None)
+        if smoother is not None and smoother.updates:
+            print(f"Client disconnected: {request.sid} "
+                  f"({smoother.emitted}/{smoother.updates} predictions emitted, "
+                  f"{1 - smoother.emitted / smoother.updates:.0%} suppressed)")
+        else:
+            print(f"Client disconnected: {request.sid}")
 
     @socketio.on('stream_data')
     def handle_stream_data(data):
         """
         data: {'sequence': [[x1,y1,z1...], [x2,y2,z2...], ...]}
+              or a packed binary payload (see modules/frame_codec.py)
         """
-        sequence = data.get('sequence')
-        if sequence and len(sequence) == 30:
-            # Run inference
-            prediction = sign_language_model.predict(sequence)
-            
-            # Emit result back to the specific client
-            socketio.emit('prediction_result', {'prediction': prediction}, room=request.sid)
+        try:
+            with SOCKET_DECODE.time('stream_data'):
+                sequence = decode_frames(data) if is_packed(data) else data.get('sequence')
+        except ValueError as e:
+            print(f"Invalid sequence received from {request.sid}: {e}")
+            return
+        if sequence is not None and len(sequence) == 30:
+            if not model_ready() or not accept_window():
+                return
+            # Queue for the next inference batch
+            try:
+                inference_batcher.submit(request.sid, sequence)
+            except ValueError as e:
+                print(f"Invalid sequence received from {request.sid}: {e}")
         else:
             print(f"Invalid sequence received from {request.sid}")
+
+    @socketio.on('stream_frame')
+    def handle_stream_frame(data):
+        """
+        data: {'frames': [[x1,y1,z1...], ...]}  # newest frame(s) only
+              or a packed binary payload (see modules/frame_codec.py)
+        """
+        try:
+            with SOCKET_DECODE.time('stream_frame'):
+                frames = decode_frames(data) if is_packed(data) else data.get('frames')
+        except ValueError as e:
+            print(f"Invalid frames received from {request.sid}: {e}")
+            return
+        if frames is None or len(frames) == 0:
+            print(f"Invalid frames received from {request.sid}")
+            return
+
+        buffer = frame_buffers.get(request.sid)
+        if buffer is None:
+            buffer = frame_buffers[request.sid] = FrameRingBuffer(stride=STREAM_FRAME_STRIDE)
+
+        try:
+            window_due = buffer.push(frames)
+            if window_due and not model_ready():
+                return
+            if inference_batcher.is_stateful():
+                # Every frame advances the client's LSTM state; results keep
+                # the window cadence, within the client's rate cap
+                inference_batcher.submit_frames(request.sid, frames, emit=window_due and accept_window())
+                if window_due:
+                    buffer.restart_stride()
+            elif window_due and accept_window():
+                inference_batcher.submit(request.sid, buffer.window())
+        except ValueError as e:
+            print(f"Invalid frames received from {request.sid}: {e}")
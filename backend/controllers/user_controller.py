@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from modules.user_module import create_user, authenticate_user, get_user_profile, find_user_by_email
-from modules.conversation_module import create_conversation
+from modules.auth import login_required, issue_token, is_caller, forbidden
+from modules.user_module import create_user, authenticate_user, get_user_profile, find_user_by_email, user_cache
+from modules.conversation_module import create_conversation, get_inbox
 
 user_bp = Blueprint('user', __name__)
 
@@ -18,21 +19,39 @@ def login_user_route():
         return jsonify({
             'userId': user.id,
             'name': user.name,
-            'token': 'dummy_token'  # Replace with actual token generation logic
+            'token': issue_token(user.id)
         }), 200
     return jsonify({'message': 'Invalid email or password'}), 401
 
 @user_bp.route('/<user_id>', methods=['GET'])
+@login_required
 def get_user_profile_route(user_id):
+    # The profile carries the friends list: only its owner may read it
+    if not is_caller(user_id):
+        return forbidden()
     user = get_user_profile(user_id)
     if user:
         return jsonify(user), 200
     return jsonify({'message': 'User not found'}), 404
 
+@user_bp.route('/<user_id>/inbox', methods=['GET'])
+@login_required
+def get_inbox_route(user_id):
+    if not is_caller(user_id):
+        return forbidden()
+    try:
+        return jsonify(get_inbox(user_id)), 200
+    except Exception as e:
+        print(f"Error getting inbox: {e}")
+        return jsonify({'message': str(e)}), 400
+
 @user_bp.route('/add_friend', methods=['POST'])
+@login_required
 def add_friend_route():
     data = request.json
     user1_id = data['user1_id']
+    if not is_caller(user1_id):
+        return forbidden()
     friend_email = data['friend_email']
 
     # Find the friend's user ID by email
@@ -43,11 +62,15 @@ def add_friend_route():
     user2_id = friend.id
 
     # Create a new conversation
-    create_conversation(user1_id, user2_id)
+    try:
+        create_conversation(user1_id, user2_id)
+    except Exception as e:
+        return jsonify({'message': str(e)}), 400
 
     return jsonify({'message': 'Friend added and conversation created successfully'}), 201
 
 @user_bp.route('/get_user_by_email', methods=['POST'])
+@login_required
 def get_user_by_email_route():
     data = request.json
     email = data['email']
@@ -55,3 +78,8 @@ def get_user_by_email_route():
     if user:
         return jsonify({'name': user.name, 'email': user.email}), 200
     return jsonify({'message': 'User not found'}), 404
+
+@user_bp.route('/cache/stats', methods=['GET'])
+@login_required
+def get_user_cache_stats_route():
+    return jsonify(user_cache.stats()), 200
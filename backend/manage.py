@@ -14,6 +14,9 @@ def create_database_if_not_exists():
     ensure the database itself exists before SQLAlchemy tries to create
     tables or migrations are applied.
     """
+    database_url = os.getenv('DATABASE_URL')
+    if database_url and not database_url.startswith('mysql'):
+        return
     try:
         connection = pymysql.connect(
             host=os.getenv('DB_HOST'),
@@ -0,0 +1,33 @@
+"""Add (idcnv, idmessage) index for cursor-based message sync
+
+Revision ID: 3f2c8a71b5d4
+Revises: 9d6d1a34d6e3
+Create Date: 2026-10-17 10:12:31.114207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2c8a71b5d4'
+down_revision = '9d6d1a34d6e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Fresh databases get the table, with this index, from db.create_all(),
+    # which runs after the migrations; skip until then, and skip if it did
+    if 'message' not in inspector.get_table_names():
+        return
+    if 'ix_message_idcnv_idmessage' in {index['name'] for index in inspector.get_indexes('message')}:
+        return
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_idcnv_idmessage', ['idcnv', 'idmessage'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_idcnv_idmessage')
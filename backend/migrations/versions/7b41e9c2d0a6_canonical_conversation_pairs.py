@@ -0,0 +1,94 @@
+"""Store conversations as canonical user pairs and index invitation lookups
+
+Revision ID: 7b41e9c2d0a6
+Revises: 3f2c8a71b5d4
+Create Date: 2026-10-17 14:02:47.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b41e9c2d0a6'
+down_revision = '3f2c8a71b5d4'
+branch_labels = None
+depends_on = None
+
+
+def canonicalize_conversations(bind):
+    """
+    Rewrites every conversation as (min user id, max user id). When both
+    orderings of a pair exist, the oldest conversation is kept and the
+    messages of the others are moved into it. Conversations of a user with
+    themselves, which the old add_friend allowed, are deleted with their
+    messages: the canonical pair constraint (iduser1 < iduser2) rejects them
+    and the app no longer creates them.
+    """
+    kept = {}
+    rows = bind.execute(sa.text(
+        "SELECT idconv, iduser1, iduser2 FROM conversation ORDER BY idconv"
+    )).fetchall()
+    for idconv, iduser1, iduser2 in rows:
+        if iduser1 == iduser2:
+            bind.execute(sa.text("DELETE FROM message WHERE idcnv = :id"), {'id': idconv})
+            bind.execute(sa.text("DELETE FROM conversation WHERE idconv = :id"), {'id': idconv})
+            print(f"Deleted conversation {idconv} of user {iduser1} with themselves")
+            continue
+        pair = (min(iduser1, iduser2), max(iduser1, iduser2))
+        if pair in kept:
+            bind.execute(sa.text("UPDATE message SET idcnv = :keep WHERE idcnv = :dup"),
+                         {'keep': kept[pair], 'dup': idconv})
+            bind.execute(sa.text("DELETE FROM conversation WHERE idconv = :dup"), {'dup': idconv})
+            continue
+        kept[pair] = idconv
+        if pair != (iduser1, iduser2):
+            bind.execute(sa.text("UPDATE conversation SET iduser1 = :lo, iduser2 = :hi WHERE idconv = :id"),
+                         {'lo': pair[0], 'hi': pair[1], 'id': idconv})
+
+
+def _check_constraints(inspector, table):
+    try:
+        return {constraint['name'] for constraint in inspector.get_check_constraints(table)}
+    except NotImplementedError:
+        return set()
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    # Fresh databases get these tables, with the constraints, from db.create_all().
+    # Tables it already built have some or all of them, so only the missing
+    # ones are created.
+    if 'conversation' in tables:
+        canonicalize_conversations(bind)
+        indexes = {index['name'] for index in inspector.get_indexes('conversation')}
+        checks = _check_constraints(inspector, 'conversation')
+        with op.batch_alter_table('conversation', schema=None) as batch_op:
+            if 'ix_conversation_iduser1_iduser2' not in indexes:
+                batch_op.create_index('ix_conversation_iduser1_iduser2', ['iduser1', 'iduser2'], unique=True)
+            if 'ix_conversation_iduser2_iduser1' not in indexes:
+                batch_op.create_index('ix_conversation_iduser2_iduser1', ['iduser2', 'iduser1'], unique=False)
+            if 'ck_conversation_canonical_pair' not in checks:
+                batch_op.create_check_constraint('ck_conversation_canonical_pair', 'iduser1 < iduser2')
+
+    if 'invitation' in tables:
+        indexes = {index['name'] for index in inspector.get_indexes('invitation')}
+        with op.batch_alter_table('invitation', schema=None) as batch_op:
+            if 'ix_invitation_receiver_id_status' not in indexes:
+                batch_op.create_index('ix_invitation_receiver_id_status', ['receiver_id', 'status'], unique=False)
+            if 'ix_invitation_sender_id_status' not in indexes:
+                batch_op.create_index('ix_invitation_sender_id_status', ['sender_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invitation', schema=None) as batch_op:
+        batch_op.drop_index('ix_invitation_sender_id_status')
+        batch_op.drop_index('ix_invitation_receiver_id_status')
+
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_conversation_canonical_pair', type_='check')
+        batch_op.drop_index('ix_conversation_iduser2_iduser1')
+        batch_op.drop_index('ix_conversation_iduser1_iduser2')
@@ -0,0 +1,58 @@
+"""Add denormalized inbox summary columns to conversation
+
+Revision ID: c5e08d13a9f2
+Revises: 7b41e9c2d0a6
+Create Date: 2026-10-17 16:40:05.227391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e08d13a9f2'
+down_revision = '7b41e9c2d0a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Fresh databases get the columns from db.create_all()
+    if 'conversation' not in inspector.get_table_names():
+        return
+    # ...as does a table create_all built before this migration ran
+    existing = {column['name'] for column in inspector.get_columns('conversation')}
+    columns = [
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_activity', sa.DateTime(), nullable=True),
+        sa.Column('iduser1_unread', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('iduser2_unread', sa.Integer(), server_default='0', nullable=False),
+    ]
+    missing = [column for column in columns if column.name not in existing]
+    if not missing:
+        return
+
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        for column in missing:
+            batch_op.add_column(column)
+
+    # Backfill from existing messages; history counts as read. Two statements,
+    # as MySQL would see the new last_message_id within a single UPDATE.
+    bind.execute(sa.text(
+        "UPDATE conversation SET last_message_id = "
+        "(SELECT MAX(idmessage) FROM message WHERE message.idcnv = conversation.idconv)"
+    ))
+    bind.execute(sa.text(
+        "UPDATE conversation SET last_activity = "
+        "(SELECT timestamp FROM message WHERE message.idmessage = conversation.last_message_id)"
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_column('iduser2_unread')
+        batch_op.drop_column('iduser1_unread')
+        batch_op.drop_column('last_activity')
+        batch_op.drop_column('last_message_id')
@@ -15,6 +15,24 @@ class Conversation(db.Model):
     iduser1 = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     iduser2 = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Inbox summary, maintained by create_message so listing conversations
+    # never scans `message`. No foreign key on last_message_id, to avoid a
+    # circular dependency between the two tables.
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_activity = db.Column(db.DateTime, nullable=True)
+    # Messages each participant has not read yet
+    iduser1_unread = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    iduser2_unread = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Each pair of users is stored once, canonically as (min id, max id), so a
+    # pair lookup is a single seek on the unique index and "conversations of X"
+    # is one seek on each index.
+    __table_args__ = (
+        db.Index('ix_conversation_iduser1_iduser2', 'iduser1', 'iduser2', unique=True),
+        db.Index('ix_conversation_iduser2_iduser1', 'iduser2', 'iduser1'),
+        db.CheckConstraint('iduser1 < iduser2', name='ck_conversation_canonical_pair'),
+    )
+
 class Message(db.Model):
     __tablename__ = 'message'
     idmessage = db.Column(db.Integer, primary_key=True)
@@ -23,6 +41,10 @@ class Message(db.Model):
     contenu = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
 
+    __table_args__ = (
+        db.Index('ix_message_idcnv_idmessage', 'idcnv', 'idmessage'),
+    )
+
 class Invitation(db.Model):
     __tablename__ = 'invitation'
     id = db.Column(db.Integer, primary_key=True)
@@ -30,3 +52,8 @@ class Invitation(db.Model):
     receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     status = db.Column(db.String(20), default='pending') # pending, accepted, rejected
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index('ix_invitation_receiver_id_status', 'receiver_id', 'status'),
+        db.Index('ix_invitation_sender_id_status', 'sender_id', 'status'),
+    )
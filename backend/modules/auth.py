@@ -0,0 +1,145 @@
+"""
+Stateless session tokens. A token is "<user id>.<expiry>.<signature>", the
+signature being an HMAC-SHA256 of the first two fields under AUTH_SECRET_KEY,
+so any server process holding the key verifies it without a database lookup.
+Verified tokens are kept in a small in-process LRU cache, which makes the
+check on every request and socket connect a dictionary lookup.
+
+Tokens cannot be revoked individually: rotating AUTH_SECRET_KEY invalidates
+all of them, and each one expires AUTH_TOKEN_TTL seconds after login.
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from flask import g, jsonify, request
+from modules.cache import TTLCache, MISSING
+
+# HMAC key shared by every server process; without it each process signs with
+# its own random key and tokens do not survive a restart, so create_app()
+# refuses to start without it unless running in debug or with AUTH_REQUIRED=0
+AUTH_SECRET_KEY = os.getenv('AUTH_SECRET_KEY')
+# Seconds a token stays valid after login
+AUTH_TOKEN_TTL = int(os.getenv('AUTH_TOKEN_TTL', 30 * 24 * 3600))
+# Verified tokens remembered per process, and for how long (seconds)
+AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', 4096))
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', 300))
+# Set to 0 while clients roll out: requests without a valid token are let
+# through (with no user) instead of being rejected
+AUTH_REQUIRED = os.getenv('AUTH_REQUIRED', '1') == '1'
+# Shared secret for operator routes (model activation, profiling), sent in the
+# X-Admin-Token header; unset, those routes refuse every call.
+# MODEL_ADMIN_TOKEN is the older name.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN') or os.getenv('MODEL_ADMIN_TOKEN')
+
+if not AUTH_SECRET_KEY:
+    print("AUTH_SECRET_KEY is not set: signing tokens with a random per-process key")
+_key = (AUTH_SECRET_KEY or secrets.token_hex(32)).encode()
+
+# token -> (user id, expiry); never shared across processes, tokens are credentials
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+def check_secret_key(debug=False):
+    """Raises RuntimeError when tokens are required but AUTH_SECRET_KEY is unset, outside debug."""
+    if AUTH_REQUIRED and not AUTH_SECRET_KEY and not debug:
+        raise RuntimeError("AUTH_SECRET_KEY must be set when AUTH_REQUIRED is on; "
+                           "generate one with: python -c 'import secrets; print(secrets.token_hex(32))'")
+
+
+def _sign(payload):
+    digest = hmac.new(_key, payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def issue_token(user_id, ttl=None):
+    expires = int(time.time() + (AUTH_TOKEN_TTL if ttl is None else ttl))
+    payload = f"{int(user_id)}.{expires}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token):
+    """Returns the token's user id, or None if it is missing, forged or expired."""
+    if not token:
+        return None
+    entry = token_cache.get(token)
+    if entry is MISSING:
+        try:
+            user_id, expires, signature = token.split('.')
+            entry = (int(user_id), int(expires))
+        except ValueError:
+            return None
+        if not hmac.compare_digest(signature, _sign(f"{user_id}.{expires}")):
+            return None
+        # Only valid signatures are cached, so junk tokens cannot evict real ones
+        token_cache.set(token, entry)
+    user_id, expires = entry
+    if expires <= time.time():
+        token_cache.delete(token)
+        return None
+    return user_id
+
+
+def bearer_token():
+    """The token of an "Authorization: Bearer <token>" header, or None."""
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else None
+
+
+def socket_token(auth):
+    """
+    Token offered on a Socket.IO connect: the client's `auth` payload
+    ({'token': ...}), else the Authorization header or a ?token= query
+    argument of the handshake, for clients that cannot send `auth`.
+    """
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    return bearer_token() or request.args.get('token')
+
+
+def forbidden():
+    return jsonify({'message': 'Forbidden'}), 403
+
+
+def is_caller(user_id):
+    """
+    Whether `user_id` (from a URL or request body) is the authenticated
+    caller. Routes act only as their caller, so a client cannot read or write
+    on another user's behalf by changing an id. Without a caller
+    (AUTH_REQUIRED off, no token) every id passes, as before tokens existed.
+    """
+    caller = g.get('user_id')
+    return caller is None or str(user_id) == str(caller)
+
+
+def admin_required(view):
+    """
+    Route decorator for operator routes: answers 403 unless the X-Admin-Token
+    header matches ADMIN_TOKEN. Fails closed when ADMIN_TOKEN is unset.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        offered = request.headers.get('X-Admin-Token', '')
+        if not ADMIN_TOKEN or not hmac.compare_digest(offered.encode(), ADMIN_TOKEN.encode()):
+            return forbidden()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def login_required(view):
+    """
+    Route decorator: verifies the bearer token and exposes its user id as
+    flask.g.user_id. Answers 401 when AUTH_REQUIRED and the token is invalid.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = verify_token(bearer_token())
+        if user_id is None and AUTH_REQUIRED:
+            return jsonify({'message': 'Invalid or missing token'}), 401
+        g.user_id = user_id
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by get() on a miss, so None can be cached (e.g. "no such user")
+MISSING = object()
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries also expire `ttl` seconds after they
+    were set. Values should be plain JSON-style data so both cache backends
+    behave the same.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """`ttl` overrides the cache's default lifetime for this entry."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'local',
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class RedisCache:
+    """
+    Cache shared by every server process, so an invalidation on one process
+    is seen by all of them. Requires the `redis` package.
+    """
+
+    def __init__(self, url, ttl=300, prefix='signlink:'):
+        import redis  # optional dependency, only needed for a shared cache
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._redis.setex(self.prefix + key, max(1, int(ttl)), json.dumps(value))
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache(url=None, max_entries=10000, ttl=300):
+    """Shared Redis cache when `url` is set, in-process cache otherwise."""
+    if url:
+        return RedisCache(url, ttl)
+    return TTLCache(max_entries, ttl)
@@ -1,36 +1,174 @@
-from models import db, Conversation, Message
+from sqlalchemy import case, select, union_all
+from sqlalchemy.exc import IntegrityError
+from models import db, Conversation, Message, User
+from modules.message_module import serialize_message
+from modules.user_module import find_user_by_email, invalidate_friends, user_cache
+from modules.cache import MISSING
 
-def create_conversation(iduser1, iduser2):
-    new_conversation = Conversation(iduser1=iduser1, iduser2=iduser2)
-    db.session.add(new_conversation)
+def canonical_pair(user_a, user_b):
+    """Conversations store each pair of users once, lowest id first."""
+    user_a, user_b = int(user_a), int(user_b)
+    return min(user_a, user_b), max(user_a, user_b)
+
+def find_conversation(user_a, user_b):
+    iduser1, iduser2 = canonical_pair(user_a, user_b)
+    return Conversation.query.filter_by(iduser1=iduser1, iduser2=iduser2).first()
+
+def find_conversation_id(user_a, user_b):
+    """
+    Cached id of the conversation between two users, or None. Conversations
+    are never deleted, so only found ids are cached and need no invalidation.
+    """
+    iduser1, iduser2 = canonical_pair(user_a, user_b)
+    key = f"conversation:{iduser1}:{iduser2}"
+    idconv = user_cache.get(key)
+    if idconv is MISSING:
+        conversation = find_conversation(iduser1, iduser2)
+        if conversation is None:
+            return None
+        idconv = conversation.idconv
+        user_cache.set(key, idconv)
+    return idconv
+
+def create_conversation(iduser1, iduser2, commit=True):
+    """
+    Returns the conversation between the two users, creating it if needed.
+    With commit=False it joins the caller's transaction instead: the caller
+    commits, then calls invalidate_friends.
+    """
+    iduser1, iduser2 = canonical_pair(iduser1, iduser2)
+    if iduser1 == iduser2:
+        raise Exception("Cannot start a conversation with yourself")
+
+    conversation = find_conversation(iduser1, iduser2)
+    if conversation:
+        return conversation
+
+    conversation = Conversation(iduser1=iduser1, iduser2=iduser2)
+    if not commit:
+        try:
+            # A savepoint, so losing the race below keeps the caller's transaction
+            with db.session.begin_nested():
+                db.session.add(conversation)
+        except IntegrityError:
+            return find_conversation(iduser1, iduser2)
+        return conversation
+
+    db.session.add(conversation)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Created concurrently by another request; the unique pair index won
+        db.session.rollback()
+        return find_conversation(iduser1, iduser2)
+    invalidate_friends(iduser1, iduser2)
+    return conversation
+
+MAX_PAGE_SIZE = 200
+
+def get_conversation_messages(conversation_id, since=None, before=None, limit=None):
+    """
+    Returns messages oldest-first, paged by the monotonic `idmessage`:
+    - since:  only messages newer than this id (incremental polling)
+    - before: only messages older than this id (backward pagination)
+    - limit:  page size; with no cursor, the latest `limit` messages.
+    With no arguments the full history is returned, as before.
+    All variants are served by the (idcnv, idmessage) index.
+    """
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = Message.query.filter_by(idcnv=conversation_id)
+    if since is not None:
+        query = query.filter(Message.idmessage > since).order_by(Message.idmessage.asc())
+        newest_last = False
+    elif before is not None or limit is not None:
+        if before is not None:
+            query = query.filter(Message.idmessage < before)
+        # Read the newest `limit` rows off the end of the index, then flip
+        query = query.order_by(Message.idmessage.desc())
+        newest_last = True
+    else:
+        query = query.order_by(Message.idmessage.asc())
+        newest_last = False
+
+    if limit is not None:
+        query = query.limit(limit)
+    messages = query.all()
+    if newest_last:
+        messages.reverse()
+
+    return [serialize_message(msg) for msg in messages]
+
+def is_participant(conversation_id, user_id):
+    conversation = Conversation.query.get(conversation_id)
+    return conversation is not None and int(user_id) in (conversation.iduser1, conversation.iduser2)
+
+def mark_conversation_read(conversation_id, user_id):
+    """Clears the user's unread count for the conversation."""
+    user_id = int(user_id)
+    Conversation.query.filter_by(idconv=conversation_id).update({
+        Conversation.iduser1_unread: case((Conversation.iduser1 == user_id, 0), else_=Conversation.iduser1_unread),
+        Conversation.iduser2_unread: case((Conversation.iduser2 == user_id, 0), else_=Conversation.iduser2_unread),
+    }, synchronize_session=False)
     db.session.commit()
 
-def get_conversation_messages(conversation_id):
-    messages = Message.query.filter_by(idcnv=conversation_id).order_by(Message.timestamp.asc()).all()
-    return [
-        {
-            'idmessage': msg.idmessage,
-            'iduser': msg.iduser,
-            'contenu': msg.contenu,
-            'timestamp': msg.timestamp.isoformat()
-        }
-        for msg in messages
-    ]
+def get_inbox(user_id):
+    """
+    Every conversation of the user, most recent activity first, with the
+    friend, the last message and the user's unread count. Runs as a single
+    statement: a UNION ALL of one seek on each pair index, joined to the
+    friend and the last message by primary key.
+    """
+    user_id = int(user_id)
+    as_user1 = select(
+        Conversation.idconv.label('idconv'),
+        Conversation.iduser2.label('friend_id'),
+        Conversation.iduser1_unread.label('unread'),
+        Conversation.last_message_id.label('last_message_id'),
+        Conversation.last_activity.label('last_activity'),
+    ).where(Conversation.iduser1 == user_id)
+    as_user2 = select(
+        Conversation.idconv,
+        Conversation.iduser1,
+        Conversation.iduser2_unread,
+        Conversation.last_message_id,
+        Conversation.last_activity,
+    ).where(Conversation.iduser2 == user_id)
+    mine = union_all(as_user1, as_user2).subquery()
+
+    rows = db.session.execute(
+        select(mine, User.name, User.email, Message.iduser, Message.contenu, Message.timestamp)
+        .join(User, User.id == mine.c.friend_id)
+        .outerjoin(Message, Message.idmessage == mine.c.last_message_id)
+        # last_activity has one-second resolution; message ids order the ties
+        .order_by(mine.c.last_activity.desc(), mine.c.last_message_id.desc(), mine.c.idconv.desc())
+    ).all()
+
+    inbox = []
+    for row in rows:
+        last_message = None
+        if row.last_message_id is not None:
+            last_message = {
+                'idmessage': row.last_message_id,
+                'iduser': row.iduser,
+                'contenu': row.contenu,
+                'timestamp': row.timestamp.isoformat(),
+            }
+        inbox.append({
+            'conversation_id': row.idconv,
+            'friend_id': row.friend_id,
+            'friend_name': row.name,
+            'friend_email': row.email,
+            'last_message': last_message,
+            'last_activity': row.last_activity.isoformat() if row.last_activity else None,
+            'unread_count': row.unread,
+        })
+    return inbox
+
 def get_conversation_id(user_id, friend_email):
-    from modules.user_module import find_user_by_email
     friend = find_user_by_email(friend_email)
     if not friend:
         raise Exception("Friend not found")
-    
-    conversation = Conversation.query.filter(
-        ((Conversation.iduser1 == user_id) & (Conversation.iduser2 == friend.id)) |
-        ((Conversation.iduser1 == friend.id) & (Conversation.iduser2 == user_id))
-    ).first()
 
-    if conversation:
-        return conversation.idconv
-    
-    new_conversation = Conversation(iduser1=user_id, iduser2=friend.id)
-    db.session.add(new_conversation)
-    db.session.commit()
-    return new_conversation.idconv
+    return find_conversation_id(user_id, friend.id) or create_conversation(user_id, friend.id).idconv
@@ -0,0 +1,73 @@
+import struct
+import numpy as np
+
+# Binary landmark payload, all fields little-endian:
+#
+#   offset  size  field
+#   0       1     version (currently 1)
+#   1       1     dtype code (1 = float32, 2 = float16)
+#   2       2     frame count
+#   4       2     feature count
+#   6       2     reserved (0), keeps the data 8-byte aligned
+#   8       ...   frame_count * feature_count values, row-major
+#
+# The server decodes it with np.frombuffer, so a float32 payload becomes the
+# model input without building any Python float objects.
+
+FRAME_CODEC_VERSION = 1
+
+HEADER = struct.Struct('<BBHHH')
+
+DTYPES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f2'),
+}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+
+def encode_frames(frames, dtype='float32'):
+    """
+    frames: array-like of shape (frame_count, feature_count).
+    Returns the packed payload as bytes.
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    data = np.ascontiguousarray(frames, dtype=dtype)
+    if data.ndim != 2:
+        raise ValueError(f"Expected a 2D array of frames, got shape {data.shape}")
+
+    header = HEADER.pack(FRAME_CODEC_VERSION, DTYPE_CODES[dtype], data.shape[0], data.shape[1], 0)
+    return header + data.tobytes()
+
+
+def decode_frames(payload):
+    """
+    payload: bytes-like object produced by encode_frames.
+    Returns a (frame_count, feature_count) float32 array. float32 payloads are
+    returned as a read-only view over `payload`; float16 payloads are upcast.
+    """
+    if len(payload) < HEADER.size:
+        raise ValueError("Payload too short for frame header")
+
+    version, dtype_code, frame_count, feature_count, _ = HEADER.unpack_from(payload)
+    if version != FRAME_CODEC_VERSION:
+        raise ValueError(f"Unsupported frame codec version: {version}")
+    dtype = DTYPES.get(dtype_code)
+    if dtype is None:
+        raise ValueError(f"Unsupported dtype code: {dtype_code}")
+
+    count = frame_count * feature_count
+    if len(payload) != HEADER.size + count * dtype.itemsize:
+        raise ValueError("Payload size does not match frame header")
+
+    frames = np.frombuffer(payload, dtype=dtype, count=count, offset=HEADER.size)
+    frames = frames.reshape(frame_count, feature_count)
+    if dtype != np.float32:
+        frames = frames.astype(np.float32)
+    return frames
+
+
+def is_packed(data):
+    return isinstance(data, (bytes, bytearray, memoryview))
@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+# Message tags sent by workers on their result queue
+READY = 'ready'
+RESULT = 'result'
+SWAPPED = 'swapped'
+# Control message tag sent to a worker on its request queue
+SWAP = 'swap'
+
+# Seconds a batch may stay unanswered before its clients are released with a
+# failed result; covers a worker stuck in TensorFlow
+INFERENCE_JOB_TIMEOUT = float(os.getenv('INFERENCE_JOB_TIMEOUT', 30))
+# Seconds between checks that every worker process is still alive
+INFERENCE_HEALTH_INTERVAL = float(os.getenv('INFERENCE_HEALTH_INTERVAL', 1))
+
+
+def _worker_main(worker_id, num_threads, requests, results):
+    """
+    Worker process entry point: loads its own model copy, then serves
+    (job_id, batch) requests until it receives None. (SWAP, version) loads
+    that version (None: the registry's CURRENT) and answers with the version
+    now served. Between batches it also follows the model registry's
+    CURRENT; a swap blocks only this worker.
+    """
+    os.environ.setdefault('TFLITE_NUM_THREADS', str(num_threads))
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from modules.model_registry import MODEL_WATCH_INTERVAL
+    from modules.sign_language_module import sign_language_model
+    sign_language_model.ensure_loaded()
+    results.put((READY, worker_id, _served_version(sign_language_model)))
+
+    server = multiprocessing.parent_process()
+    next_check = time.monotonic() + MODEL_WATCH_INTERVAL
+    while True:
+        try:
+            job = requests.get(timeout=MODEL_WATCH_INTERVAL)
+        except queue.Empty:
+            # A killed server never sends None; do not outlive it
+            if not server.is_alive():
+                break
+            job = ()
+        if time.monotonic() >= next_check:
+            sign_language_model.sync_with_registry(background=False)
+            next_check = time.monotonic() + MODEL_WATCH_INTERVAL
+        if job is None:
+            break
+        if not job:
+            continue
+        if job[0] == SWAP:
+            sign_language_model.swap(job[1], background=False)
+            results.put((SWAPPED, worker_id, _served_version(sign_language_model)))
+            continue
+        job_id, batch = job
+        active = sign_language_model.active
+        try:
+            probabilities = active.predict(batch) if active is not None else None
+        except Exception as e:
+            print(f"Inference worker {worker_id} failed on batch: {e}")
+            probabilities = None
+        results.put((RESULT, job_id, (probabilities, active.version if active is not None else None)))
+
+
+def _served_version(model):
+    return model.active.version if model.active is not None else None
+
+
+class _Worker:
+    """A worker process with its own request and result queues."""
+
+    def __init__(self, context, worker_id, num_threads):
+        # Queues are per worker: one killed while holding a shared queue's
+        # lock would otherwise wedge every other worker too
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.ready = False
+        self.version = None  # model version the worker last reported serving
+        self.swapping = False  # a SWAP was sent and not yet acknowledged
+        self.jobs = set()  # ids of the jobs sent to this worker, not yet answered
+        self.process = context.Process(
+            target=_worker_main,
+            args=(worker_id, num_threads, self.requests, self.results),
+            name=f'inference-worker-{worker_id}',
+            daemon=True,
+        )
+        self.process.start()
+
+    def discard(self):
+        """Drops the queues of a dead worker; batches nobody will read must not block exit."""
+        for channel in (self.requests, self.results):
+            channel.cancel_join_thread()
+            channel.close()
+
+
+class InferencePool:
+    """
+    Pool of worker processes, each holding one model copy, fed over
+    multiprocessing queues. Every method called from the server is
+    non-blocking, so the eventlet hub never waits on TensorFlow.
+
+    results() also supervises the workers: a dead worker (crash, OOM kill)
+    is respawned and the batches sent to it fail, as does any batch still
+    unanswered after INFERENCE_JOB_TIMEOUT, so no client is left waiting on
+    a result that will not come.
+
+    swap() reloads the model in every worker, one worker at a time so the
+    others keep serving; each acknowledges with the version it then serves.
+    """
+
+    def __init__(self, num_workers, max_in_flight=None, job_timeout=INFERENCE_JOB_TIMEOUT):
+        self.num_workers = num_workers
+        # Keep every worker busy with one batch queued behind it
+        self.max_in_flight = max_in_flight or num_workers * 2
+        self.job_timeout = job_timeout
+        self._jobs = {}  # job_id -> (items submitted with that batch, submitted at)
+        self._next_job_id = 0
+        self._workers = []
+        self._next_health_check = 0.0
+        self._swap_version = None
+        self._swap_pending = []  # ids of the workers still to swap
+        # swap() runs on request threads, acknowledgements on the scheduler's
+        self._swap_lock = threading.Lock()
+
+    def start(self):
+        """Spawns the workers. No-op once started."""
+        if self._workers:
+            return
+        # 'spawn' gives each worker a clean interpreter instead of forking the
+        # eventlet hub and any TensorFlow state of the parent.
+        self._context = multiprocessing.get_context('spawn')
+        self._num_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        self._workers = [_Worker(self._context, worker_id, self._num_threads) for worker_id in range(self.num_workers)]
+        print(f"Started {self.num_workers} inference workers ({self._num_threads} threads each)")
+
+    def is_ready(self):
+        return any(worker.ready for worker in self._workers)
+
+    def ready_workers(self):
+        return sum(worker.ready for worker in self._workers)
+
+    def versions(self):
+        """Model version each worker reported serving, by worker id (None until ready)."""
+        return [worker.version for worker in self._workers]
+
+    def swapping(self):
+        return bool(self._swap_pending) or any(worker.swapping for worker in self._workers)
+
+    def swap(self, version=None):
+        """
+        Starts a rolling reload of `version` (default: the registry's CURRENT)
+        across the workers. Returns False if a swap is still in progress.
+        """
+        with self._swap_lock:
+            if not self._workers or self.swapping():
+                return False
+            self._swap_version = version
+            self._swap_pending = list(range(len(self._workers)))
+        self._advance_swap()
+        return True
+
+    def _advance_swap(self):
+        """Sends the swap to the next worker once none is busy loading."""
+        with self._swap_lock:
+            if any(worker.swapping for worker in self._workers) or not self._swap_pending:
+                return
+            worker = self._workers[self._swap_pending.pop(0)]
+            worker.swapping = True
+            worker.requests.put((SWAP, self._swap_version))
+
+    def in_flight(self):
+        return len(self._jobs)
+
+    def saturated(self):
+        return len(self._jobs) >= self.max_in_flight
+
+    def submit(self, items, batch):
+        """Sends the batch to the least busy worker, preferring ready ones not loading a model."""
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        worker = min(self._workers, key=lambda worker: (not worker.ready, worker.swapping, len(worker.jobs)))
+        self._jobs[job_id] = (items, time.monotonic())
+        worker.jobs.add(job_id)
+        worker.requests.put((job_id, batch))
+
+    def results(self):
+        """
+        Yields (items, probabilities, version) for every batch finished since
+        the last call; probabilities is None for a batch that failed, was lost
+        with its worker or timed out.
+        """
+        for worker_id, worker in enumerate(self._workers):
+            while True:
+                try:
+                    tag, key, payload = worker.results.get_nowait()
+                except queue.Empty:
+                    break
+                if tag == READY:
+                    worker.ready = True
+                    worker.version = payload
+                    print(f"Inference worker {key} ready, serving model {payload}")
+                    continue
+                if tag == SWAPPED:
+                    with self._swap_lock:
+                        worker.swapping = False
+                    worker.version = payload
+                    if self._swap_version is not None and payload != self._swap_version:
+                        print(f"Inference worker {key} could not load model {self._swap_version}, "
+                              f"still serving {payload}")
+                    else:
+                        print(f"Inference worker {key} now serving model {payload}")
+                    self._advance_swap()
+                    continue
+                worker.jobs.discard(key)
+                job = self._jobs.pop(key, None)
+                if job is not None:
+                    yield (job[0], *payload)
+        if time.monotonic() < self._next_health_check:
+            return
+        self._next_health_check = time.monotonic() + INFERENCE_HEALTH_INTERVAL
+        for job_id in self._replace_dead_workers() + self._timed_out_jobs():
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                yield (job[0], None, None)
+
+    def _replace_dead_workers(self):
+        """Respawns dead workers; returns the ids of the jobs lost with them."""
+        lost = []
+        for worker_id, worker in enumerate(self._workers):
+            if worker.process.is_alive():
+                continue
+            print(f"Inference worker {worker_id} died (exit code {worker.process.exitcode}), "
+                  f"failing {len(worker.jobs)} batches and respawning it")
+            lost += worker.jobs
+            worker.discard()
+            self._workers[worker_id] = _Worker(self._context, worker_id, self._num_threads)
+        # A replacement loads the registry's CURRENT itself; carry on with the rest
+        self._advance_swap()
+        return lost
+
+    def _timed_out_jobs(self):
+        deadline = time.monotonic() - self.job_timeout
+        expired = [job_id for job_id, (_, submitted) in self._jobs.items() if submitted < deadline]
+        if expired:
+            # They stay in their worker's jobs until answered: a stuck worker
+            # keeps looking busy and gets no new batches
+            print(f"{len(expired)} inference batches unanswered after {self.job_timeout:.0f}s, releasing their clients")
+        return expired
+
+    def stop(self):
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+        self._workers = []
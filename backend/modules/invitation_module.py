@@ -1,6 +1,6 @@
-from models import db, Invitation, User, Conversation
-from modules.user_module import find_user_by_email
-from modules.conversation_module import create_conversation
+from models import db, Invitation, User
+from modules.user_module import find_user_by_email, invalidate_friends
+from modules.conversation_module import create_conversation, find_conversation_id
 
 def send_invitation(sender_id, receiver_email):
     receiver = find_user_by_email(receiver_email)
@@ -10,22 +10,21 @@ def send_invitation(sender_id, receiver_email):
     if sender_id == receiver.id:
         raise Exception("Cannot invite yourself")
 
-    # Check if invitation already exists
+    # Check if invitation already exists, in either direction. Since the two
+    # ids differ, the IN pair matches exactly (a -> b) and (b -> a), and is
+    # served by two seeks on (sender_id, status).
+    pair = (sender_id, receiver.id)
     existing_invitation = Invitation.query.filter(
-        ((Invitation.sender_id == sender_id) & (Invitation.receiver_id == receiver.id)) |
-        ((Invitation.sender_id == receiver.id) & (Invitation.receiver_id == sender_id))
-    ).filter(Invitation.status == 'pending').first()
+        Invitation.sender_id.in_(pair),
+        Invitation.status == 'pending',
+        Invitation.receiver_id.in_(pair)
+    ).first()
 
     if existing_invitation:
         raise Exception("Invitation already pending")
 
     # Check if already friends (conversation exists)
-    existing_conversation = Conversation.query.filter(
-        ((Conversation.iduser1 == sender_id) & (Conversation.iduser2 == receiver.id)) |
-        ((Conversation.iduser1 == receiver.id) & (Conversation.iduser2 == sender_id))
-    ).first()
-
-    if existing_conversation:
+    if find_conversation_id(sender_id, receiver.id):
         raise Exception("Already friends")
 
     new_invitation = Invitation(sender_id=sender_id, receiver_id=receiver.id)
@@ -49,18 +48,28 @@ def get_sent_invitations(user_id):
     
     return [{'id': inv.id, 'receiver_name': user.name, 'receiver_email': user.email, 'timestamp': inv.timestamp} for inv, user in invitations]
 
-def respond_to_invitation(invitation_id, status):
+def respond_to_invitation(invitation_id, status, receiver_id=None):
+    """Accepts or rejects an invitation; only `receiver_id` may, when given."""
     invitation = Invitation.query.get(invitation_id)
     if not invitation:
         raise Exception("Invitation not found")
+    if receiver_id is not None and invitation.receiver_id != int(receiver_id):
+        raise PermissionError("Only the invitation's receiver can respond to it")
     
     if status not in ['accepted', 'rejected']:
         raise Exception("Invalid status")
 
+    # The status and the conversation commit together: a failed conversation
+    # leaves the invitation pending instead of accepted with no conversation
     invitation.status = status
-    
+    try:
+        if status == 'accepted':
+            create_conversation(invitation.sender_id, invitation.receiver_id, commit=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
     if status == 'accepted':
-        create_conversation(invitation.sender_id, invitation.receiver_id)
-    
-    db.session.commit()
+        invalidate_friends(invitation.sender_id, invitation.receiver_id)
     return invitation
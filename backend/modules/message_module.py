@@ -1,6 +1,202 @@
-from models import db, Message
+import os
+import threading
+import time
+from collections import Counter
+from sqlalchemy import case, insert, select
+from models import db, Message, Conversation
+
+# Optional write-behind persistence: messages are buffered and stored with one
+# multi-row INSERT and one commit per flush, every MESSAGE_FLUSH_MS or once
+# MESSAGE_FLUSH_ROWS are pending. Senders are acked after their flush commits.
+MESSAGE_WRITE_BEHIND = os.getenv('MESSAGE_WRITE_BEHIND', '0') == '1'
+MESSAGE_FLUSH_ROWS = int(os.getenv('MESSAGE_FLUSH_ROWS', 100))
+MESSAGE_FLUSH_MS = float(os.getenv('MESSAGE_FLUSH_MS', 5))
+
+def serialize_message(msg):
+    return {
+        'idmessage': msg.idmessage,
+        'idcnv': msg.idcnv,
+        'iduser': msg.iduser,
+        'contenu': msg.contenu,
+        'timestamp': msg.timestamp.isoformat()
+    }
+
+def _update_summary(idcnv, last_message_id, activity, senders):
+    """
+    Updates the conversation's inbox summary: last message, activity time,
+    and the unread count of each participant for the messages it did not send.
+    senders: Counter of sender id -> messages added.
+    """
+    added = sum(senders.values())
+
+    def sent_by(column):
+        return case(*((column == int(sender), count) for sender, count in senders.items()), else_=0)
+
+    Conversation.query.filter_by(idconv=idcnv).update({
+        Conversation.last_message_id: last_message_id,
+        Conversation.last_activity: activity,
+        Conversation.iduser1_unread: Conversation.iduser1_unread + added - sent_by(Conversation.iduser1),
+        Conversation.iduser2_unread: Conversation.iduser2_unread + added - sent_by(Conversation.iduser2),
+    }, synchronize_session=False)
 
 def create_message(idcnv, iduser, contenu):
     new_message = Message(idcnv=idcnv, iduser=iduser, contenu=contenu)
     db.session.add(new_message)
-    db.session.commit()
\ No newline at end of file
+    db.session.flush()
+
+    # Update the conversation's inbox summary in the same transaction
+    _update_summary(idcnv, new_message.idmessage, db.func.now(), Counter([int(iduser)]))
+
+    db.session.commit()
+    return new_message
+
+def insert_messages(rows):
+    """
+    Stores (idcnv, iduser, contenu) rows with a single multi-row INSERT (one
+    INSERT per row without RETURNING, i.e. on MySQL) plus one summary UPDATE
+    per conversation, in the current transaction (the caller commits).
+    Returns the serialized messages in input order.
+    """
+    timestamp = db.session.execute(select(db.func.now())).scalar()
+    values = [
+        {'idcnv': int(idcnv), 'iduser': int(iduser), 'contenu': contenu, 'timestamp': timestamp}
+        for idcnv, iduser, contenu in rows
+    ]
+
+    if db.engine.dialect.insert_returning:
+        ids = db.session.execute(
+            insert(Message).returning(Message.idmessage, sort_by_parameter_order=True), values
+        ).scalars().all()
+    else:
+        # MySQL has no RETURNING, and a multi-row INSERT only gets consecutive
+        # ids under innodb_autoinc_lock_mode 0 or 1: with 2 (the MySQL 8
+        # default) concurrent inserts interleave. One INSERT per row returns
+        # each id exactly; the batch still shares one transaction and commit.
+        ids = [db.session.execute(insert(Message).values(value)).lastrowid for value in values]
+
+    summaries = {}
+    for value, idmessage in zip(values, ids):
+        value['idmessage'] = idmessage
+        last_id, senders = summaries.setdefault(value['idcnv'], [0, Counter()])
+        summaries[value['idcnv']][0] = max(last_id, idmessage)
+        senders[value['iduser']] += 1
+    for idcnv, (last_id, senders) in summaries.items():
+        _update_summary(idcnv, last_id, timestamp, senders)
+
+    return [{
+        'idmessage': value['idmessage'],
+        'idcnv': value['idcnv'],
+        'iduser': value['iduser'],
+        'contenu': value['contenu'],
+        'timestamp': timestamp.isoformat(),
+    } for value in values]
+
+class MessageWriter:
+    """
+    Write-behind buffer for chat messages. write() queues a message and waits
+    until the flush loop has committed it; each flush stores everything
+    pending with insert_messages() and a single commit.
+    """
+
+    def __init__(self, max_rows=100, max_wait_ms=5):
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._create_event = threading.Event
+        self._app = None
+        self._running = False
+        self.batches = 0
+        self.messages = 0
+
+    def start(self, app, socketio):
+        """Runs the flush loop as a server background task."""
+        if self._running:
+            return
+        self._app = app
+        # Events must cooperate with the server's async mode (eventlet, threads)
+        self._create_event = socketio.server.eio.create_event
+        self._running = True
+        socketio.start_background_task(self.run, socketio.sleep)
+
+    def is_running(self):
+        return self._running
+
+    def write(self, idcnv, iduser, contenu, timeout=5):
+        """Returns the serialized message once stored; raises if it could not be."""
+        entry = {'row': (idcnv, iduser, contenu), 'done': self._create_event(), 'queued_at': time.perf_counter()}
+        with self._lock:
+            self._pending.append(entry)
+        if not entry['done'].wait(timeout):
+            raise Exception("Timed out waiting for the message to be saved")
+        if 'error' in entry:
+            raise entry['error']
+        return entry['message']
+
+    def flush(self):
+        """Stores up to max_rows pending messages. Returns the number taken."""
+        with self._lock:
+            batch = self._pending[:self.max_rows]
+            del self._pending[:len(batch)]
+        if not batch:
+            return 0
+
+        try:
+            messages = insert_messages([entry['row'] for entry in batch])
+            db.session.commit()
+            for entry, message in zip(batch, messages):
+                entry['message'] = message
+        except Exception as e:
+            db.session.rollback()
+            print(f"Batched message insert failed ({e}), retrying row by row")
+            # One bad row (e.g. an unknown conversation) must not fail the others
+            for entry in batch:
+                try:
+                    entry['message'] = serialize_message(create_message(*entry['row']))
+                except Exception as row_error:
+                    db.session.rollback()
+                    entry['error'] = row_error
+        finally:
+            for entry in batch:
+                entry['done'].set()
+
+        self.batches += 1
+        self.messages += len(batch)
+        return len(batch)
+
+    def run(self, sleep=time.sleep):
+        """Flush loop. `sleep` must cooperate with the server's async mode."""
+        self._running = True
+        while self._running:
+            with self._lock:
+                depth = len(self._pending)
+                oldest = self._pending[0]['queued_at'] if depth else None
+            if depth == 0:
+                sleep(self.max_wait)
+                continue
+
+            remaining = self.max_wait - (time.perf_counter() - oldest)
+            if depth >= self.max_rows or remaining <= 0:
+                try:
+                    with self._app.app_context():
+                        self.flush()
+                        db.session.remove()
+                except Exception as e:
+                    print(f"Error flushing messages: {e}")
+                sleep(0)
+            else:
+                sleep(remaining)
+
+    def stop(self):
+        self._running = False
+
+message_writer = MessageWriter(MESSAGE_FLUSH_ROWS, MESSAGE_FLUSH_MS)
+
+def persist_message(idcnv, iduser, contenu):
+    """
+    Stores a message and returns it serialized, through the write-behind
+    buffer when it is running.
+    """
+    if message_writer.is_running():
+        return message_writer.write(idcnv, iduser, contenu)
+    return serialize_message(create_message(idcnv, iduser, contenu))
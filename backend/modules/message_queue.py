@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import socketio
+
+# Cross-process fan-out for Socket.IO emits. Every server process registers a
+# client manager attached to a pub/sub backend, so `socketio.emit(..., room=sid)`
+# reaches the client whichever process holds its connection.
+#
+# Backends are selected by the SOCKETIO_MESSAGE_QUEUE URL scheme:
+#   unix:///path/to/broker.sock  local broker below (development, CI, one box)
+#   redis://, rediss://          socketio.RedisManager
+#   kafka://                     socketio.KafkaManager
+#   zmq+tcp://                   socketio.ZmqManager
+#   anything else (amqp://...)   socketio.KombuManager
+
+DEFAULT_CHANNEL = 'flask-socketio'
+
+# Broker frames: 4-byte big-endian length followed by a JSON [channel, message]
+FRAME_HEADER = struct.Struct('>I')
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv_frame(sock):
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    return _recv_exactly(sock, FRAME_HEADER.unpack(header)[0])
+
+
+def _frame(payload):
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.send_lock = threading.Lock()
+        with self.server.lock:
+            self.server.connections.add(self)
+
+    def handle(self):
+        while True:
+            payload = _recv_frame(self.request)
+            if payload is None:
+                return
+            self.server.fan_out(self, _frame(payload))
+
+    def finish(self):
+        with self.server.lock:
+            self.server.connections.discard(self)
+
+
+class MessageBroker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Minimal pub/sub broker over a Unix domain socket. Every frame received on
+    a connection is forwarded unparsed to all other connections; channels are
+    filtered by the subscribers.
+    """
+    daemon_threads = True
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _BrokerHandler)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connections = set()
+
+    def fan_out(self, sender, frame):
+        with self.lock:
+            targets = [c for c in self.connections if c is not sender]
+        for connection in targets:
+            try:
+                with connection.send_lock:
+                    connection.request.sendall(frame)
+            except OSError:
+                pass  # the handler thread notices the closed socket and cleans up
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def run_broker(path):
+    broker = MessageBroker(path)
+    print(f"Socket.IO message broker listening on {path}")
+    try:
+        broker.serve_forever()
+    finally:
+        broker.server_close()
+
+
+class StickyRoutingMixin:
+    """
+    Delivers emits addressed to a sid connected to this process directly,
+    without a round trip through the queue. With sticky sessions every
+    client's stream events, and so its inference results, stay on the process
+    holding its socket; only emits to sids living elsewhere, and to shared
+    rooms such as conversations, are published.
+    """
+
+    local_emits = 0
+    published_emits = 0
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None,
+             callback=None, to=None, **kwargs):
+        room = to or room
+        if not kwargs.get('ignore_queue'):
+            if room is not None and self.is_connected(room, namespace or '/'):
+                self.local_emits += 1
+                kwargs['ignore_queue'] = True
+            else:
+                self.published_emits += 1
+        return super().emit(event, data, namespace=namespace, room=room,
+                            skip_sid=skip_sid, callback=callback, **kwargs)
+
+
+class UnixSocketManager(StickyRoutingMixin, socketio.PubSubManager):
+    """
+    Client manager backed by MessageBroker. It keeps one connection for
+    publishing and one for listening.
+    """
+    name = 'unix'
+
+    def __init__(self, url, channel=DEFAULT_CHANNEL, write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = url[len('unix://'):] if url.startswith('unix://') else url
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _socket_module(self):
+        # The listener runs as a server background task, so it must use a
+        # cooperative socket when the server runs on eventlet or gevent.
+        async_mode = self.server.async_mode if self.server is not None else None
+        if async_mode == 'eventlet':
+            from eventlet.green import socket as green_socket
+            return green_socket
+        if async_mode == 'gevent':
+            from gevent import socket as green_socket
+            return green_socket
+        return socket
+
+    def _connect(self):
+        sock = self._socket_module().socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def _publish(self, data):
+        frame = _frame(json.dumps([self.channel, data]).encode())
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect()
+                    self._publisher.sendall(frame)
+                    return
+                except OSError as e:
+                    self._publisher = None
+                    if attempt:
+                        self._get_logger().error(f"Cannot publish to message broker at {self.path}: {e}")
+
+    def _listen(self):
+        while True:
+            try:
+                sock = self._connect()
+            except OSError as e:
+                self._get_logger().error(f"Cannot reach message broker at {self.path}: {e}, retrying in 1s")
+                self.server.sleep(1)
+                continue
+            try:
+                while True:
+                    payload = _recv_frame(sock)
+                    if payload is None:
+                        break
+                    channel, message = json.loads(payload)
+                    if channel == self.channel:
+                        yield message
+            except OSError:
+                pass
+            finally:
+                sock.close()
+            self._get_logger().error("Connection to message broker lost, reconnecting")
+
+
+QUEUE_MANAGERS = {
+    'unix': UnixSocketManager,
+    'redis': socketio.RedisManager,
+    'rediss': socketio.RedisManager,
+    'kafka': socketio.KafkaManager,
+    'zmq': socketio.ZmqManager,
+}
+
+
+def create_client_manager(url, channel=DEFAULT_CHANNEL, write_only=False):
+    """
+    Returns a client manager for the message queue at `url`, with sticky
+    routing of emits to local sids. Pass write_only=True from processes that
+    only emit to clients (e.g. a standalone inference node).
+    """
+    scheme = url.split(':', 1)[0].split('+', 1)[0]
+    base = QUEUE_MANAGERS.get(scheme, socketio.KombuManager)
+    if not issubclass(base, StickyRoutingMixin):
+        base = type(f'Sticky{base.__name__}', (StickyRoutingMixin, base), {})
+    return base(url, channel=channel, write_only=write_only)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the local Socket.IO message broker.")
+    parser.add_argument('path', nargs='?', default='/tmp/signlink-socketio.sock')
+    run_broker(parser.parse_args().path)
@@ -0,0 +1,241 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Hot-path instrumentation, exposed in Prometheus text format on /metrics.
+# Disabled by default: timers are then a shared no-op context manager and no
+# SQLAlchemy listener, request hook or hub monitor is installed.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0') == '1'
+# How often the hub monitor wakes up to measure event loop lag
+METRICS_HUB_INTERVAL_MS = float(os.getenv('METRICS_HUB_INTERVAL_MS', 50))
+# Fraction of HTTP requests run under cProfile while metrics are enabled
+# (0 disables; adjustable at runtime through POST /metrics/profile with the
+# X-Admin-Token header)
+METRICS_PROFILE_RATE = float(os.getenv('METRICS_PROFILE_RATE', 0))
+
+# Seconds; spans sub-millisecond decode times up to multi-second stalls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_NOOP = nullcontext()
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels. observe() takes the
+    label values positionally, in the order of `labelnames`.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *labels):
+        """Context manager observing the elapsed seconds; a no-op when disabled."""
+        if not METRICS_ENABLED:
+            return _NOOP
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames + ("le",), labels + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames + ("le",), labels + ("+Inf",))} {values[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {values[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {values[-1]}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """
+    Histograms plus gauge collectors: callables returning a dict of numeric
+    values, read at scrape time (e.g. cache or batcher counters that the
+    modules already keep).
+    """
+
+    def __init__(self):
+        self._histograms = []
+        self._collectors = []
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, prefix, documentation, collect):
+        self._collectors.append((prefix, documentation, collect))
+
+    def render(self):
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for prefix, documentation, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                print(f"Error collecting {prefix} metrics: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# HELP {prefix}_{key} {documentation}')
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+SOCKET_DECODE = registry.histogram(
+    'signlink_socket_decode_seconds', 'Time to decode an incoming landmark payload.', ('event',))
+WINDOW_TO_TENSOR = registry.histogram(
+    'signlink_window_to_tensor_seconds', 'Time to stack pending windows into the (N, 30, 99) batch.')
+PREPROCESS = registry.histogram(
+    'signlink_preprocess_seconds', 'Server-side landmark preprocessing time per batch.', ('version',))
+MODEL_PREDICT = registry.histogram(
+    'signlink_model_predict_seconds', 'In-process model inference latency per batch.', ('backend', 'version'))
+SOCKET_EMIT = registry.histogram(
+    'signlink_socket_emit_seconds', 'Time spent in socketio.emit.', ('event',))
+HTTP_REQUEST = registry.histogram(
+    'signlink_http_request_seconds', 'HTTP request latency per blueprint route.', ('route',))
+DB_QUERY = registry.histogram(
+    'signlink_db_query_seconds', 'SQL statement latency per route or socket event.', ('route',))
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    'signlink_db_queries_per_request', 'SQL statements issued per HTTP request.', ('route',), COUNT_BUCKETS)
+HUB_BLOCKING = registry.histogram(
+    'signlink_hub_blocking_seconds', 'Event loop lag: how late the hub monitor woke up.')
+
+
+def current_route():
+    """Label for the current context: blueprint endpoint, socket event or 'background'."""
+    from flask import has_request_context, request
+    if not has_request_context():
+        return 'background'
+    if request.endpoint:
+        return request.endpoint
+    event = getattr(request, 'event', None)
+    if event:
+        return f"socket:{event['message']}"
+    return 'unknown'
+
+
+def _install_sql_listeners():
+    from flask import g, has_request_context
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY.observe(time.perf_counter() - context._metrics_start, current_route())
+        if has_request_context():
+            g.metrics_queries = g.get('metrics_queries', 0) + 1
+
+
+profile_state = {'rate': METRICS_PROFILE_RATE, 'last': None}
+
+
+def set_profile_rate(rate):
+    """Sets the fraction of HTTP requests to profile (0 turns profiling off)."""
+    profile_state['rate'] = min(max(float(rate), 0.0), 1.0)
+
+
+def _install_request_hooks(app):
+    from flask import g, request
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        if profile_state['rate'] and random.random() < profile_state['rate']:
+            g.metrics_profiler = cProfile.Profile()
+            g.metrics_profiler.enable()
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(20)
+            profile_state['last'] = f"{request.method} {request.path}\n{output.getvalue()}"
+            print(f"Profiled {request.method} {request.path}")
+        if 'metrics_start' in g:
+            route = current_route()
+            HTTP_REQUEST.observe(time.perf_counter() - g.metrics_start, route)
+            DB_QUERIES_PER_REQUEST.observe(g.get('metrics_queries', 0), route)
+
+
+def monitor_hub(sleep, interval):
+    """
+    Sleeps `interval` seconds in a loop and records how late each wake-up is.
+    Under eventlet, lag means something held the hub without yielding.
+    """
+    while True:
+        start = time.perf_counter()
+        sleep(interval)
+        HUB_BLOCKING.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+def init_app(app, socketio):
+    """Installs the SQL listeners, request hooks and hub monitor when enabled."""
+    if not METRICS_ENABLED:
+        return
+    _install_sql_listeners()
+    _install_request_hooks(app)
+    socketio.start_background_task(monitor_hub, socketio.sleep, METRICS_HUB_INTERVAL_MS / 1000.0)
+    print("Metrics enabled on /metrics")
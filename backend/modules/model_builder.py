@@ -1,9 +1,15 @@
+import argparse
+import time
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional
+from tensorflow.keras.models import Model, Sequential, load_model
+from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional, Input, Reshape
 import numpy as np
 import os
 
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'sign_language_model.h5')
+TFLITE_PATH = os.path.join(os.path.dirname(__file__), 'sign_language_model.tflite')
+CAUSAL_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'sign_language_model_causal.h5')
+
 def build_model(input_shape, num_classes):
     """
     Builds a Bi-directional LSTM model for sign language recognition.
@@ -17,10 +23,85 @@ def build_model(input_shape, num_classes):
         Dense(64, activation='relu'),
         Dense(num_classes, activation='softmax')
     ])
-    
+
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+def build_causal_model(input_shape, num_classes):
+    """
+    Unidirectional variant of build_model for streaming. Each output only
+    depends on the frames seen so far, so serving can carry the LSTM states
+    from one frame to the next (see build_step_model) instead of rereading
+    the whole window. Trains on the same (N, 30, 99) windows.
+    """
+    model = Sequential([
+        LSTM(64, return_sequences=True, input_shape=input_shape, name='lstm_1'),
+        Dropout(0.2),
+        LSTM(128, return_sequences=False, name='lstm_2'),
+        Dropout(0.2),
+        Dense(64, activation='relu', name='dense_1'),
+        Dense(num_classes, activation='softmax', name='output')
+    ])
+
     model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
     return model
 
+def build_step_model(causal_model):
+    """
+    Single-frame model sharing the weights of a build_causal_model model.
+    Inputs: frame (N, 99) and the states [h1, c1, h2, c2] of both LSTMs.
+    Outputs: the (N, num_classes) probabilities and the updated states.
+    Stepping a window frame by frame from zero states gives the same output
+    as the causal model on the whole window.
+    """
+    num_features = causal_model.input_shape[-1]
+    frame = Input((num_features,), name='frame')
+    x = Reshape((1, num_features))(frame)
+
+    states = []
+    outputs = []
+    for name in ('lstm_1', 'lstm_2'):
+        layer = causal_model.get_layer(name)
+        config = layer.get_config()
+        config.update(name=f'{name}_step', return_sequences=name == 'lstm_1', return_state=True, stateful=False)
+        step_layer = LSTM.from_config(config)
+        h = Input((layer.units,), name=f'{name}_h')
+        c = Input((layer.units,), name=f'{name}_c')
+        x, new_h, new_c = step_layer(x, initial_state=[h, c])
+        step_layer.set_weights(layer.get_weights())
+        states += [h, c]
+        outputs += [new_h, new_c]
+
+    # The dense head is shared with the causal model (Dropout is inactive at inference)
+    probabilities = causal_model.get_layer('output')(causal_model.get_layer('dense_1')(x))
+    return Model([frame] + states, [probabilities] + outputs)
+
+def distill_causal_model(teacher_path=MODEL_PATH, output_path=CAUSAL_MODEL_PATH, data_path=None, epochs=20):
+    """
+    Trains a causal model and saves it to output_path. With a .npz holding
+    'x' windows and integer 'y' labels it trains on those; otherwise it
+    learns to reproduce the Bi-LSTM at teacher_path on the given windows,
+    or on random ones when data_path is None.
+    """
+    teacher = load_model(teacher_path, compile=False)
+    _, sequence_length, num_features = teacher.input_shape
+    num_classes = teacher.output_shape[-1]
+
+    if data_path is not None:
+        windows, labels = load_calibration_set(data_path)
+    else:
+        windows, labels = np.random.rand(4096, sequence_length, num_features).astype(np.float32), None
+    if labels is not None:
+        targets = tf.keras.utils.to_categorical(labels, num_classes)
+    else:
+        targets = teacher.predict(windows, batch_size=256, verbose=0)
+
+    model = build_causal_model((sequence_length, num_features), num_classes)
+    model.fit(windows, targets, epochs=epochs, batch_size=64, validation_split=0.1, verbose=2)
+    model.save(output_path)
+    print(f"Causal model saved to {output_path}")
+    return output_path
+
 def save_dummy_model():
     """
     Creates and saves a model with dummy weights for pipeline verification.
@@ -28,19 +109,152 @@ def save_dummy_model():
     sequence_length = 30
     num_features = 99 # 33 landmarks * 3 (x, y, z)
     num_classes = 3 # e.g., ["Hello", "Thank You", "I Love You"]
-    
+
     model = build_model((sequence_length, num_features), num_classes)
-    
+
     # Save the model
-    model_path = os.path.join(os.path.dirname(__file__), 'sign_language_model.h5')
+    model_path = MODEL_PATH
     model.save(model_path)
     print(f"Model saved to {model_path}")
-    
+
     # Save labels
     labels_path = os.path.join(os.path.dirname(__file__), 'labels.txt')
     with open(labels_path, 'w') as f:
         f.write("Hello\nThank You\nI Love You")
     print(f"Labels saved to {labels_path}")
 
+# Post-training quantization modes accepted by export_tflite
+QUANTIZATIONS = ('int8', 'float16')
+
+def export_tflite(model_path=MODEL_PATH, output_path=TFLITE_PATH, quantization=None):
+    """
+    Converts the Keras model to a TFLite flatbuffer for the 'tflite' backend.
+    The graph is traced with a static batch of 1 so the Bi-LSTM lowers to
+    fused TFLite LSTM kernels instead of TensorList ops.
+    quantization: None, 'int8' (dynamic-range weights) or 'float16'.
+    """
+    model = load_model(model_path, compile=False)
+    _, sequence_length, num_features = model.input_shape
+
+    serve = tf.function(
+        lambda batch: model(batch, training=False),
+        input_signature=[tf.TensorSpec([1, sequence_length, num_features], tf.float32)],
+    )
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], model)
+    if quantization is not None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+    tflite_model = converter.convert()
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"TFLite model saved to {output_path} ({len(tflite_model)} bytes)")
+    return output_path
+
+def check_parity(backend, model_path=None, num_windows=64, atol=1e-4):
+    """
+    Compares a runtime backend against the Keras model on random windows.
+    Returns the top-1 agreement rate and the largest probability difference.
+    """
+    from modules.sign_language_module import load_runtime, SEQUENCE_LENGTH, NUM_FEATURES
+
+    windows = np.random.rand(num_windows, SEQUENCE_LENGTH, NUM_FEATURES).astype(np.float32)
+    reference = load_runtime('keras').predict(windows)
+    candidate = load_runtime(backend, model_path).predict(windows)
+
+    result = {
+        'backend': backend,
+        'top1_agreement': float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1))),
+        'max_abs_diff': float(np.abs(reference - candidate).max()),
+    }
+    result['ok'] = result['top1_agreement'] == 1.0 and result['max_abs_diff'] <= atol
+    print(f"Parity {backend}: top-1 agreement {result['top1_agreement']:.3f}, "
+          f"max |diff| {result['max_abs_diff']:.2e} ({'ok' if result['ok'] else 'FAILED'})")
+    return result
+
+def load_calibration_set(path):
+    """
+    Loads recorded windows for evaluation. Accepts a .npy array of shape
+    (N, 30, 99), or a .npz with 'x' (N, 30, 99) and optional integer 'y' labels.
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data['x'].astype(np.float32), data['y'] if 'y' in data else None
+    return np.load(path).astype(np.float32), None
+
+def _latency_ms(runtime, windows):
+    latencies = []
+    for window in windows:
+        start = time.perf_counter()
+        runtime.predict(window[np.newaxis])
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def quantize_model(calibration_path, model_path=MODEL_PATH):
+    """
+    Produces int8 and float16 TFLite variants next to model_path and reports
+    size, single-window p50/p99 latency and accuracy against the float model.
+    When the calibration set has no labels, accuracy is the top-1 agreement
+    with the float Keras model.
+    """
+    from modules.sign_language_module import load_runtime
+
+    windows, labels = load_calibration_set(calibration_path)
+    float_runtime = load_runtime('keras', model_path)
+    float_probs = float_runtime.predict(windows)
+    reference = labels if labels is not None else float_probs.argmax(axis=1)
+
+    variants = [('float32', 'keras', model_path)]
+    base = os.path.splitext(model_path)[0]
+    for quantization in QUANTIZATIONS:
+        output_path = f"{base}.{quantization}.tflite"
+        export_tflite(model_path, output_path, quantization=quantization)
+        variants.append((quantization, 'tflite', output_path))
+
+    baseline_accuracy = float(np.mean(float_probs.argmax(axis=1) == reference))
+    report = []
+    for name, backend, path in variants:
+        runtime = float_runtime if backend == 'keras' else load_runtime(backend, path)
+        accuracy = float(np.mean(runtime.predict(windows).argmax(axis=1) == reference))
+        p50, p99 = _latency_ms(runtime, windows[:200])
+        report.append({
+            'variant': name,
+            'path': path,
+            'size_bytes': os.path.getsize(path),
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'accuracy': accuracy,
+            'accuracy_delta': accuracy - baseline_accuracy,
+        })
+
+    print(f"{'variant':<10}{'size KB':>10}{'p50 ms':>10}{'p99 ms':>10}{'accuracy':>10}{'delta':>10}")
+    for row in report:
+        print(f"{row['variant']:<10}{row['size_bytes'] / 1024:>10.1f}{row['latency_p50_ms']:>10.2f}"
+              f"{row['latency_p99_ms']:>10.2f}{row['accuracy']:>10.3f}{row['accuracy_delta']:>+10.3f}")
+    return report
+
 if __name__ == '__main__':
-    save_dummy_model()
+    parser = argparse.ArgumentParser(description="Build, export and verify the sign language model.")
+    parser.add_argument('command', nargs='?', default='dummy', choices=['dummy', 'export', 'parity', 'quantize', 'causal'])
+    parser.add_argument('--backend', default='tflite', help="Backend checked by 'parity'")
+    parser.add_argument('--calibration', help="Recorded windows (.npy/.npz) used by 'quantize' and 'causal'")
+    parser.add_argument('--epochs', type=int, default=20, help="Training epochs for 'causal'")
+    args = parser.parse_args()
+
+    if args.command == 'dummy':
+        save_dummy_model()
+    elif args.command == 'export':
+        export_tflite()
+        check_parity('tflite')
+    elif args.command == 'quantize':
+        if not args.calibration:
+            parser.error("'quantize' requires --calibration")
+        quantize_model(args.calibration)
+    elif args.command == 'causal':
+        distill_causal_model(data_path=args.calibration, epochs=args.epochs)
+    else:
+        if not check_parity(args.backend)['ok']:
+            raise SystemExit(1)
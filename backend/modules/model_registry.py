@@ -0,0 +1,144 @@
+"""
+Versioned model registry. Each version is a directory holding the model
+artifact, its labels and a manifest.json; CURRENT names the version every
+server process should serve:
+
+  MODEL_REGISTRY_DIR/
+    CURRENT                 # e.g. "v2"
+    v1/manifest.json
+    v1/sign_language_model.h5
+    v1/labels.txt
+    v2/...
+
+  manifest.json: {"version": "v2", "backend": "keras",
+                  "model": "sign_language_model.h5", "labels": "labels.txt",
+                  "input_shape": [30, 99]}
+
+  An optional "preprocessing" entry, e.g. {"center": [11, 12], "scale": [11, 12]},
+  names the server-side feature stage the model was trained with (see
+  sign_language_module.Preprocessor); input_shape is then the shape it produces.
+
+Publishing a version (from backend/):
+  python -m modules.model_registry publish v2 path/to/model.h5 path/to/labels.txt [--backend keras] [--activate]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+# Registry root; unset serves the artifacts bundled in modules/ as before
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR')
+# Seconds between checks of CURRENT by every serving process
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 2))
+
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith('.') and os.path.isfile(os.path.join(self.root, name, MANIFEST))
+        )
+
+    def manifest(self, version):
+        """Returns the manifest with `model` and `labels` resolved to absolute paths."""
+        directory = os.path.join(self.root, version)
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        for field in ('backend', 'model', 'labels', 'input_shape'):
+            if field not in manifest:
+                raise ValueError(f"Manifest of {version} has no '{field}'")
+        manifest['version'] = version
+        manifest['model'] = os.path.join(directory, manifest['model'])
+        manifest['labels'] = os.path.join(directory, manifest['labels'])
+        manifest['input_shape'] = tuple(manifest['input_shape'])
+        return manifest
+
+    def current(self):
+        """The version named by CURRENT, or None."""
+        try:
+            with open(os.path.join(self.root, CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, version):
+        """Points CURRENT at `version`; every watching process then reloads."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        # Write then rename, so watchers never read a partial file
+        fd, path = tempfile.mkstemp(prefix='.CURRENT-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(path, os.path.join(self.root, CURRENT))
+
+    def publish(self, version, model_path, labels_path, backend='keras', input_shape=(30, 99), preprocessing=None):
+        """Copies the artifacts into a new version directory and writes its manifest."""
+        directory = os.path.join(self.root, version)
+        if os.path.exists(directory):
+            raise ValueError(f"Model version {version} already exists")
+        # Build in a hidden scratch directory so a half-copied version is never listed
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        shutil.copy(model_path, staging)
+        shutil.copy(labels_path, staging)
+        manifest = {
+            'version': version,
+            'backend': backend,
+            'model': os.path.basename(model_path),
+            'labels': os.path.basename(labels_path),
+            'input_shape': list(input_shape),
+        }
+        if preprocessing:
+            manifest['preprocessing'] = preprocessing
+        with open(os.path.join(staging, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, directory)
+        return directory
+
+
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    parser.add_argument('--root', default=MODEL_REGISTRY_DIR, help="Registry directory (default: MODEL_REGISTRY_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Add a new model version")
+    publish.add_argument('version')
+    publish.add_argument('model')
+    publish.add_argument('labels')
+    publish.add_argument('--backend', default='keras', help="keras | tf_function | tflite")
+    publish.add_argument('--activate', action='store_true', help="Make it the served version")
+    activate = commands.add_parser('activate', help="Serve an existing version")
+    activate.add_argument('version')
+    commands.add_parser('list', help="List versions")
+    args = parser.parse_args()
+
+    if not args.root:
+        raise SystemExit("Set MODEL_REGISTRY_DIR or pass --root")
+    os.makedirs(args.root, exist_ok=True)
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        print(f"Published {args.version} to {registry.publish(args.version, args.model, args.labels, args.backend)}")
+        if args.activate:
+            registry.activate(args.version)
+            print(f"Activated {args.version}")
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Activated {args.version}")
+    else:
+        current = registry.current()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+
+
+if __name__ == '__main__':
+    main()
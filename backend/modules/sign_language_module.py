@@ -1,56 +1,1149 @@
+import hashlib
 import numpy as np
 import os
-from tensorflow.keras.models import load_model
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from modules.cache import TTLCache, MISSING
+from modules.inference_pool import InferencePool
+from modules.model_registry import model_registry, MODEL_WATCH_INTERVAL
+from modules.metrics import WINDOW_TO_TENSOR, MODEL_PREDICT, PREPROCESS
+
+# TensorFlow is imported inside the runtimes only, so importing this module
+# (and therefore the app, run.py or manage.py) never pulls it in.
+
+SEQUENCE_LENGTH = 30
+NUM_FEATURES = 99
+NUM_LANDMARKS = 33  # MediaPipe Pose, (x, y, z) each
+
+# MediaPipe Pose indices of the shoulders, the default reference for normalization
+SHOULDERS = (11, 12)
+
+MODEL_DIR = os.path.dirname(__file__)
+
+# Inference runtime used by SignLanguageModel: keras | tf_function | tflite | stateful
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'keras')
+
+
+class KerasRuntime:
+    """Runs the .h5 model through Keras."""
+
+    artifact = 'sign_language_model.h5'
+
+    def __init__(self, model_path):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(model_path, compile=False)
+
+    def predict(self, batch):
+        # predict_on_batch reuses the compiled predict function without the
+        # per-call data adapter setup that model.predict() pays.
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFFunctionRuntime:
+    """
+    Wraps the Keras model in a tf.function with a fixed (None, 30, 99) input
+    signature, so every batch size reuses a single traced graph.
+    """
+
+    artifact = 'sign_language_model.h5'
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+        self._tf = tf
+        model = load_model(model_path, compile=False)
+        self._serve = tf.function(
+            lambda batch: model(batch, training=False),
+            input_signature=[tf.TensorSpec([None, *model.input_shape[1:]], tf.float32)],
+        )
+        self._serve.get_concrete_function()
+
+    def predict(self, batch):
+        return self._serve(self._tf.convert_to_tensor(batch, dtype=self._tf.float32)).numpy()
+
+
+class TFLiteRuntime:
+    """
+    Runs the .tflite artifact produced by model_builder.export_tflite. The
+    default op resolver applies the XNNPACK delegate on CPU.
+    """
+
+    artifact = 'sign_language_model.tflite'
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+        self.interpreter = tf.lite.Interpreter(
+            model_path=model_path,
+            num_threads=int(os.getenv('TFLITE_NUM_THREADS', os.cpu_count() or 1)),
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    def predict(self, batch):
+        # The fused LSTM kernels are exported with a static batch of 1 and keep
+        # their state in variables, so each window runs on a reset interpreter.
+        outputs = []
+        for window in batch:
+            self.interpreter.reset_all_variables()
+            self.interpreter.set_tensor(self._input['index'], window[np.newaxis].astype(self._input['dtype']))
+            self.interpreter.invoke()
+            outputs.append(self.interpreter.get_tensor(self._output['index'])[0])
+        return np.stack(outputs)
+
+
+class StatefulRuntime:
+    """
+    Runs a causal model (model_builder.build_causal_model) one frame at a
+    time through its step model, so a client's LSTM states can be carried
+    between frames: step() costs one frame instead of a whole window.
+    predict() keeps the window interface by stepping from zero states.
+    """
+
+    artifact = 'sign_language_model_causal.h5'
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+        from modules.model_builder import build_step_model
+        step_model = build_step_model(load_model(model_path, compile=False))
+        self.state_sizes = [int(state.shape[-1]) for state in step_model.inputs[1:]]
+        self._step = tf.function(
+            lambda frames, *states: step_model([frames, *states], training=False),
+            input_signature=[tf.TensorSpec([None, step_model.inputs[0].shape[-1]], tf.float32)]
+            + [tf.TensorSpec([None, size], tf.float32) for size in self.state_sizes],
+        )
+
+    def initial_states(self, count):
+        return [np.zeros((count, size), dtype=np.float32) for size in self.state_sizes]
+
+    def step(self, frames, states):
+        """frames: (N, 99). Returns the (N, num_classes) probabilities and the new states."""
+        outputs = self._step(frames, *states)
+        return outputs[0].numpy(), [state.numpy() for state in outputs[1:]]
+
+    def predict(self, batch):
+        states = self.initial_states(len(batch))
+        for t in range(batch.shape[1]):
+            probabilities, states = self.step(batch[:, t], states)
+        return probabilities
+
+
+RUNTIMES = {
+    'keras': KerasRuntime,
+    'tf_function': TFFunctionRuntime,
+    'tflite': TFLiteRuntime,
+    'stateful': StatefulRuntime,
+}
+
+
+def load_runtime(backend, model_path=None):
+    """
+    Instantiates the runtime registered under `backend`. model_path defaults
+    to the backend's artifact in this directory.
+    """
+    if backend not in RUNTIMES:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    runtime_cls = RUNTIMES[backend]
+    return runtime_cls(model_path or os.path.join(MODEL_DIR, runtime_cls.artifact))
+
+
+def read_labels(path):
+    try:
+        with open(path, 'r') as f:
+            labels = [line.strip() for line in f.readlines()]
+        print(f"Labels loaded: {labels}")
+        return labels
+    except Exception as e:
+        print(f"Error loading labels: {e}")
+        return ["Unknown"]
+
+
+def builtin_manifest():
+    """Manifest for the artifacts bundled in this directory (no registry)."""
+    return {
+        'version': 'builtin',
+        'backend': INFERENCE_BACKEND,
+        'model': os.getenv('INFERENCE_MODEL_PATH'),
+        'labels': os.path.join(MODEL_DIR, 'labels.txt'),
+        'input_shape': (SEQUENCE_LENGTH, NUM_FEATURES),
+    }
+
+
+class Preprocessor:
+    """
+    Server-side feature stage between the raw (N, T, 99) landmark windows the
+    clients send and the model input. Every step is one NumPy operation over
+    the whole batch:
+
+      center     landmark indices whose mean position becomes the origin
+      scale      two landmark indices whose (x, y) distance becomes 1
+      landmarks  subset of the 33 landmarks kept as features
+      velocity   appends the frame-to-frame difference of every feature
+
+    Frames where the reference landmarks are all zero (no pose detected) get
+    a zero origin and are left unscaled. The spec is the 'preprocessing' entry of a
+    model manifest; training (modules/training.py) applies the same stage, so
+    a model is always served with the features it was trained on. An empty
+    spec is the identity and leaves the batch untouched.
+    """
+
+    def __init__(self, center=None, scale=None, landmarks=None, velocity=False):
+        self.center = list(center) if center else None
+        self.scale = list(scale) if scale else None
+        self.landmarks = list(landmarks) if landmarks else None
+        self.velocity = bool(velocity)
+        # Feature columns of the kept landmarks, for one take() on the last axis
+        self._columns = None
+        if self.landmarks is not None:
+            self._columns = (3 * np.array(self.landmarks)[:, np.newaxis] + np.arange(3)).ravel()
+        if self.scale is not None and len(self.scale) != 2:
+            raise ValueError("scale takes two landmark indices")
+        for index in (self.center or []) + (self.scale or []) + (self.landmarks or []):
+            if not 0 <= index < NUM_LANDMARKS:
+                raise ValueError(f"Landmark index out of range: {index}")
+
+    @classmethod
+    def from_spec(cls, spec):
+        spec = dict(spec or {})
+        unknown = set(spec) - {'center', 'scale', 'landmarks', 'velocity'}
+        if unknown:
+            raise ValueError(f"Unknown preprocessing options: {sorted(unknown)}")
+        return cls(**spec)
+
+    @property
+    def spec(self):
+        """Manifest form; {} for the identity."""
+        spec = {'center': self.center, 'scale': self.scale, 'landmarks': self.landmarks, 'velocity': self.velocity}
+        return {key: value for key, value in spec.items() if value}
+
+    @property
+    def identity(self):
+        return not self.spec
+
+    @property
+    def is_framewise(self):
+        """True when each frame's features only depend on that frame (no velocity)."""
+        return not self.velocity
+
+    @property
+    def num_features(self):
+        """Features per frame after preprocessing."""
+        landmarks = len(self.landmarks) if self.landmarks is not None else NUM_LANDMARKS
+        return landmarks * 3 * (2 if self.velocity else 1)
+
+    def __call__(self, batch):
+        """
+        batch: (..., T, 99) frames; (..., 99) works too when is_framewise.
+        Returns float32 (..., T, num_features).
+        """
+        if self.identity:
+            return batch
+        batch = np.asarray(batch, dtype=np.float32)
+        points = batch.reshape(batch.shape[:-1] + (NUM_LANDMARKS, 3))
+        selected = batch if self._columns is None else batch.take(self._columns, axis=-1)
+        width = selected.shape[-1]
+        # Every stage writes into the final array; velocity fills its second half
+        features = np.empty(batch.shape[:-1] + (self.num_features,), dtype=np.float32)
+        coordinates = features[..., :width]
+        if self.center is not None:
+            # Reference positions come from all landmarks, before subsetting.
+            # Subtracting per axis (x, y, z) keeps the inner loops long.
+            origin = points[..., self.center, :].mean(axis=-2)
+            for axis in range(3):
+                np.subtract(selected[..., axis::3], origin[..., axis, np.newaxis], out=coordinates[..., axis::3])
+        else:
+            coordinates[...] = selected
+        if self.scale is not None:
+            first, second = self.scale
+            delta = points[..., first, :2] - points[..., second, :2]
+            size = np.sqrt(np.einsum('...i,...i->...', delta, delta))
+            # No pose detected: a zero size leaves the frame unscaled
+            size[size < 1e-6] = 1.0
+            coordinates *= (1.0 / size)[..., np.newaxis]
+        if self.velocity:
+            features[..., 0, width:] = 0.0
+            np.subtract(coordinates[..., 1:, :], coordinates[..., :-1, :], out=features[..., 1:, width:])
+        return features
+
+
+class LoadedModel:
+    """
+    One model version with its runtime, labels and preprocessing. It is only
+    published once fully loaded and warmed, and never changes afterwards, so
+    a reader that holds a reference always sees a consistent model.
+    """
+
+    def __init__(self, version, backend, runtime, labels, preprocessor=None):
+        self.version = version
+        self.backend = backend
+        self.runtime = runtime
+        self.labels = labels
+        self.preprocessor = preprocessor or Preprocessor()
+
+    def preprocess(self, batch):
+        if self.preprocessor.identity:
+            return batch
+        with PREPROCESS.time(self.version):
+            return self.preprocessor(batch)
+
+    def predict(self, batch):
+        """batch: raw (N, 30, 99) windows."""
+        return self.runtime.predict(self.preprocess(batch))
+
+
+def load_model_version(manifest):
+    """Loads and warms the model a manifest describes. Raises on failure."""
+    preprocessor = Preprocessor.from_spec(manifest.get('preprocessing'))
+    if tuple(manifest['input_shape']) != (SEQUENCE_LENGTH, preprocessor.num_features):
+        raise ValueError(f"Model {manifest['version']} expects input {tuple(manifest['input_shape'])}, "
+                         f"its preprocessing produces {(SEQUENCE_LENGTH, preprocessor.num_features)}")
+    if manifest['backend'] == 'stateful' and not preprocessor.is_framewise:
+        raise ValueError(f"Model {manifest['version']}: the stateful backend steps single frames, "
+                         f"so its preprocessing cannot use velocity")
+    start = time.perf_counter()
+    runtime = load_runtime(manifest['backend'], manifest['model'])
+    loaded = LoadedModel(manifest['version'], manifest['backend'], runtime, read_labels(manifest['labels']),
+                         preprocessor)
+    # Trace the graph now so the first real batch does not pay for it.
+    # Two batch sizes let Keras relax the traced shape to (None, ...).
+    for batch_size in (1, 2):
+        loaded.predict(np.zeros((batch_size, SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32))
+    print(f"Model {manifest['version']} loaded with '{manifest['backend']}' backend "
+          f"in {time.perf_counter() - start:.1f}s")
+    return loaded
+
 
 class SignLanguageModel:
+    """
+    Process-wide model singleton. Nothing is loaded on construction: the
+    runtime is loaded on first use, or ahead of time by warm_up() on a
+    background thread. `state` reports readiness so callers on the socket
+    path can answer "warming up" instead of blocking on the load.
+
+    With a model registry (see modules/model_registry.py) the served version
+    can change at runtime: swap() loads and warms the new version off the
+    serving path, then replaces `active` with a single assignment, so every
+    batch runs entirely on either the old or the new model. A canary version
+    can serve a stable share of sids alongside it.
+    """
+
+    COLD = 'cold'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
+
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SignLanguageModel, cls).__new__(cls)
-            cls._instance._initialize()
+            cls._instance.state = cls.COLD
+            cls._instance.active = None
+            # (LoadedModel, percent of sids), replaced as a whole
+            cls._instance.canary = None
+            cls._instance._labels = {}  # version -> labels, for processes that never load a model
+            cls._instance._states = {}  # sid -> (version, LSTM states) for stateful serving
+            cls._instance._load_lock = threading.Lock()
+            cls._instance._swap_lock = threading.Lock()
         return cls._instance
 
+    def is_ready(self):
+        return self.state in (self.READY, self.FAILED)
+
+    def ensure_loaded(self):
+        """Loads the model on the calling thread unless it is already loaded."""
+        if self.is_ready():
+            return
+        with self._load_lock:
+            if self.is_ready():
+                return
+            self.state = self.LOADING
+            self._initialize()
+
+    def warm_up(self):
+        """Starts loading the model on a daemon thread. No-op once started."""
+        if self.state != self.COLD:
+            return
+        self.state = self.LOADING
+        threading.Thread(target=self.ensure_loaded, name='model-warmup', daemon=True).start()
+
     def _initialize(self):
-        # Load the Bi-LSTM model
-        model_path = os.path.join(os.path.dirname(__file__), 'sign_language_model.h5')
+        # Load the Bi-LSTM model through the runtime its manifest names
         try:
-            self.model = load_model(model_path)
-            print(f"SignLanguageModel loaded from {model_path}")
+            self.active = load_model_version(self.manifest_for(self.target_version()))
         except Exception as e:
             print(f"Error loading model: {e}")
-            self.model = None
+        self.state = self.READY if self.active is not None else self.FAILED
 
-        # Load labels
-        labels_path = os.path.join(os.path.dirname(__file__), 'labels.txt')
-        try:
-            with open(labels_path, 'r') as f:
-                self.labels = [line.strip() for line in f.readlines()]
-            print(f"Labels loaded: {self.labels}")
-        except Exception as e:
-            print(f"Error loading labels: {e}")
-            self.labels = ["Unknown"]
+    def target_version(self):
+        """The version this process should serve: the registry's CURRENT, or the bundled model."""
+        return (model_registry.current() if model_registry else None) or 'builtin'
+
+    def manifest_for(self, version):
+        """Manifest of a registry version, or of the bundled model for 'builtin'."""
+        if version == 'builtin':
+            return builtin_manifest()
+        if model_registry is None:
+            raise ValueError("No model registry configured (MODEL_REGISTRY_DIR)")
+        return model_registry.manifest(version)
+
+    def swap(self, version=None, background=True):
+        """
+        Loads `version` (default: the registry's CURRENT), warms it and makes
+        it the active model. The current model keeps serving until then, and
+        also afterwards if the load fails. Returns False if a load is already
+        running.
+        """
+        if not self._swap_lock.acquire(blocking=False):
+            return False
+
+        def load():
+            try:
+                loaded = load_model_version(self.manifest_for(version or self.target_version()))
+                self._labels[loaded.version] = loaded.labels
+                self.active = loaded
+                self.state = self.READY
+                print(f"Now serving model {loaded.version}")
+            except Exception as e:
+                print(f"Error loading model {version}: {e}")
+            finally:
+                self._swap_lock.release()
+
+        if background:
+            threading.Thread(target=load, name='model-swap', daemon=True).start()
+        else:
+            load()
+        return True
+
+    def set_canary(self, version, percent):
+        """
+        Serves `percent` of sids (chosen by a stable hash of the sid) with
+        `version`, loaded in the background. A percent of 0 ends the canary.
+        Returns False if a load is already running.
+        """
+        if not version or percent <= 0:
+            self.canary = None
+            return True
+        if not self._swap_lock.acquire(blocking=False):
+            return False
+
+        def load():
+            try:
+                loaded = load_model_version(self.manifest_for(version))
+                self._labels[loaded.version] = loaded.labels
+                self.canary = (loaded, min(percent, 100))
+                print(f"Serving {min(percent, 100)}% of clients with canary model {loaded.version}")
+            except Exception as e:
+                print(f"Error loading canary model {version}: {e}")
+            finally:
+                self._swap_lock.release()
+
+        threading.Thread(target=load, name='model-canary', daemon=True).start()
+        return True
+
+    def sync_with_registry(self, background=True):
+        """Swaps to the registry's CURRENT version if it changed."""
+        if model_registry is None or self.active is None:
+            return
+        target = model_registry.current()
+        if target and target != self.active.version:
+            self.swap(target, background)
+
+    def watch_registry(self, sleep=time.sleep, interval=MODEL_WATCH_INTERVAL):
+        """Polls CURRENT and reloads when it changes. `sleep` must suit the async mode."""
+        while True:
+            sleep(interval)
+            try:
+                self.sync_with_registry()
+            except Exception as e:
+                print(f"Error checking the model registry: {e}")
+
+    def model_for(self, sid):
+        """The loaded model that serves `sid`: the canary for its share of sids, else the active one."""
+        canary = self.canary
+        if canary is not None and zlib.crc32(str(sid).encode()) % 100 < canary[1]:
+            return canary[0]
+        return self.active
+
+    def label_for(self, class_idx, version=None):
+        """
+        Maps a class index of `version` (default: the served version) to its
+        label. Only reads the labels file, so it works in processes that
+        delegate inference to workers and never load the model.
+        """
+        if version is None:
+            active = self.active
+            version = active.version if active is not None else self.target_version()
+        labels = self._labels.get(version)
+        if labels is None:
+            labels = self._labels[version] = read_labels(self.manifest_for(version)['labels'])
+        if class_idx < len(labels):
+            return labels[class_idx]
+        return "Unknown"
+
+    def is_stateful(self):
+        """True when the served model can advance per-sid state frame by frame."""
+        active = self.active
+        return active is not None and hasattr(active.runtime, 'step')
+
+    def advance(self, sids, chunks):
+        """
+        Stateful serving: feeds each sid's new frames, a (k, 99) chunk, through
+        the active causal model, starting from the LSTM states that sid's
+        previous frames left. All sids are stepped together as one (N, 99)
+        batch per frame. Returns (probabilities, version) for each sid's
+        last frame.
+        """
+        active = self.active
+        runtime = active.runtime
+        zero = runtime.initial_states(1)
+        per_sid = []
+        for sid in sids:
+            saved = self._states.get(sid)
+            # States of another model version are meaningless to this one
+            per_sid.append(saved[1] if saved is not None and saved[0] == active.version else [z[0] for z in zero])
+        states = [np.stack([sid_states[k] for sid_states in per_sid]) for k in range(len(zero))]
+
+        # Only framewise preprocessing reaches here (see load_model_version)
+        chunks = [active.preprocess(np.asarray(chunk, dtype=np.float32)) for chunk in chunks]
+        lengths = np.array([len(chunk) for chunk in chunks])
+        last = [None] * len(sids)
+        with MODEL_PREDICT.time(active.backend, active.version):
+            for t in range(int(lengths.max())):
+                rows = np.flatnonzero(lengths > t)
+                frames = np.stack([chunks[i][t] for i in rows])
+                if len(rows) == len(sids):
+                    probabilities, states = runtime.step(frames, states)
+                else:
+                    probabilities, new_states = runtime.step(frames, [state[rows] for state in states])
+                    for state, new_state in zip(states, new_states):
+                        state[rows] = new_state
+                for row, i in enumerate(rows):
+                    last[i] = probabilities[row]
+
+        for i, sid in enumerate(sids):
+            self._states[sid] = (active.version, [state[i].copy() for state in states])
+        return [(probabilities, active.version) for probabilities in last]
+
+    def forget_state(self, sid):
+        self._states.pop(sid, None)
 
     def predict(self, sequence):
         """
         sequence: list of frames, each frame is a list of 99 normalized keypoints.
         shape: (30, 99)
         """
-        if self.model is None:
-            return "Model Error"
-
         # Convert to numpy and add batch dimension
-        data = np.array(sequence) # (30, 99)
+        data = np.array(sequence, dtype=np.float32) # (30, 99)
         data = np.expand_dims(data, axis=0) # (1, 30, 99)
-        
-        # Run inference
-        prediction = self.model.predict(data, verbose=0)
-        class_idx = np.argmax(prediction[0])
-        
-        if class_idx < len(self.labels):
-            return self.labels[class_idx]
+        return self.predict_batch(data)[0]
+
+    def predict_batch(self, batch):
+        """
+        batch: array of windows stacked along the first axis.
+        shape: (N, 30, 99)
+        Returns one label per window.
+        """
+        self.ensure_loaded()
+        active = self.active
+        if active is None:
+            return ["Model Error"] * len(batch)
+        probabilities = active.predict(batch)
+        return [self.label_for(idx, active.version) for idx in np.argmax(probabilities, axis=1)]
+
+    def predict_proba_batch(self, batch):
+        """
+        Same input as predict_batch. Returns the (N, num_classes) softmax
+        output of the active model, or None when the model failed to load.
+        """
+        self.ensure_loaded()
+        active = self.active
+        if active is None:
+            return None
+        return active.predict(batch)
+
+    def predict_proba_routed(self, sids, batch):
+        """
+        Runs each window of `batch` on the model serving its sid (see
+        model_for). Returns one (probabilities, version) pair per window, with
+        probabilities None when no model could be loaded.
+        """
+        self.ensure_loaded()
+        groups = {}
+        for i, sid in enumerate(sids):
+            groups.setdefault(self.model_for(sid), []).append(i)
+
+        results = [(None, None)] * len(sids)
+        for loaded, indices in groups.items():
+            if loaded is None:
+                continue
+            with MODEL_PREDICT.time(loaded.backend, loaded.version):
+                probabilities = loaded.predict(batch if len(groups) == 1 else batch[indices])
+            for row, i in enumerate(indices):
+                results[i] = (probabilities[row], loaded.version)
+        return results
+
+
+class FrameRingBuffer:
+    """
+    Preallocated (30, 99) sliding window for a single client. Frames are
+    written in place at a rotating cursor, so appending a frame costs one row
+    copy instead of rebuilding the whole window.
+    """
+
+    def __init__(self, sequence_length=SEQUENCE_LENGTH, num_features=NUM_FEATURES, stride=1):
+        self.buffer = np.zeros((sequence_length, num_features), dtype=np.float32)
+        self.stride = stride
+        self._cursor = 0
+        self._count = 0
+        self._since_inference = 0
+
+    def push(self, frames):
+        """
+        frames: array-like of shape (k, 99) or a single frame of shape (99,).
+        Returns True when the window is full and `stride` frames have arrived
+        since the last window was taken.
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        if frames.ndim == 1:
+            frames = frames[np.newaxis, :]
+        length, num_features = self.buffer.shape
+        if frames.ndim != 2 or frames.shape[1] != num_features:
+            raise ValueError(f"Expected frames with {num_features} features, got shape {frames.shape}")
+
+        # Only the newest `length` frames can survive in the window
+        frames = frames[-length:]
+        for frame in frames:
+            self.buffer[self._cursor] = frame
+            self._cursor = (self._cursor + 1) % length
+        self._count = min(self._count + len(frames), length)
+        self._since_inference += len(frames)
+
+        return self.is_full() and self._since_inference >= self.stride
+
+    def is_full(self):
+        return self._count == self.buffer.shape[0]
+
+    def restart_stride(self):
+        """Starts counting `stride` frames again, as taking a window does."""
+        self._since_inference = 0
+
+    def window(self):
+        """Returns the frames oldest-first as a new (30, 99) array."""
+        self.restart_stride()
+        return np.concatenate((self.buffer[self._cursor:], self.buffer[:self._cursor]))
+
+
+class ClientRateLimiter:
+    """
+    Caps how often each sid may queue a window for inference. Windows that
+    arrive sooner than 1 / max_rate_hz after the last accepted one are
+    rejected; a max_rate_hz of 0 disables the limit.
+    """
+
+    def __init__(self, max_rate_hz=0):
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self._last_accepted = {}
+
+    def allow(self, sid):
+        if not self.min_interval:
+            return True
+        now = time.perf_counter()
+        last = self._last_accepted.get(sid)
+        if last is not None and now - last < self.min_interval:
+            return False
+        self._last_accepted[sid] = now
+        return True
+
+    def forget(self, sid):
+        self._last_accepted.pop(sid, None)
+
+
+class PredictionSmoother:
+    """
+    Per-client decision layer over the raw softmax outputs. Scores are either
+    an exponential moving average of the probabilities over roughly the last
+    `window` predictions ('ema'), or the share of votes each class won among
+    them ('vote'). The stable label only changes when the leading class
+    scores at least `threshold` and beats the current label by `hysteresis`,
+    so update() returns a label only when there is something new to emit.
+    `model_version` records which model the scores come from.
+    """
+
+    def __init__(self, mode='ema', window=5, threshold=0.6, hysteresis=0.1, model_version=None):
+        if mode not in ('ema', 'vote'):
+            raise ValueError(f"Unknown smoothing mode: {mode}")
+        self.mode = mode
+        self.model_version = model_version
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.alpha = 2.0 / (window + 1)
+        self.stable = None
+        self.updates = 0
+        self.emitted = 0
+        self._scores = None
+        self._votes = deque(maxlen=window)
+
+    def update(self, probabilities):
+        """Returns the new stable class index, or None if it did not change."""
+        self.updates += 1
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+
+        if self.mode == 'ema':
+            if self._scores is None:
+                self._scores = probabilities.copy()
+            else:
+                self._scores += self.alpha * (probabilities - self._scores)
+            scores = self._scores
+        else:
+            self._votes.append(int(np.argmax(probabilities)))
+            scores = np.bincount(self._votes, minlength=len(probabilities)) / len(self._votes)
+
+        candidate = int(np.argmax(scores))
+        if candidate == self.stable or scores[candidate] < self.threshold:
+            return None
+        if self.stable is not None and scores[candidate] - scores[self.stable] < self.hysteresis:
+            return None
+
+        self.stable = candidate
+        self.emitted += 1
+        return candidate
+
+
+class WindowResultCache:
+    """
+    Reuses model outputs for repeated windows, e.g. while a signer holds a
+    pose. Two layers are checked before a window is sent to the model:
+
+    - per-sid fast path: if no value of the window differs by `epsilon` or
+      more from the last window inferred for that sid, its result is reused
+      (epsilon 0 disables it);
+    - shared LRU keyed on a hash of the window quantized to multiples of
+      `step`, with entries expiring after `ttl` seconds (max_entries 0
+      disables it).
+
+    Results are kept per model version, so a hot-swapped or canary model
+    never answers with another version's output. lookup() remembers each
+    missed window until store() receives its result.
+    """
+
+    def __init__(self, step=0.001, max_entries=1024, ttl=10, epsilon=0.0):
+        self.step = step
+        self.epsilon = epsilon
+        self.cache = TTLCache(max_entries, ttl) if max_entries > 0 else None
+        self.fast_path_hits = 0
+        self.lookups = 0
+        self._last = {}  # sid -> (window, probabilities, version) of its last inference
+        self._missed = {}  # sid -> (digest, window) waiting for its result
+
+    def digest(self, window):
+        quantized = np.round(window / self.step).astype(np.int32)
+        return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+    def lookup(self, sid, window, version=None):
+        """Returns the cached probabilities of `version` for the window, or None on a miss."""
+        self.lookups += 1
+        last = self._last.get(sid)
+        if (last is not None and self.epsilon > 0 and last[2] == version
+                and np.max(np.abs(window - last[0])) < self.epsilon):
+            self.fast_path_hits += 1
+            return last[1]
+
+        digest = None
+        if self.cache is not None:
+            digest = self.digest(window)
+            probabilities = self.cache.get(f'{version}:{digest}')
+            if probabilities is not MISSING:
+                probabilities = np.asarray(probabilities, dtype=np.float32)
+                self._last[sid] = (window, probabilities, version)
+                return probabilities
+        self._missed[sid] = (digest, window)
+        return None
+
+    def store(self, sid, probabilities, version=None):
+        """Records the output of model `version` for the window sid last missed on."""
+        digest, window = self._missed.pop(sid, (None, None))
+        if window is None or probabilities is None:
+            return
+        self._last[sid] = (window, probabilities, version)
+        if digest is not None:
+            self.cache.set(f'{version}:{digest}', probabilities.tolist())
+
+    def forget(self, sid):
+        self._last.pop(sid, None)
+        self._missed.pop(sid, None)
+
+    def stats(self):
+        cache_hits = self.cache.hits if self.cache is not None else 0
+        hits = self.fast_path_hits + cache_hits
+        stats = {
+            'lookups': self.lookups,
+            'hits': hits,
+            'hit_rate': hits / self.lookups if self.lookups else 0.0,
+            'fast_path_hits': self.fast_path_hits,
+        }
+        if self.cache is not None:
+            stats.update({f'lru_{name}': value for name, value in self.cache.stats().items()})
+        return stats
+
+
+class BatchMetrics:
+    """
+    Rolling counters for the batching scheduler. Latency is measured from
+    submit() to the moment the result callback is invoked.
+    """
+
+    def __init__(self, window=1024):
+        self.batches = 0
+        self.windows = 0
+        self.max_queue_depth = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._batch_sizes = deque(maxlen=window)
+        self._latencies_ms = deque(maxlen=window)
+
+    def record_batch(self, size, latencies_ms):
+        self.batches += 1
+        self.windows += size
+        self._batch_sizes.append(size)
+        self._latencies_ms.extend(latencies_ms)
+
+    def record_queue_depth(self, depth):
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def record_coalesced(self):
+        self.coalesced += 1
+
+    def record_dropped(self):
+        self.dropped += 1
+
+    def snapshot(self):
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+        sizes = np.array(self._batch_sizes) if self._batch_sizes else np.zeros(1)
+        return {
+            'batches': self.batches,
+            'windows': self.windows,
+            'max_queue_depth': self.max_queue_depth,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'mean_batch_size': float(sizes.mean()),
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+        }
+
+
+class InferenceBatcher:
+    """
+    Gathers pending windows from all clients and runs them through the model
+    as a single (N, 30, 99) batch. A batch is flushed as soon as it reaches
+    max_batch_size, or once the oldest pending window has waited max_wait_ms.
+
+    Each sid has at most one pending window: a newer window replaces the one
+    still waiting (latest wins), and a sid whose previous window is still
+    being inferred is skipped until its result is delivered. Under overload
+    every client therefore waits for at most one batch, not a backlog.
+
+    With a `pool`, batches are dispatched to worker processes and results are
+    collected by the scheduler loop; otherwise the model runs in-process.
+    With a `result_cache`, windows it already has a result for are answered
+    without reaching the model. Every result is delivered with the version of
+    the model that produced it.
+
+    When the served model is stateful, streaming clients queue frames
+    (submit_frames) instead of windows, and each flush advances every such
+    sid's state by its new frames in one step per frame.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5, pool=None, result_cache=None):
+        self.model = model
+        self.pool = pool
+        self.result_cache = result_cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = BatchMetrics()
+        # sid -> (window or frames, submitted_at, queued_at, emit); queued_at
+        # survives replacement so a client that keeps streaming still meets
+        # the deadline; emit is None for windows (see submit_frames)
+        self._pending = OrderedDict()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._pool_version = None
+
+    def warm_up(self):
+        if self.pool is not None:
+            self.pool.start()
         else:
-            return "Unknown"
+            self.model.warm_up()
+
+    def is_ready(self):
+        if self.pool is not None:
+            return self.pool.is_ready()
+        return self.model.is_ready()
+
+    def swap_model(self, version=None):
+        """
+        Hot-swaps the served model: in this process, or in every pool worker
+        in turn. Returns False if a swap is still in progress.
+        """
+        if self.pool is not None:
+            return self.pool.swap(version)
+        return self.model.swap(version)
+
+    def worker_versions(self):
+        """Model version served by each pool worker; None without a pool."""
+        return self.pool.versions() if self.pool is not None else None
+
+    def set_canary(self, version, percent):
+        if self.pool is not None:
+            raise ValueError("Canary routing needs in-process inference (INFERENCE_WORKERS=0)")
+        return self.model.set_canary(version, percent)
+
+    def watch_registry(self, sleep=time.sleep):
+        """Reloads the in-process model when the registry's CURRENT changes."""
+        if self.pool is None:
+            self.model.watch_registry(sleep)
+
+    def submit(self, sid, sequence):
+        window = np.asarray(sequence, dtype=np.float32)
+        if window.shape != (SEQUENCE_LENGTH, NUM_FEATURES):
+            raise ValueError(f"Expected window of shape {(SEQUENCE_LENGTH, NUM_FEATURES)}, got {window.shape}")
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._pending.get(sid)
+            if previous is not None:
+                self.metrics.record_coalesced()
+            self._pending[sid] = (window, now, previous[2] if previous else now, None)
+            self.metrics.record_queue_depth(len(self._pending))
+
+    def is_stateful(self):
+        """True when streaming clients should submit frames rather than windows."""
+        return self.pool is None and self.model.is_stateful()
+
+    def submit_frames(self, sid, frames, emit):
+        """
+        Stateful serving: queues new frames (k, 99) of sid. Frames accumulate
+        rather than replace each other, as every frame must advance the sid's
+        state; past one window's worth the oldest are dropped. With `emit`
+        the result is delivered once they are in.
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        if frames.ndim == 1:
+            frames = frames[np.newaxis, :]
+        if frames.ndim != 2 or frames.shape[1] != NUM_FEATURES:
+            raise ValueError(f"Expected frames with {NUM_FEATURES} features, got shape {frames.shape}")
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._pending.get(sid)
+            if previous is not None and previous[3] is not None:
+                frames = np.concatenate((previous[0], frames))
+                emit = emit or previous[3]
+                if len(frames) > SEQUENCE_LENGTH:
+                    self.metrics.record_dropped()
+                    frames = frames[-SEQUENCE_LENGTH:]
+            elif previous is not None:
+                self.metrics.record_coalesced()
+            self._pending[sid] = (frames, now, previous[2] if previous else now, emit)
+            self.metrics.record_queue_depth(len(self._pending))
+
+    def forget(self, sid):
+        """Drops any pending window of a disconnected sid."""
+        with self._lock:
+            self._pending.pop(sid, None)
+            self._in_flight.discard(sid)
+        if self.result_cache is not None:
+            self.result_cache.forget(sid)
+        if self.pool is None:
+            self.model.forget_state(sid)
+
+    def queue_depth(self):
+        return len(self._pending)
+
+    def _take_batch(self):
+        with self._lock:
+            items = []
+            for sid in list(self._pending):
+                if sid in self._in_flight:
+                    continue
+                data, submitted, _, emit = self._pending.pop(sid)
+                items.append((sid, data, submitted, emit))
+                if len(items) == self.max_batch_size:
+                    break
+            self._in_flight.update(sid for sid, _, _, _ in items)
+        return items
+
+    def _oldest_schedulable(self):
+        with self._lock:
+            count = 0
+            oldest = None
+            for sid, (_, _, queued, _) in self._pending.items():
+                if sid in self._in_flight:
+                    continue
+                count += 1
+                if oldest is None:
+                    oldest = queued
+        return count, oldest
+
+    def flush(self, on_result):
+        """
+        Runs (or dispatches) at most one batch; results are handed to
+        on_result(sid, probabilities, version), with probabilities None if
+        the model failed to load. Returns the number of windows taken.
+        """
+        items = self._take_batch()
+        taken = len(items)
+        chunks = [item for item in items if item[3] is not None]
+        items = [(sid, window, submitted) for sid, window, submitted, emit in items if emit is None]
+        if chunks:
+            self._advance(chunks, on_result)
+        if self.result_cache is not None:
+            items = self._answer_from_cache(items, on_result)
+        if not items:
+            return taken
+
+        with WINDOW_TO_TENSOR.time():
+            batch = np.stack([window for _, window, _ in items])
+        routes = [(sid, submitted) for sid, _, submitted in items]
+        if self.pool is not None:
+            # Windows are not needed once stacked; keep only routing data
+            self.pool.submit(routes, batch)
+        else:
+            try:
+                results = self.model.predict_proba_routed([sid for sid, _ in routes], batch)
+            except Exception:
+                self._release(routes)
+                raise
+            self._deliver(routes, results, on_result)
+        return taken
+
+    def _advance(self, chunks, on_result):
+        """Steps queued frames through the stateful model; delivers the results asked for."""
+        routes = [(sid, submitted) for sid, _, submitted, _ in chunks]
+        if not self.model.is_stateful():
+            # Swapped to a windowed model meanwhile; clients resubmit windows
+            self._release(routes)
+            return
+        try:
+            results = self.model.advance([sid for sid, _ in routes], [frames for _, frames, _, _ in chunks])
+        except Exception:
+            self._release(routes)
+            raise
+        emitted = [i for i, (_, _, _, emit) in enumerate(chunks) if emit]
+        self._release([route for route, (_, _, _, emit) in zip(routes, chunks) if not emit])
+        if emitted:
+            self._deliver([routes[i] for i in emitted], [results[i] for i in emitted], on_result)
+
+    def _version_for(self, sid):
+        if self.pool is not None:
+            # Workers follow the registry themselves; assume what they last served
+            return self._pool_version
+        loaded = self.model.model_for(sid)
+        return loaded.version if loaded is not None else None
+
+    def _answer_from_cache(self, items, on_result):
+        """Delivers cache hits right away; returns the items left for the model."""
+        misses = []
+        for sid, window, submitted in items:
+            version = self._version_for(sid)
+            probabilities = self.result_cache.lookup(sid, window, version)
+            if probabilities is None:
+                misses.append((sid, window, submitted))
+                continue
+            self._release([(sid, submitted)])
+            on_result(sid, probabilities, version)
+        return misses
+
+    def collect(self, on_result):
+        """Delivers every batch the worker pool has finished."""
+        if self.pool is None:
+            return
+        for items, probabilities, version in self.pool.results():
+            if probabilities is None:
+                results = [(None, None)] * len(items)
+            else:
+                self._pool_version = version
+                results = [(row, version) for row in probabilities]
+            self._deliver(items, results, on_result)
+
+    def _release(self, items):
+        with self._lock:
+            self._in_flight.difference_update(sid for sid, _ in items)
+
+    def _deliver(self, items, results, on_result):
+        """results: one (probabilities, version) pair per item."""
+        self._release(items)
+        if self.result_cache is not None:
+            for (sid, _), (probabilities, version) in zip(items, results):
+                self.result_cache.store(sid, probabilities, version)
+        done = time.perf_counter()
+        for (sid, _), (probabilities, version) in zip(items, results):
+            on_result(sid, probabilities, version)
+        self.metrics.record_batch(
+            len(items), [(done - submitted) * 1000.0 for _, submitted in items]
+        )
+
+    def run(self, on_result, sleep=time.sleep):
+        """
+        Scheduler loop. `sleep` must cooperate with the server's async mode
+        (e.g. socketio.sleep under eventlet) so the loop never blocks the hub.
+        """
+        self._running = True
+        while self._running:
+            try:
+                self.collect(on_result)
+            except Exception as e:
+                print(f"Error collecting inference results: {e}")
+
+            depth, oldest = self._oldest_schedulable()
+            if depth == 0 or (self.pool is not None and self.pool.saturated()):
+                sleep(self.max_wait)
+                continue
+
+            remaining = self.max_wait - (time.perf_counter() - oldest)
+            if depth >= self.max_batch_size or remaining <= 0:
+                try:
+                    self.flush(on_result)
+                except Exception as e:
+                    print(f"Error running inference batch: {e}")
+                # Yield so queued socket events can be received between batches
+                sleep(0)
+            else:
+                sleep(remaining)
+
+    def stop(self):
+        self._running = False
+        if self.pool is not None:
+            self.pool.stop()
 
 # Singleton instance
 sign_language_model = SignLanguageModel()
+
+# Number of inference worker processes; 0 runs the model in the server process
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 0))
+
+# Result cache in front of the model (see WindowResultCache). Quantization step
+# is in landmark units; set both RESULT_CACHE_SIZE and RESULT_CACHE_EPSILON to
+# 0 to always run the model. The epsilon fast path is approximate (it answers
+# with the result of a slightly different window), so it is opt-in: enable it
+# only after checking accuracy on recorded sessions with the trained model.
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 1024))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 10))
+RESULT_CACHE_STEP = float(os.getenv('RESULT_CACHE_STEP', 0.001))
+RESULT_CACHE_EPSILON = float(os.getenv('RESULT_CACHE_EPSILON', 0))
+
+inference_batcher = InferenceBatcher(
+    sign_language_model,
+    max_batch_size=int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 32)),
+    max_wait_ms=float(os.getenv('INFERENCE_MAX_WAIT_MS', 5)),
+    pool=InferencePool(INFERENCE_WORKERS) if INFERENCE_WORKERS > 0 else None,
+    result_cache=WindowResultCache(
+        step=RESULT_CACHE_STEP,
+        max_entries=RESULT_CACHE_SIZE,
+        ttl=RESULT_CACHE_TTL,
+        epsilon=RESULT_CACHE_EPSILON,
+    ) if RESULT_CACHE_SIZE > 0 or RESULT_CACHE_EPSILON > 0 else None,
+)
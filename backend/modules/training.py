@@ -0,0 +1,299 @@
+"""
+Trains the Bi-LSTM from model_builder.build_model on recorded landmark
+windows and publishes the result as a new model registry version.
+
+Datasets are directories of shards, each holding (N, 30, 99) float windows
+and their N integer class ids (indices into the labels file):
+
+  shard-00000.npz                          compressed, arrays 'x' and 'y'
+  shard-00001.x.npy + shard-00001.y.npy    uncompressed, memory-mapped
+
+Shards are streamed through tf.data (parallel shard reads, shuffle buffer,
+optional cache, vectorized augmentation, prefetch), so only the shuffle
+buffer and a few batches are held in memory and datasets larger than RAM
+train on CPU-only machines.
+
+Shards hold raw client features. With --normalize, --velocity or
+--landmarks, batches go through the serving Preprocessor after
+augmentation, and its spec is written to the published manifest so the
+server applies the identical stage.
+
+Usage (from backend/):
+  python -m modules.training --data path/to/shards --labels labels.txt --registry models/ [--activate]
+"""
+import argparse
+import glob
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+import tensorflow as tf
+from modules.model_builder import build_model
+from modules.model_registry import ModelRegistry, MODEL_REGISTRY_DIR
+from modules.sign_language_module import Preprocessor, SEQUENCE_LENGTH, NUM_FEATURES, NUM_LANDMARKS, SHOULDERS
+
+# Rows handed from a shard reader to tf.data at a time
+READ_CHUNK = 512
+
+
+def list_shards(directory):
+    """Shard paths in name order: .npz files and the .x.npy half of .npy pairs."""
+    shards = glob.glob(os.path.join(directory, '*.npz')) + glob.glob(os.path.join(directory, '*.x.npy'))
+    if not shards:
+        raise ValueError(f"No .npz or .x.npy shards in {directory}")
+    return sorted(shards)
+
+
+def open_shard(path):
+    """Returns (x, y) for a shard; .npy pairs are memory-mapped, not read."""
+    if path.endswith('.npz'):
+        data = np.load(path)
+        return data['x'], data['y']
+    return np.load(path, mmap_mode='r'), np.load(path[:-len('.x.npy')] + '.y.npy', mmap_mode='r')
+
+
+def count_rows(paths):
+    """Total windows in the shards, from the label arrays only."""
+    total = 0
+    for path in paths:
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                total += len(data['y'])
+        else:
+            total += len(np.load(path[:-len('.x.npy')] + '.y.npy', mmap_mode='r'))
+    return total
+
+
+def write_shards(x, y, directory, shard_size=10000, compressed=True):
+    """Splits (N, 30, 99) windows and N labels into shards of shard_size rows."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, start in enumerate(range(0, len(x), shard_size)):
+        stem = os.path.join(directory, f'shard-{index:05d}')
+        x_part = np.asarray(x[start:start + shard_size], dtype=np.float32)
+        y_part = np.asarray(y[start:start + shard_size], dtype=np.int32)
+        if compressed:
+            np.savez_compressed(stem + '.npz', x=x_part, y=y_part)
+            paths.append(stem + '.npz')
+        else:
+            np.save(stem + '.x.npy', x_part)
+            np.save(stem + '.y.npy', y_part)
+            paths.append(stem + '.x.npy')
+    return paths
+
+
+def _read_shard(path):
+    x, y = open_shard(path.decode())
+    for start in range(0, len(y), READ_CHUNK):
+        yield np.asarray(x[start:start + READ_CHUNK], dtype=np.float32), np.asarray(y[start:start + READ_CHUNK], dtype=np.int32)
+
+
+def augment(x, jitter=0.005, scale=0.1, time_warp=0.2):
+    """
+    Random per-window augmentation of a (B, 30, 99) batch, as whole-batch ops:
+    Gaussian jitter on every coordinate, scaling about the window's mean
+    landmark position (per axis), and a time warp that replays the window
+    slower or faster about its middle frame (linear interpolation between
+    frames). All-zero frames mean "no person detected" and stay all-zero:
+    they get no jitter, are left out of the mean, and are never blended with
+    a detected frame.
+    """
+    batch_size = tf.shape(x)[0]
+    x = tf.reshape(x, [batch_size, SEQUENCE_LENGTH, NUM_LANDMARKS, 3])
+    # (B, 30) True where the frame holds a detection
+    present = tf.reduce_any(tf.not_equal(x, 0), axis=[2, 3])
+    mask = tf.cast(present, x.dtype)[:, :, tf.newaxis, tf.newaxis]
+    if jitter:
+        x = x + tf.random.normal(tf.shape(x), stddev=jitter) * mask
+    if scale:
+        factor = tf.random.uniform([batch_size, 1, 1, 1], 1 - scale, 1 + scale)
+        # Mean x, y and z over the detected frames' landmarks: (B, 1, 1, 3)
+        count = tf.maximum(tf.reduce_sum(mask, axis=[1, 2], keepdims=True) * NUM_LANDMARKS, 1.0)
+        center = tf.reduce_sum(x * mask, axis=[1, 2], keepdims=True) / count
+        x = ((x - center) * factor + center) * mask
+    if time_warp:
+        last = SEQUENCE_LENGTH - 1
+        rate = tf.random.uniform([batch_size, 1], 1 - time_warp, 1 + time_warp)
+        steps = tf.range(SEQUENCE_LENGTH, dtype=tf.float32)[tf.newaxis, :]
+        positions = tf.clip_by_value((steps - last / 2) * rate + last / 2, 0.0, float(last))
+        lower = tf.cast(tf.floor(positions), tf.int32)
+        upper = tf.minimum(lower + 1, last)
+        weight = positions - tf.cast(lower, tf.float32)
+        # Interpolate only between detected frames: next to a missing frame,
+        # take the detected neighbour as is; between two missing ones, zeros
+        lower_present = tf.gather(present, lower, batch_dims=1)
+        upper_present = tf.gather(present, upper, batch_dims=1)
+        weight = tf.where(lower_present & upper_present, weight, tf.cast(upper_present, tf.float32))
+        weight = weight[:, :, tf.newaxis, tf.newaxis]
+        x = tf.gather(x, lower, batch_dims=1) * (1 - weight) + tf.gather(x, upper, batch_dims=1) * weight
+    return tf.reshape(x, [batch_size, SEQUENCE_LENGTH, NUM_FEATURES])
+
+
+def preprocess_batches(dataset, preprocessor):
+    """Runs the serving Preprocessor (NumPy) on every (B, 30, 99) batch."""
+    num_features = preprocessor.num_features
+
+    def apply(x, y):
+        x = tf.numpy_function(preprocessor, [x], tf.float32, stateful=False)
+        x.set_shape([None, SEQUENCE_LENGTH, num_features])
+        return x, y
+    return dataset.map(apply, num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def make_dataset(paths, num_classes, batch_size=64, shuffle_buffer=10000, cache=None, training=True,
+                 augmentation=None, parallel_reads=4, preprocessor=None):
+    """
+    tf.data pipeline over shards. cache: None, 'memory', or a file path
+    prefix for an on-disk cache (for datasets larger than RAM).
+    """
+    signature = (
+        tf.TensorSpec([None, SEQUENCE_LENGTH, NUM_FEATURES], tf.float32),
+        tf.TensorSpec([None], tf.int32),
+    )
+    files = tf.data.Dataset.from_tensor_slices(paths)
+    if training:
+        files = files.shuffle(len(paths), reshuffle_each_iteration=True)
+    dataset = files.interleave(
+        lambda path: tf.data.Dataset.from_generator(_read_shard, output_signature=signature, args=(path,)),
+        cycle_length=parallel_reads,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not training,
+    ).unbatch()
+    if cache == 'memory':
+        dataset = dataset.cache()
+    elif cache:
+        dataset = dataset.cache(cache)
+    if training and shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    if training and augmentation is not None:
+        dataset = dataset.map(lambda x, y: (augment(x, **augmentation), y), num_parallel_calls=tf.data.AUTOTUNE)
+    if preprocessor is not None and not preprocessor.identity:
+        dataset = preprocess_batches(dataset, preprocessor)
+    dataset = dataset.map(lambda x, y: (x, tf.one_hot(y, num_classes)), num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def rss_mb():
+    """Current and peak resident set size of this process, in MB."""
+    current = 0.0
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return current, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Prints sequences/sec and RSS after every epoch."""
+
+    def __init__(self, sequences_per_epoch):
+        super().__init__()
+        self.sequences_per_epoch = sequences_per_epoch
+        self.history = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        current, peak = rss_mb()
+        row = {
+            'epoch': epoch + 1,
+            'sequences_per_s': self.sequences_per_epoch / elapsed,
+            'rss_mb': current,
+            'peak_rss_mb': peak,
+        }
+        self.history.append(row)
+        print(f"epoch {row['epoch']}: {row['sequences_per_s']:.0f} sequences/s, "
+              f"RSS {current:.0f} MB (peak {peak:.0f} MB)")
+
+
+def train(data_dir, labels_path, registry_root, version=None, epochs=20, batch_size=64, shuffle_buffer=10000,
+          val_fraction=0.1, cache=None, augmentation=None, activate=False, preprocessing=None):
+    """
+    Trains on the shards in data_dir, holding out the last val_fraction of
+    shards for validation, and publishes the model with its labels to the
+    registry at registry_root. preprocessing is a Preprocessor spec applied
+    in training and recorded in the manifest. Returns the published version.
+    """
+    preprocessor = Preprocessor.from_spec(preprocessing)
+    input_shape = (SEQUENCE_LENGTH, preprocessor.num_features)
+    with open(labels_path) as f:
+        num_classes = len([line for line in f.read().splitlines() if line.strip()])
+    paths = list_shards(data_dir)
+    num_val = int(round(len(paths) * val_fraction)) if len(paths) > 1 else 0
+    train_paths, val_paths = paths[:len(paths) - num_val], paths[len(paths) - num_val:]
+    train_rows = count_rows(train_paths)
+    print(f"Training on {train_rows} windows from {len(train_paths)} shards, "
+          f"validating on {len(val_paths)} shards, {num_classes} classes, "
+          f"{preprocessor.num_features} features {preprocessor.spec or '(raw)'}")
+
+    train_data = make_dataset(train_paths, num_classes, batch_size, shuffle_buffer, cache, True, augmentation,
+                              preprocessor=preprocessor)
+    val_data = make_dataset(val_paths, num_classes, batch_size, training=False,
+                            preprocessor=preprocessor) if val_paths else None
+
+    model = build_model(input_shape, num_classes)
+    logger = ThroughputLogger(train_rows)
+    model.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=[logger], verbose=2)
+
+    version = version or time.strftime('v%Y%m%d-%H%M%S')
+    registry = ModelRegistry(registry_root)
+    os.makedirs(registry_root, exist_ok=True)
+    with tempfile.TemporaryDirectory() as scratch:
+        model_path = os.path.join(scratch, 'sign_language_model.h5')
+        model.save(model_path)
+        directory = registry.publish(version, model_path, labels_path, backend='keras', input_shape=input_shape,
+                                     preprocessing=preprocessor.spec)
+    print(f"Model {version} published to {directory}")
+    if activate:
+        registry.activate(version)
+        print(f"Activated {version}")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the sign language recognizer on sharded landmark windows.")
+    parser.add_argument('--data', required=True, help="Directory of .npz or .x.npy/.y.npy shards")
+    parser.add_argument('--labels', default=os.path.join(os.path.dirname(__file__), 'labels.txt'),
+                        help="Class names, one per line, in class id order")
+    parser.add_argument('--registry', default=MODEL_REGISTRY_DIR, help="Model registry (default: MODEL_REGISTRY_DIR)")
+    parser.add_argument('--version', help="Registry version name (default: timestamp)")
+    parser.add_argument('--activate', action='store_true', help="Serve the new version once published")
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--shuffle-buffer', type=int, default=10000, help="Windows held for shuffling")
+    parser.add_argument('--val-fraction', type=float, default=0.1, help="Share of shards held out")
+    parser.add_argument('--cache', help="'memory', or a file prefix for an on-disk cache after the first epoch")
+    parser.add_argument('--jitter', type=float, default=0.005, help="Coordinate noise stddev (0 disables)")
+    parser.add_argument('--scale', type=float, default=0.1, help="Max relative scaling (0 disables)")
+    parser.add_argument('--time-warp', type=float, default=0.2, help="Max relative speed change (0 disables)")
+    parser.add_argument('--no-augment', action='store_true')
+    parser.add_argument('--normalize', action='store_true',
+                        help="Center on the shoulders' midpoint and scale by shoulder width")
+    parser.add_argument('--velocity', action='store_true', help="Append frame-to-frame feature differences")
+    parser.add_argument('--landmarks', help="Comma-separated landmark indices to keep (default: all 33)")
+    args = parser.parse_args()
+
+    if not args.registry:
+        parser.error("Set MODEL_REGISTRY_DIR or pass --registry")
+    augmentation = None if args.no_augment else {
+        'jitter': args.jitter, 'scale': args.scale, 'time_warp': args.time_warp,
+    }
+    preprocessing = {
+        'center': SHOULDERS if args.normalize else None,
+        'scale': SHOULDERS if args.normalize else None,
+        'landmarks': [int(index) for index in args.landmarks.split(',')] if args.landmarks else None,
+        'velocity': args.velocity,
+    }
+    train(args.data, args.labels, args.registry, args.version, args.epochs, args.batch_size,
+          args.shuffle_buffer, args.val_fraction, args.cache, augmentation, args.activate, preprocessing)
+
+
+if __name__ == '__main__':
+    main()
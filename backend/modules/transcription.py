@@ -0,0 +1,167 @@
+"""
+Offline transcription of recorded signing sessions. Each recording is a
+(T, 99) array of landmark frames (.npy, memory-mapped; or .npz with a
+'frames' array). Every sliding 30-frame window is built as a strided view of
+the recording, and the views are run through the model in large batches.
+Files are spread over a pool of worker processes, each with its own model.
+
+Writes one CSV timeline per recording, <name>.timeline.csv, with a label and
+confidence per frame: the prediction of the window ending at that frame (or
+the latest window before it when --stride > 1). The first 29 frames have no
+full window yet and are left empty.
+
+The model is loaded as in the live path: the registry's CURRENT version (or
+the bundled model), or --version.
+
+Usage (from backend/):
+  python -m modules.transcription recordings/*.npy --output timelines/ [--workers 4] [--batch-size 512]
+"""
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from modules.sign_language_module import SEQUENCE_LENGTH, NUM_FEATURES
+
+# Model loaded once per worker process by _init_worker
+_model = None
+
+
+def load_recording(path):
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            frames = data['frames']
+    else:
+        frames = np.load(path, mmap_mode='r')
+    if frames.ndim != 2 or frames.shape[1] != NUM_FEATURES:
+        raise ValueError(f"{path}: expected (T, {NUM_FEATURES}) frames, got {frames.shape}")
+    return frames
+
+
+def sliding_windows(frames, stride=1):
+    """
+    (num_windows, 30, 99) view of every window ending at frame 29, 29 + stride,
+    ... No frame data is copied: the view shares the recording's memory.
+    """
+    if len(frames) < SEQUENCE_LENGTH:
+        return np.empty((0, SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+    return sliding_window_view(frames, SEQUENCE_LENGTH, axis=0)[::stride].transpose(0, 2, 1)
+
+
+def load_model(version=None):
+    """The model the live server would serve, or registry `version`."""
+    from modules.sign_language_module import sign_language_model, load_model_version
+    if version is None:
+        sign_language_model.ensure_loaded()
+        if sign_language_model.active is None:
+            raise RuntimeError("Model failed to load")
+        return sign_language_model.active
+    return load_model_version(sign_language_model.manifest_for(version))
+
+
+def transcribe(model, frames, stride=1, batch_size=512):
+    """Returns (window end frames, (num_windows, num_classes) probabilities)."""
+    windows = sliding_windows(frames, stride)
+    outputs = []
+    for start in range(0, len(windows), batch_size):
+        # The batch is the only copy: the model needs contiguous float32 input
+        batch = np.ascontiguousarray(windows[start:start + batch_size], dtype=np.float32)
+        outputs.append(model.predict(batch))
+    ends = np.arange(len(windows)) * stride + SEQUENCE_LENGTH - 1
+    probabilities = np.concatenate(outputs) if outputs else np.empty((0, len(model.labels)), dtype=np.float32)
+    return ends, probabilities
+
+
+def write_timeline(path, num_frames, ends, probabilities, labels, fps):
+    # Index of the latest window ending at or before each frame (-1 for none)
+    latest = np.searchsorted(ends, np.arange(num_frames), side='right') - 1
+    classes = probabilities.argmax(axis=1) if len(probabilities) else np.empty(0, dtype=int)
+    confidences = probabilities.max(axis=1) if len(probabilities) else np.empty(0)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'time_s', 'label', 'confidence'])
+        for frame, window in enumerate(latest):
+            if window < 0:
+                writer.writerow([frame, f'{frame / fps:.3f}', '', ''])
+            else:
+                label = labels[classes[window]] if classes[window] < len(labels) else 'Unknown'
+                writer.writerow([frame, f'{frame / fps:.3f}', label, f'{confidences[window]:.4f}'])
+
+
+def process_file(path, output_dir, stride, batch_size, fps, model=None):
+    model = model or _model
+    start = time.perf_counter()
+    frames = load_recording(path)
+    ends, probabilities = transcribe(model, frames, stride, batch_size)
+    elapsed = time.perf_counter() - start
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(output_dir, f'{name}.timeline.csv')
+    write_timeline(output_path, len(frames), ends, probabilities, model.labels, fps)
+    return {'path': path, 'output': output_path, 'windows': len(ends), 'seconds': elapsed}
+
+
+def _init_worker(version, num_threads):
+    global _model
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _model = load_model(version)
+
+
+def _process_in_worker(args):
+    return process_file(*args)
+
+
+def run(paths, output_dir, workers=1, stride=1, batch_size=512, fps=30.0, version=None):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, output_dir, stride, batch_size, fps) for path in paths]
+    start = time.perf_counter()
+    results = []
+    if workers <= 1:
+        model = load_model(version)
+        start = time.perf_counter()
+        for job in jobs:
+            results.append(process_file(*job, model=model))
+            report(results[-1])
+    else:
+        # 'spawn' as in the inference pool: each worker gets a clean TensorFlow
+        context = multiprocessing.get_context('spawn')
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        with context.Pool(workers, initializer=_init_worker, initargs=(version, num_threads)) as pool:
+            for result in pool.imap_unordered(_process_in_worker, jobs):
+                results.append(result)
+                report(result)
+    elapsed = time.perf_counter() - start
+    total = sum(result['windows'] for result in results)
+    busy = sum(result['seconds'] for result in results)
+    # Wall time includes worker start-up and model loading when workers > 1
+    print(f"{len(results)} recordings, {total} windows in {elapsed:.1f}s: {total / elapsed:.0f} windows/s overall, "
+          f"{total / busy if busy else 0.0:.0f} windows/s per worker")
+    return results
+
+
+def report(result):
+    rate = result['windows'] / result['seconds'] if result['seconds'] else 0.0
+    print(f"{result['path']}: {result['windows']} windows, {rate:.0f} windows/s -> {result['output']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe recorded landmark sessions into label timelines.")
+    parser.add_argument('recordings', nargs='+', help="(T, 99) .npy or .npz files, or glob patterns")
+    parser.add_argument('--output', required=True, help="Directory for the .timeline.csv files")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (one model each)")
+    parser.add_argument('--batch-size', type=int, default=512, help="Windows per model call")
+    parser.add_argument('--stride', type=int, default=1, help="Frames between windows")
+    parser.add_argument('--fps', type=float, default=30.0, help="Recording frame rate, for time_s")
+    parser.add_argument('--version', help="Model registry version (default: the served one)")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.recordings for path in (glob.glob(pattern) or [pattern])})
+    run(paths, args.output, args.workers, args.stride, args.batch_size, args.fps, args.version)
+
+
+if __name__ == '__main__':
+    main()
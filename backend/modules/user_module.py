@@ -1,32 +1,107 @@
+import os
+from collections import namedtuple
 from models import db, User, Conversation
+from modules.cache import create_cache, MISSING
 import hashlib
 
+# Read-through cache for user lookups and friend lists. Set USER_CACHE_URL
+# (e.g. redis://localhost:6379/1) to share it, and its invalidations, across
+# server processes.
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 300))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+USER_CACHE_URL = os.getenv('USER_CACHE_URL')
+# Lifetime of a cached "no such user". A process-local cache does not see
+# users created by other server processes, so misses only live a few seconds
+# there; the shared cache is invalidated by create_user on every process.
+USER_CACHE_MISS_TTL = float(os.getenv('USER_CACHE_MISS_TTL', USER_CACHE_TTL if USER_CACHE_URL else 5))
+
+user_cache = create_cache(USER_CACHE_URL, USER_CACHE_SIZE, USER_CACHE_TTL)
+
+# Public columns of a User, as returned by the cached lookups
+UserRecord = namedtuple('UserRecord', ['id', 'name', 'email'])
+
+def _email_key(email):
+    return f"user:email:{email}"
+
+def _id_key(user_id):
+    return f"user:id:{user_id}"
+
+def _friends_key(user_id):
+    return f"user:friends:{user_id}"
+
+def _user_fields(user):
+    return {'id': user.id, 'name': user.name, 'email': user.email} if user else None
+
+def invalidate_user(user_id=None, email=None):
+    keys = []
+    if user_id is not None:
+        keys.append(_id_key(int(user_id)))
+    if email is not None:
+        keys.append(_email_key(email))
+    user_cache.delete(*keys)
+
+def invalidate_friends(*user_ids):
+    """Called whenever a conversation, i.e. a friendship, is created."""
+    user_cache.delete(*(_friends_key(int(user_id)) for user_id in user_ids))
+
 def create_user(name, email, password):
     hashed_password = hashlib.sha256(password.encode()).hexdigest()
     new_user = User(name=name, email=email, password=hashed_password)
     db.session.add(new_user)
     db.session.commit()
+    # Drops any cached "not found" for this email or id
+    invalidate_user(new_user.id, email)
 
 def find_user_by_email(email):
-    return User.query.filter_by(email=email).first()
+    fields = user_cache.get(_email_key(email))
+    if fields is MISSING:
+        fields = _user_fields(User.query.filter_by(email=email).first())
+        user_cache.set(_email_key(email), fields, None if fields else USER_CACHE_MISS_TTL)
+        if fields:
+            user_cache.set(_id_key(fields['id']), fields)
+    return UserRecord(**fields) if fields else None
+
+def find_user_by_id(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    fields = user_cache.get(_id_key(user_id))
+    if fields is MISSING:
+        fields = _user_fields(User.query.get(user_id))
+        user_cache.set(_id_key(user_id), fields, None if fields else USER_CACHE_MISS_TTL)
+    return UserRecord(**fields) if fields else None
 
 def authenticate_user(email, password):
     hashed_password = hashlib.sha256(password.encode()).hexdigest()
     return User.query.filter_by(email=email, password=hashed_password).first()
 
+def get_friend_emails(user_id):
+    user_id = int(user_id)
+    friend_emails = user_cache.get(_friends_key(user_id))
+    if friend_emails is not MISSING:
+        return list(friend_emails)
+
+    # Conversations are stored as (min id, max id): friends with a higher id
+    # come from the (iduser1, iduser2) index, friends with a lower id from
+    # (iduser2, iduser1).
+    higher = db.session.query(User.email).join(Conversation, Conversation.iduser2 == User.id).filter(
+        Conversation.iduser1 == user_id
+    )
+    lower = db.session.query(User.email).join(Conversation, Conversation.iduser1 == User.id).filter(
+        Conversation.iduser2 == user_id
+    )
+    friend_emails = [email for email, in higher.union_all(lower).all()]
+    user_cache.set(_friends_key(user_id), friend_emails)
+    return list(friend_emails)
+
 def get_user_profile(user_id):
-    user = User.query.get(user_id)
+    user = find_user_by_id(user_id)
     if not user:
         return None
 
-    friends = db.session.query(User.email).join(Conversation, (Conversation.iduser1 == User.id) | (Conversation.iduser2 == User.id)).filter(
-        ((Conversation.iduser1 == user_id) | (Conversation.iduser2 == user_id)) & (User.id != user_id)
-    ).all()
-
-    friend_emails = [email for email, in friends]
-
     return {
         'name': user.name,
         'email': user.email,
-        'friends': friend_emails
+        'friends': get_friend_emails(user.id)
     }
@@ -1,11 +1,16 @@
 import os
 import sys
-from app import app, socketio, db
-from manage import create_database_if_not_exists
-from flask_migrate import upgrade
 
 def run():
+    # Imported here, not at module level: inference pool workers are spawned,
+    # and spawn re-imports this file in every worker as __mp_main__.
+    from app import create_app, socketio, db
+    from manage import create_database_if_not_exists
+    from flask_migrate import upgrade
+
     print("--- Starting HandTalk Backend ---")
+    # Runs the development server in debug mode below
+    app = create_app(debug=True)
     
     print("1. Ensuring database exists...")
     create_database_if_not_exists()
@@ -26,7 +31,14 @@ def run():
         except Exception as e:
             print(f"Error ensuring database tables: {e}")
 
-    print("4. Starting development server with WebSocket support...")
+    # The model otherwise loads on the first socket connection; warming it up
+    # here overlaps the load with server startup without delaying it.
+    if os.getenv('MODEL_WARMUP', 'startup') == 'startup':
+        print("4. Warming up sign language model in the background...")
+        from modules.sign_language_module import inference_batcher
+        inference_batcher.warm_up()
+
+    print("5. Starting development server with WebSocket support...")
     # Use eventlet if available, otherwise falls back to gevent or werkzeug
     # Disabling reloader to avoid AssertionError with eventlet
     socketio.run(app, host='0.0.0.0', port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,44 @@
+"""
+Shared fixtures. Run from backend/: python -m pytest tests
+"""
+import os
+import time
+import pytest
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+from sqlalchemy import event
+from models import db
+from modules.user_module import user_cache
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def make_app(database_uri):
+    """A bare app with the database and migrations, without sockets or background tasks."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+    with app.app_context():
+        # The initial migration's server defaults call MySQL's NOW(), which
+        # SQLite lacks
+        event.listen(db.engine, 'connect', lambda connection, _: connection.create_function(
+            'now', 0, lambda: time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())))
+    return app
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    An app context on an empty SQLite database brought up as run.py does:
+    migrations, then db.create_all() for the tables they do not create.
+    """
+    app = make_app(f"sqlite:///{tmp_path / 'signlink.db'}")
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        db.create_all()
+        user_cache.clear()
+        yield app
+        db.session.remove()
+    user_cache.clear()
@@ -0,0 +1,99 @@
+"""
+Conversation storage, message paging and the inbox, on the migrated SQLite
+database.
+"""
+import pytest
+from modules.conversation_module import (
+    canonical_pair, create_conversation, find_conversation_id, get_conversation_messages, get_inbox,
+    mark_conversation_read, MAX_PAGE_SIZE
+)
+from modules.message_module import create_message
+from modules.user_module import create_user, find_user_by_email
+
+
+@pytest.fixture
+def users(database):
+    for name in ('ann', 'bob', 'cat'):
+        create_user(name, f'{name}@example.com', 'secret')
+    return {name: find_user_by_email(f'{name}@example.com').id for name in ('ann', 'bob', 'cat')}
+
+
+def ids(messages):
+    return [message['idmessage'] for message in messages]
+
+
+def test_canonical_pair_orders_ids():
+    assert canonical_pair(7, 3) == (3, 7)
+    assert canonical_pair('3', '7') == (3, 7)
+    assert canonical_pair(5, 5) == (5, 5)
+
+
+def test_create_conversation_stores_each_pair_once(users):
+    first = create_conversation(users['bob'], users['ann'])
+    assert (first.iduser1, first.iduser2) == canonical_pair(users['ann'], users['bob'])
+    assert create_conversation(users['ann'], users['bob']).idconv == first.idconv
+    assert find_conversation_id(users['bob'], users['ann']) == first.idconv
+
+
+def test_create_conversation_rejects_self(users):
+    with pytest.raises(Exception, match="yourself"):
+        create_conversation(users['ann'], users['ann'])
+
+
+@pytest.fixture
+def history(users):
+    """A conversation with ten messages; returns (conversation id, message ids oldest first)."""
+    conversation = create_conversation(users['ann'], users['bob'])
+    messages = [create_message(conversation.idconv, users['ann'] if i % 2 else users['bob'], f'm{i}')
+                for i in range(10)]
+    return conversation.idconv, [message.idmessage for message in messages]
+
+
+def test_messages_without_cursor_are_the_full_history(history):
+    idconv, message_ids = history
+    assert ids(get_conversation_messages(idconv)) == message_ids
+
+
+def test_messages_since_are_the_newer_ones(history):
+    idconv, message_ids = history
+    assert ids(get_conversation_messages(idconv, since=message_ids[6])) == message_ids[7:]
+    assert ids(get_conversation_messages(idconv, since=message_ids[2], limit=3)) == message_ids[3:6]
+    assert get_conversation_messages(idconv, since=message_ids[-1]) == []
+
+
+def test_messages_before_page_backwards_oldest_first(history):
+    idconv, message_ids = history
+    assert ids(get_conversation_messages(idconv, before=message_ids[6], limit=3)) == message_ids[3:6]
+    assert ids(get_conversation_messages(idconv, before=message_ids[2])) == message_ids[:2]
+
+
+def test_messages_limit_alone_is_the_latest_page(history):
+    idconv, message_ids = history
+    assert ids(get_conversation_messages(idconv, limit=4)) == message_ids[-4:]
+    assert ids(get_conversation_messages(idconv, limit=0)) == message_ids[-1:]
+    assert len(get_conversation_messages(idconv, limit=MAX_PAGE_SIZE + 1)) == 10
+
+
+def test_inbox_lists_recent_activity_first_with_unread_counts(users):
+    with_bob = create_conversation(users['ann'], users['bob']).idconv
+    with_cat = create_conversation(users['cat'], users['ann']).idconv
+    create_message(with_bob, users['bob'], 'hello ann')
+    create_message(with_bob, users['bob'], 'are you there?')
+    create_message(with_cat, users['ann'], 'hi cat')
+    create_message(with_bob, users['ann'], 'yes')
+
+    inbox = get_inbox(users['ann'])
+    assert [entry['conversation_id'] for entry in inbox] == [with_bob, with_cat]
+    assert [entry['friend_email'] for entry in inbox] == ['bob@example.com', 'cat@example.com']
+    assert inbox[0]['last_message']['contenu'] == 'yes'
+    assert [entry['unread_count'] for entry in inbox] == [2, 0]
+    assert [entry['unread_count'] for entry in get_inbox(users['bob'])] == [1]
+    assert [entry['unread_count'] for entry in get_inbox(users['cat'])] == [1]
+
+    mark_conversation_read(with_bob, users['ann'])
+    assert [entry['unread_count'] for entry in get_inbox(users['ann'])] == [0, 0]
+    assert [entry['unread_count'] for entry in get_inbox(users['bob'])] == [1]
+
+
+def test_inbox_of_user_without_conversations_is_empty(users):
+    assert get_inbox(users['cat']) == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from modules.frame_codec import HEADER, decode_frames, encode_frames, is_packed
+
+
+@pytest.fixture
+def frames():
+    return np.random.default_rng(0).random((30, 99), dtype=np.float32)
+
+
+def test_float32_round_trip_is_exact_and_zero_copy(frames):
+    payload = encode_frames(frames)
+    assert len(payload) == HEADER.size + frames.nbytes
+    decoded = decode_frames(payload)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, frames)
+    # A view over the payload, not a copy
+    assert not decoded.flags.writeable and not decoded.flags.owndata
+
+
+def test_float16_round_trip_is_upcast(frames):
+    payload = encode_frames(frames, dtype='float16')
+    assert len(payload) == HEADER.size + frames.size * 2
+    decoded = decode_frames(payload)
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, frames, atol=1e-3)
+
+
+def test_single_frame_and_memoryview(frames):
+    payload = memoryview(bytearray(encode_frames(frames[:1])))
+    assert is_packed(payload)
+    np.testing.assert_array_equal(decode_frames(payload), frames[:1])
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda payload: payload[:HEADER.size - 1],           # truncated header
+    lambda payload: payload[:-4],                         # truncated data
+    lambda payload: bytes([2]) + payload[1:],             # unknown version
+    lambda payload: payload[:1] + bytes([9]) + payload[2:],  # unknown dtype
+])
+def test_malformed_payloads_are_rejected(frames, corrupt):
+    with pytest.raises(ValueError):
+        decode_frames(corrupt(encode_frames(frames)))
+
+
+def test_encode_rejects_bad_input(frames):
+    with pytest.raises(ValueError):
+        encode_frames(frames[0])
+    with pytest.raises(ValueError):
+        encode_frames(frames, dtype='float64')
+
+
+def test_is_packed():
+    assert is_packed(b'') and is_packed(bytearray())
+    assert not is_packed([[0.0] * 99])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from modules.sign_language_module import FrameRingBuffer, SEQUENCE_LENGTH, NUM_FEATURES
+
+
+def frames(start, count):
+    """Frames whose every value is the frame's index, so order is visible."""
+    return np.repeat(np.arange(start, start + count, dtype=np.float32)[:, np.newaxis], NUM_FEATURES, axis=1)
+
+
+def test_window_is_due_once_full():
+    buffer = FrameRingBuffer()
+    assert not buffer.push(frames(0, SEQUENCE_LENGTH - 1))
+    assert buffer.push(frames(SEQUENCE_LENGTH - 1, 1))
+    np.testing.assert_array_equal(buffer.window(), frames(0, SEQUENCE_LENGTH))
+
+
+def test_window_is_oldest_first_after_wrapping():
+    buffer = FrameRingBuffer()
+    for i in range(SEQUENCE_LENGTH + 7):
+        buffer.push(frames(i, 1)[0])
+    np.testing.assert_array_equal(buffer.window(), frames(7, SEQUENCE_LENGTH))
+
+
+def test_chunk_longer_than_window_keeps_newest_frames():
+    buffer = FrameRingBuffer()
+    assert buffer.push(frames(0, SEQUENCE_LENGTH + 12))
+    np.testing.assert_array_equal(buffer.window(), frames(12, SEQUENCE_LENGTH))
+
+
+def test_stride_counts_frames_since_last_window():
+    buffer = FrameRingBuffer(stride=3)
+    buffer.push(frames(0, SEQUENCE_LENGTH))
+    buffer.window()
+    assert not buffer.push(frames(30, 1))
+    assert not buffer.push(frames(31, 1))
+    assert buffer.push(frames(32, 1))
+    buffer.restart_stride()
+    assert not buffer.push(frames(33, 2))
+    assert buffer.push(frames(35, 1))
+
+
+def test_window_is_a_copy():
+    buffer = FrameRingBuffer()
+    buffer.push(frames(0, SEQUENCE_LENGTH))
+    window = buffer.window()
+    buffer.push(frames(100, 5))
+    np.testing.assert_array_equal(window, frames(0, SEQUENCE_LENGTH))
+
+
+def test_rejects_wrong_feature_count():
+    with pytest.raises(ValueError):
+        FrameRingBuffer().push(np.zeros((2, NUM_FEATURES - 1)))
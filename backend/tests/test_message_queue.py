@@ -0,0 +1,147 @@
+"""
+Cross-process Socket.IO fan-out through MessageBroker and the client managers
+of create_client_manager, and sticky routing of emits to local sids. The
+socket server, the emitter and the test client are separate processes, as
+with several server processes behind one broker.
+"""
+import multiprocessing
+import socket
+import threading
+import time
+import pytest
+import socketio as socketio_client
+from modules.message_queue import MessageBroker, UnixSocketManager, create_client_manager, _frame, _recv_frame
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def serve(url, port):
+    """Socket server process: Flask-SocketIO on a broker-backed client manager."""
+    import logging
+    from flask import Flask, request
+    from flask_socketio import SocketIO
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = Flask(__name__)
+    manager = create_client_manager(url)
+    socketio = SocketIO(app, async_mode='threading', client_manager=manager)
+
+    @socketio.on('predict_local')
+    def predict_local():
+        # Same path as handle_result: emit to the requesting client's sid
+        socketio.emit('prediction_result', {'prediction': 'local'}, room=request.sid)
+
+    @socketio.on('routing_stats')
+    def routing_stats():
+        return {'local': manager.local_emits, 'published': manager.published_emits}
+
+    socketio.run(app, port=port, allow_unsafe_werkzeug=True, log_output=False)
+
+
+def emit_remote(url, sid, count):
+    """Emitter process: a write-only manager, as a standalone inference node uses."""
+    manager = create_client_manager(url, write_only=True)
+    for seq in range(count):
+        manager.emit('prediction_result', {'prediction': 'remote', 'seq': seq}, namespace='/', room=sid)
+        time.sleep(0.002)  # stay under the polling transport's packets-per-payload cap
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = MessageBroker(str(tmp_path / 'broker.sock'))
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    yield broker
+    broker.shutdown()
+    broker.server_close()
+
+
+@pytest.fixture
+def client(broker):
+    """A client connected to a server process attached to the broker; collects prediction results."""
+    context = multiprocessing.get_context('spawn')
+    port = free_port()
+    server = context.Process(target=serve, args=('unix://' + broker.path, port), daemon=True)
+    server.start()
+    client = socketio_client.Client()
+    client.results = []
+    client.on('prediction_result', client.results.append)
+    connect(client, port)
+    # The server's listener subscribes to the broker on its first connection
+    assert wait_for(lambda: len(broker.connections) >= 1)
+    yield client
+    client.disconnect()
+    server.terminate()
+    server.join()
+
+
+def connect(client, port, timeout=60):
+    """Connects once the server process listens."""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return client.connect(f'http://127.0.0.1:{port}', transports=['polling'])
+        except socketio_client.exceptions.ConnectionError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_scheme_selects_manager():
+    manager = create_client_manager('unix:///tmp/unused.sock', write_only=True)
+    assert type(manager) is UnixSocketManager
+    assert manager.path == '/tmp/unused.sock'
+
+
+def test_broker_forwards_frames_to_every_other_connection(broker):
+    connections = [socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) for _ in range(3)]
+    for connection in connections:
+        connection.connect(broker.path)
+        connection.settimeout(2)
+    assert wait_for(lambda: len(broker.connections) == 3)
+
+    connections[0].sendall(_frame(b'["flask-socketio", "hello"]'))
+    for connection in connections[1:]:
+        assert _recv_frame(connection) == b'["flask-socketio", "hello"]'
+    connections[0].settimeout(0.2)
+    with pytest.raises(socket.timeout):
+        connections[0].recv(1)
+    for connection in connections:
+        connection.close()
+
+
+def test_emit_from_another_process_reaches_client(broker, client):
+    emitter = multiprocessing.get_context('spawn').Process(
+        target=emit_remote, args=('unix://' + broker.path, client.get_sid(), 20)
+    )
+    emitter.start()
+    emitter.join(timeout=60)
+    assert emitter.exitcode == 0
+    assert wait_for(lambda: len(client.results) >= 20, timeout=10)
+    assert [result['seq'] for result in client.results] == list(range(20))
+
+
+def test_emit_to_local_sid_bypasses_the_broker(client):
+    client.emit('predict_local')
+    assert wait_for(lambda: client.results)
+    assert client.results == [{'prediction': 'local'}]
+    assert client.call('routing_stats') == {'local': 1, 'published': 0}
+
+
+def test_emit_to_other_sid_or_room_is_published(broker):
+    import socketio
+    manager = create_client_manager('unix://' + broker.path)
+    server = socketio.Server(client_manager=manager)
+    server.emit('prediction_result', {'prediction': 'remote'}, room='sid-on-another-process')
+    server.emit('new_message', {'content': 'hi'}, room='conversation_1')
+    assert (manager.local_emits, manager.published_emits) == (0, 2)
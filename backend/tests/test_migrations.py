@@ -0,0 +1,86 @@
+"""
+Migrations from a database created by the original schema: data the old code
+could write must not stop the upgrade halfway.
+"""
+import pytest
+import sqlalchemy as sa
+from flask_migrate import stamp, upgrade
+from models import db
+from conftest import MIGRATIONS_DIR, make_app
+
+# Schema db.create_all() built before the migrations in this directory
+BASELINE_SCHEMA = [
+    """CREATE TABLE user (
+        id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL,
+        email VARCHAR(100) NOT NULL UNIQUE, password VARCHAR(255) NOT NULL)""",
+    """CREATE TABLE conversation (
+        idconv INTEGER PRIMARY KEY,
+        iduser1 INTEGER NOT NULL REFERENCES user (id), iduser2 INTEGER NOT NULL REFERENCES user (id))""",
+    """CREATE TABLE message (
+        idmessage INTEGER PRIMARY KEY, idcnv INTEGER NOT NULL REFERENCES conversation (idconv),
+        iduser INTEGER NOT NULL REFERENCES user (id), contenu TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE invitation (
+        id INTEGER PRIMARY KEY, sender_id INTEGER NOT NULL REFERENCES user (id),
+        receiver_id INTEGER NOT NULL REFERENCES user (id), status VARCHAR(20), timestamp DATETIME)""",
+]
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """App context on a database in the original schema, stamped at the initial migration."""
+    app = make_app(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for statement in BASELINE_SCHEMA:
+                connection.exec_driver_sql(statement)
+        stamp(directory=MIGRATIONS_DIR, revision='9d6d1a34d6e3')
+        yield app
+        db.session.remove()
+
+
+def execute(statement, **parameters):
+    with db.engine.begin() as connection:
+        result = connection.execute(sa.text(statement), parameters)
+        return result.fetchall() if result.returns_rows else None
+
+
+def test_upgrade_merges_reversed_pairs_and_drops_self_conversations(baseline):
+    execute("INSERT INTO user (id, name, email, password) VALUES "
+            "(1, 'a', 'a@x', 'p'), (2, 'b', 'b@x', 'p'), (3, 'c', 'c@x', 'p')")
+    # 1: (1, 2); 2: its reverse; 3: reversed only; 4 and 5: a user with themselves
+    execute("INSERT INTO conversation (idconv, iduser1, iduser2) VALUES "
+            "(1, 1, 2), (2, 2, 1), (3, 3, 1), (4, 2, 2), (5, 3, 3)")
+    execute("INSERT INTO message (idmessage, idcnv, iduser, contenu) VALUES "
+            "(1, 1, 1, 'hi'), (2, 2, 2, 'hello'), (3, 3, 3, 'hey'), (4, 4, 2, 'note to self')")
+
+    upgrade(directory=MIGRATIONS_DIR)
+
+    head = execute("SELECT version_num FROM alembic_version")
+    assert head == [('c5e08d13a9f2',)]
+    assert execute("SELECT idconv, iduser1, iduser2 FROM conversation ORDER BY idconv") == [(1, 1, 2), (3, 1, 3)]
+    assert execute("SELECT idmessage, idcnv FROM message ORDER BY idmessage") == [(1, 1), (2, 1), (3, 3)]
+    # The inbox summary is backfilled from the merged messages
+    assert execute("SELECT idconv, last_message_id FROM conversation ORDER BY idconv") == [(1, 2), (3, 3)]
+
+    with pytest.raises(sa.exc.IntegrityError):
+        execute("INSERT INTO conversation (iduser1, iduser2) VALUES (2, 2)")
+    with pytest.raises(sa.exc.IntegrityError):
+        execute("INSERT INTO conversation (iduser1, iduser2) VALUES (2, 1)")
+
+
+def test_upgrade_creates_lookup_indexes(baseline):
+    upgrade(directory=MIGRATIONS_DIR)
+    inspector = sa.inspect(db.engine)
+    indexes = {table: {index['name'] for index in inspector.get_indexes(table)}
+               for table in ('conversation', 'message', 'invitation')}
+    assert {'ix_conversation_iduser1_iduser2', 'ix_conversation_iduser2_iduser1'} <= indexes['conversation']
+    assert 'ix_message_idcnv_idmessage' in indexes['message']
+    assert {'ix_invitation_receiver_id_status', 'ix_invitation_sender_id_status'} <= indexes['invitation']
+
+
+def test_upgrade_is_idempotent_over_create_all(baseline):
+    # A database whose tables db.create_all() built from the current models
+    db.drop_all()
+    db.create_all()
+    upgrade(directory=MIGRATIONS_DIR)
+    assert execute("SELECT version_num FROM alembic_version") == [('c5e08d13a9f2',)]
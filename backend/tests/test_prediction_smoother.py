@@ -0,0 +1,56 @@
+import pytest
+from modules.sign_language_module import PredictionSmoother
+
+HELLO = [0.9, 0.05, 0.05]
+THANKS = [0.05, 0.9, 0.05]
+UNSURE = [0.4, 0.35, 0.25]
+
+
+def test_ema_emits_first_confident_label_once():
+    smoother = PredictionSmoother('ema', window=5)
+    assert smoother.update(HELLO) == 0
+    assert smoother.update(HELLO) is None
+    assert (smoother.updates, smoother.emitted) == (2, 1)
+
+
+def test_ema_ignores_low_confidence():
+    smoother = PredictionSmoother('ema', threshold=0.6)
+    assert smoother.update(UNSURE) is None
+    assert smoother.stable is None
+
+
+def test_ema_switches_only_after_sustained_change():
+    smoother = PredictionSmoother('ema', window=5)
+    smoother.update(HELLO)
+    # One outlier frame moves the average, not the label
+    assert smoother.update(THANKS) is None
+    assert smoother.update(HELLO) is None
+    changes = [smoother.update(THANKS) for _ in range(6)]
+    assert changes.count(1) == 1 and changes[0] is None
+    assert smoother.stable == 1
+
+
+def test_vote_follows_the_majority_of_the_window():
+    smoother = PredictionSmoother('vote', window=3, threshold=0.6, hysteresis=0.1)
+    assert smoother.update(HELLO) == 0
+    assert smoother.update(THANKS) is None  # 1 of 2 votes
+    assert smoother.update(THANKS) == 1     # 2 of 3 votes
+    assert smoother.update(THANKS) is None
+
+
+def test_hysteresis_holds_label_until_lead_is_large_enough():
+    smoother = PredictionSmoother('vote', window=5, threshold=0.5, hysteresis=0.3)
+    smoother.update(HELLO)
+    smoother.update(HELLO)
+    smoother.update(THANKS)
+    smoother.update(THANKS)
+    # THANKS leads 0.6 to 0.4: above threshold, but by less than 0.3
+    assert smoother.update(THANKS) is None
+    assert smoother.stable == 0
+    # 0.8 to 0.2
+    assert smoother.update(THANKS) == 1
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        PredictionSmoother('median')
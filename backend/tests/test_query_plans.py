@@ -0,0 +1,117 @@
+"""
+Runs the hot lookup paths against a seeded database, captures every SELECT
+they issue and EXPLAINs it. Fails if a statement needs a full table or index
+scan, or has to merge several indexes to resolve an OR.
+
+Uses the migrated SQLite database; set QUERY_PLAN_DATABASE_URI (e.g. to a
+scratch MySQL schema, whose tables are created and dropped) to check the
+production planner instead.
+"""
+import os
+import random
+import pytest
+from sqlalchemy import event
+from models import db, User, Conversation, Invitation
+from modules.user_module import user_cache
+from conftest import make_app
+
+NUM_USERS = 2000
+NUM_CONVERSATIONS = 6000
+NUM_INVITATIONS = 6000
+
+# MySQL access types that are not plain index seeks
+MYSQL_SCAN_TYPES = ('ALL', 'index', 'index_merge')
+
+
+def seed():
+    rng = random.Random(0)
+    db.session.bulk_insert_mappings(User, [
+        {'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x'}
+        for i in range(1, NUM_USERS + 1)
+    ])
+    pairs = set()
+    while len(pairs) < NUM_CONVERSATIONS:
+        a, b = rng.sample(range(1, NUM_USERS + 1), 2)
+        pairs.add((min(a, b), max(a, b)))
+    db.session.bulk_insert_mappings(Conversation, [{'iduser1': a, 'iduser2': b} for a, b in pairs])
+    db.session.bulk_insert_mappings(Invitation, [
+        {'sender_id': a, 'receiver_id': b, 'status': rng.choice(['pending', 'accepted', 'rejected'])}
+        for a, b in (rng.sample(range(1, NUM_USERS + 1), 2) for _ in range(NUM_INVITATIONS))
+    ])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE' if db.engine.name == 'sqlite' else 'ANALYZE TABLE user, conversation, invitation'))
+
+
+def hot_paths():
+    from modules.conversation_module import get_conversation_id, is_participant, get_inbox
+    from modules.invitation_module import send_invitation, get_received_invitations, get_sent_invitations
+    from modules.user_module import get_user_profile, find_user_by_email
+
+    return {
+        'find_user_by_email': lambda: find_user_by_email('user7@example.com'),
+        'get_conversation_id': lambda: get_conversation_id(7, 'user8@example.com'),
+        'is_participant': lambda: is_participant(1, 7),
+        'send_invitation': lambda: send_invitation(11, 'user12@example.com'),
+        'get_received_invitations': lambda: get_received_invitations(7),
+        'get_sent_invitations': lambda: get_sent_invitations(7),
+        'get_user_profile': lambda: get_user_profile(7),
+        'get_inbox': lambda: get_inbox(7),
+    }
+
+
+def full_scans(connection, statement, parameters):
+    """Returns the plan lines of `statement` that are not single index seeks."""
+    if db.engine.name == 'sqlite':
+        plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        details = [row[-1] for row in plan]
+        return [d for d in details if d.startswith('SCAN ') or d.startswith('MULTI-INDEX OR')]
+    plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+    # Derived tables (<derivedN>, <unionN,M>) are materialized subquery results,
+    # so only base tables are checked
+    return [f"{row['table']}: type={row['type']}" for row in plan
+            if row['type'] in MYSQL_SCAN_TYPES and not str(row['table']).startswith('<')]
+
+
+@pytest.fixture(scope='module')
+def seeded(tmp_path_factory):
+    uri = os.getenv('QUERY_PLAN_DATABASE_URI')
+    if uri:
+        app = make_app(uri)
+        with app.app_context():
+            db.create_all()
+            seed()
+            yield app
+            db.session.remove()
+            db.drop_all()
+        return
+    from flask_migrate import upgrade
+    from conftest import MIGRATIONS_DIR
+    app = make_app(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'signlink.db'}")
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        db.create_all()
+        seed()
+        yield app
+        db.session.remove()
+
+
+@pytest.mark.parametrize('path', list(hot_paths()))
+def test_hot_path_uses_index_seeks_only(seeded, path):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    user_cache.clear()
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        hot_paths()[path]()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+        db.session.rollback()
+
+    assert statements
+    with db.engine.connect() as connection:
+        scans = [scan for s, p in statements for scan in full_scans(connection, s, p)]
+    assert scans == []
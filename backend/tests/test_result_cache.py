@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from modules.sign_language_module import WindowResultCache, SEQUENCE_LENGTH, NUM_FEATURES
+
+PROBABILITIES = np.array([0.1, 0.7, 0.2], dtype=np.float32)
+
+
+@pytest.fixture
+def window():
+    return np.random.default_rng(0).random((SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+
+
+def infer(cache, sid, window, version='v1'):
+    """Looks the window up and, on a miss, stores PROBABILITIES as the model's output."""
+    probabilities = cache.lookup(sid, window, version)
+    if probabilities is None:
+        cache.store(sid, PROBABILITIES, version)
+    return probabilities
+
+
+def test_first_lookup_misses_and_repeat_hits_the_lru(window):
+    cache = WindowResultCache()
+    assert infer(cache, 'a', window) is None
+    # Another sid, and a copy that quantizes to the same key
+    quantized = np.round(window / cache.step) * cache.step
+    np.testing.assert_array_equal(cache.lookup('b', quantized.astype(np.float32), 'v1'), PROBABILITIES)
+    stats = cache.stats()
+    assert (stats['lookups'], stats['hits'], stats['fast_path_hits']) == (2, 1, 0)
+    assert stats['lru_entries'] == 1
+
+
+def test_results_are_kept_per_model_version(window):
+    cache = WindowResultCache(epsilon=0.01)
+    infer(cache, 'a', window, 'v1')
+    assert cache.lookup('a', window, 'v2') is None
+    assert cache.lookup('b', window, 'v2') is None
+
+
+def test_fast_path_reuses_last_result_within_epsilon(window):
+    cache = WindowResultCache(max_entries=0, epsilon=0.01)
+    infer(cache, 'a', window)
+    np.testing.assert_array_equal(cache.lookup('a', window + 0.005, 'v1'), PROBABILITIES)
+    assert cache.lookup('a', window + 0.02, 'v1') is None
+    # The fast path is per sid
+    assert cache.lookup('b', window, 'v1') is None
+    assert cache.stats()['fast_path_hits'] == 1
+
+
+def test_fast_path_is_off_by_default(window):
+    cache = WindowResultCache(max_entries=0)
+    infer(cache, 'a', window)
+    assert cache.lookup('a', window, 'v1') is None
+    assert 'lru_entries' not in cache.stats()
+
+
+def test_store_without_a_miss_is_ignored(window):
+    cache = WindowResultCache(epsilon=0.01)
+    cache.store('a', PROBABILITIES, 'v1')
+    assert cache.lookup('a', window, 'v1') is None
+    assert cache.stats()['lru_entries'] == 0
+
+
+def test_forget_drops_the_fast_path_and_pending_miss(window):
+    cache = WindowResultCache(max_entries=0, epsilon=0.01)
+    infer(cache, 'a', window)
+    cache.forget('a')
+    assert cache.lookup('a', window, 'v1') is None
+    cache.forget('a')
+    cache.store('a', PROBABILITIES, 'v1')
+    assert cache.lookup('a', window, 'v1') is None
@@ -0,0 +1,50 @@
+"""
+Every inference runtime must return the same probabilities as the Keras
+model it was built from. Run from backend/: python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+
+from modules.model_builder import build_model, build_causal_model, export_tflite
+from modules.sign_language_module import (
+    KerasRuntime, TFFunctionRuntime, TFLiteRuntime, StatefulRuntime, SEQUENCE_LENGTH, NUM_FEATURES
+)
+
+NUM_CLASSES = 3
+
+
+@pytest.fixture(scope='module')
+def windows():
+    return np.random.default_rng(0).random((8, SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('model') / 'sign_language_model.h5')
+    build_model((SEQUENCE_LENGTH, NUM_FEATURES), NUM_CLASSES).save(path)
+    return path
+
+
+def test_tf_function_matches_keras(model_path, windows):
+    reference = KerasRuntime(model_path).predict(windows)
+    candidate = TFFunctionRuntime(model_path).predict(windows)
+    np.testing.assert_allclose(candidate, reference, atol=1e-5)
+
+
+def test_tflite_matches_keras(model_path, windows, tmp_path):
+    tflite_path = export_tflite(model_path, str(tmp_path / 'sign_language_model.tflite'))
+    reference = KerasRuntime(model_path).predict(windows)
+    candidate = TFLiteRuntime(tflite_path).predict(windows)
+    np.testing.assert_allclose(candidate, reference, atol=1e-4)
+    assert (candidate.argmax(axis=1) == reference.argmax(axis=1)).all()
+
+
+def test_stateful_steps_match_causal_model(windows, tmp_path):
+    path = str(tmp_path / 'sign_language_model_causal.h5')
+    causal = build_causal_model((SEQUENCE_LENGTH, NUM_FEATURES), NUM_CLASSES)
+    causal.save(path)
+    reference = causal.predict(windows, verbose=0)
+    candidate = StatefulRuntime(path).predict(windows)
+    np.testing.assert_allclose(candidate, reference, atol=1e-5)
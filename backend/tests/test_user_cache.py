@@ -0,0 +1,47 @@
+import time
+from models import db, User
+from modules import user_module
+from modules.cache import TTLCache, MISSING
+from modules.user_module import create_user, find_user_by_email, find_user_by_id
+
+
+def insert_from_another_process(name, email):
+    """Adds a user without going through create_user, so nothing is invalidated here."""
+    user = User(name=name, email=email, password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_entry_ttl_overrides_the_default():
+    cache = TTLCache(ttl=300)
+    cache.set('short', 1, ttl=0.01)
+    cache.set('long', 2)
+    time.sleep(0.02)
+    assert cache.get('short') is MISSING
+    assert cache.get('long') == 2
+
+
+def test_found_users_are_cached(database):
+    create_user('ann', 'ann@example.com', 'secret')
+    ann = find_user_by_email('ann@example.com')
+    db.session.execute(db.text("UPDATE user SET name = 'renamed'"))
+    db.session.commit()
+    assert find_user_by_email('ann@example.com').name == 'ann'
+    assert find_user_by_id(ann.id).name == 'ann'
+
+
+def test_misses_expire_quickly(database, monkeypatch):
+    monkeypatch.setattr(user_module, 'USER_CACHE_MISS_TTL', 0.05)
+    assert find_user_by_email('bob@example.com') is None
+    assert find_user_by_id(1) is None
+    bob_id = insert_from_another_process('bob', 'bob@example.com')
+    time.sleep(0.1)
+    assert find_user_by_email('bob@example.com').id == bob_id
+    assert find_user_by_id(bob_id).name == 'bob'
+
+
+def test_create_user_drops_a_cached_miss(database):
+    assert find_user_by_email('cat@example.com') is None
+    create_user('cat', 'cat@example.com', 'secret')
+    assert find_user_by_email('cat@example.com').name == 'cat'
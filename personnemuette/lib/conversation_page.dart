@@ -3,6 +3,7 @@ import 'package:flutter/material.dart';
 import 'package:flutter_animate/flutter_animate.dart';
 import 'package:google_fonts/google_fonts.dart';
 import 'services/api_service.dart';
+import 'services/chat_socket_service.dart';
 import 'utils/user_preferences.dart';
 import 'sign_language.dart';
 import 'theme/app_theme.dart';
@@ -30,11 +31,16 @@ class _ConversationPageState extends State<ConversationPage> {
   String? userId;
   String friendName = "Loading...";
   Timer? _pollingTimer;
+  bool _isLoadingOlder = false;
+  bool _hasOlderMessages = true;
+  static const int _pageSize = 50;
+  StreamSubscription<Map<String, dynamic>>? _messageSubscription;
 
   @override
   void initState() {
     super.initState();
-    _loadMessages();
+    _scrollController.addListener(_onScroll);
+    _loadMessages().then((_) => _connectChat());
     _loadFriendName();
     _startPolling();
   }
@@ -42,30 +48,96 @@ class _ConversationPageState extends State<ConversationPage> {
   @override
   void dispose() {
     _pollingTimer?.cancel();
+    _messageSubscription?.cancel();
+    ChatSocketService().connectedNotifier.removeListener(_onChatConnection);
+    ChatSocketService().leaveConversation(widget.conversationId);
     _messageController.dispose();
     _scrollController.dispose();
     super.dispose();
   }
 
+  // REST polling is only a fallback while the chat socket is down
   void _startPolling() {
     _pollingTimer = Timer.periodic(const Duration(seconds: 3), (timer) {
-      _loadMessages(isPolling: true);
+      if (!ChatSocketService().connectedNotifier.value) {
+        _loadMessages(isPolling: true);
+      }
+    });
+  }
+
+  void _connectChat() {
+    final chat = ChatSocketService();
+    chat.connect(ApiService.baseUrl);
+    _messageSubscription = chat.messages.listen((message) {
+      if (message['idcnv'].toString() != widget.conversationId) return;
+      _appendMessages([message]);
+      if (message['iduser'].toString() != userId.toString()) {
+        chat.acknowledge(widget.conversationId, message['idmessage']);
+      }
     });
+    chat.connectedNotifier.addListener(_onChatConnection);
+    _onChatConnection();
+  }
+
+  // (Re)joins the room on every connect, resuming from the last message seen
+  Future<void> _onChatConnection() async {
+    if (!ChatSocketService().connectedNotifier.value || userId == null) return;
+    try {
+      final missed = await ChatSocketService()
+          .joinConversation(widget.conversationId, userId!, _lastMessageId);
+      _appendMessages(missed);
+    } catch (e) {
+      debugPrint('Failed to join conversation: $e');
+    }
+  }
+
+  void _appendMessages(List<Map<String, dynamic>> incoming) {
+    if (!mounted) return;
+    final lastId = _lastMessageId ?? 0;
+    final fresh =
+        incoming.where((msg) => (msg['idmessage'] as int) > lastId).toList();
+    if (fresh.isEmpty) return;
+    setState(() => messages.addAll(fresh));
+    _scrollToBottom();
   }
 
+  // Id of the newest message already shown, used as the polling cursor
+  int? get _lastMessageId {
+    for (final msg in messages.reversed) {
+      if (msg['idmessage'] != null) return msg['idmessage'] as int;
+    }
+    return null;
+  }
+
+  // Initial load fetches the latest page; later calls only fetch new rows.
   Future<void> _loadMessages({bool isPolling = false}) async {
     try {
       final token = await UserPreferences.getUserToken();
       userId = await UserPreferences.getUserId();
       if (token != null && userId != null) {
+        final since = _lastMessageId;
         final fetchedMessages = await ApiService.getConversationMessages(
-            widget.conversationId, token);
+            widget.conversationId, token,
+            since: since, limit: since == null ? _pageSize : null);
         if (mounted) {
           setState(() {
-            messages = fetchedMessages;
+            if (since == null) {
+              messages = fetchedMessages;
+              _hasOlderMessages = fetchedMessages.length == _pageSize;
+            } else {
+              // A concurrent poll may already have appended these rows
+              final lastId = _lastMessageId ?? since;
+              messages.addAll(fetchedMessages
+                  .where((msg) => (msg['idmessage'] as int) > lastId));
+            }
             if (!isPolling) isLoading = false;
           });
-          if (!isPolling) _scrollToBottom();
+          if (!isPolling || fetchedMessages.isNotEmpty) _scrollToBottom();
+          if (fetchedMessages.isNotEmpty) {
+            ApiService.markConversationRead(
+                    widget.conversationId, userId!, token)
+                .catchError((e) => debugPrint('Failed to mark read: $e'));
+          }
         }
       }
     } catch (e) {
@@ -81,6 +153,38 @@ class _ConversationPageState extends State<ConversationPage> {
     }
   }
 
+  void _onScroll() {
+    if (_scrollController.position.pixels <=
+        _scrollController.position.minScrollExtent + 50) {
+      _loadOlderMessages();
+    }
+  }
+
+  Future<void> _loadOlderMessages() async {
+    if (_isLoadingOlder || !_hasOlderMessages || messages.isEmpty) return;
+    final firstId = messages.first['idmessage'];
+    if (firstId == null) return;
+    _isLoadingOlder = true;
+    try {
+      final token = await UserPreferences.getUserToken();
+      if (token != null) {
+        final older = await ApiService.getConversationMessages(
+            widget.conversationId, token,
+            before: firstId as int, limit: _pageSize);
+        if (mounted) {
+          setState(() {
+            messages.insertAll(0, older);
+            _hasOlderMessages = older.length == _pageSize;
+          });
+        }
+      }
+    } catch (e) {
+      debugPrint('Failed to load older messages: $e');
+    } finally {
+      _isLoadingOlder = false;
+    }
+  }
+
   void _scrollToBottom() {
     WidgetsBinding.instance.addPostFrameCallback((_) {
       if (_scrollController.hasClients) {
@@ -132,15 +236,25 @@ class _ConversationPageState extends State<ConversationPage> {
 
         final token = await UserPreferences.getUserToken();
         if (token != null) {
-          await ApiService.sendMessage(
-              widget.conversationId, userId!, message, token);
+          final chat = ChatSocketService();
+          Map<String, dynamic>? sent;
+          if (chat.connectedNotifier.value) {
+            sent = await chat.sendMessage(widget.conversationId, message);
+          } else {
+            await ApiService.sendMessage(
+                widget.conversationId, userId!, message, token);
+          }
           if (content == null) _messageController.clear();
           if (mounted) {
             setState(() {
               if (content == null) isWritingMessage = false;
               messages.removeWhere((msg) => msg['isSending'] == true);
             });
-            _loadMessages();
+            if (sent != null) {
+              _appendMessages([sent]);
+            } else {
+              _loadMessages();
+            }
           }
         }
       } catch (e) {
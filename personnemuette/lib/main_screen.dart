@@ -19,8 +19,10 @@ class HomePage extends StatefulWidget {
 
 class _HomePageState extends State<HomePage> {
   String userName = "Loading...";
-  List<String> friends = [];
-  List<String> filteredFriends = [];
+  String? _userId;
+  // Inbox entries: one per conversation, most recent activity first
+  List<Map<String, dynamic>> conversations = [];
+  List<Map<String, dynamic>> filteredConversations = [];
   final TextEditingController _searchController = TextEditingController();
   bool _isLoading = true;
 
@@ -28,7 +30,7 @@ class _HomePageState extends State<HomePage> {
   void initState() {
     super.initState();
     _loadUserData();
-    _searchController.addListener(_filterFriends);
+    _searchController.addListener(_filterConversations);
   }
 
   @override
@@ -44,13 +46,15 @@ class _HomePageState extends State<HomePage> {
       final token = await UserPreferences.getUserToken();
       if (userId != null && token != null) {
         final userProfile = await ApiService.getUserProfile(userId, token);
+        final inbox = await ApiService.getInbox(userId, token);
         if (mounted) {
           setState(() {
+            _userId = userId;
             userName = userProfile['name'];
-            friends = List<String>.from(userProfile['friends']);
-            filteredFriends = friends;
+            conversations = inbox;
             _isLoading = false;
           });
+          _filterConversations();
         }
       }
     } catch (e) {
@@ -70,15 +74,40 @@ class _HomePageState extends State<HomePage> {
     }
   }
 
-  void _filterFriends() {
+  void _filterConversations() {
     final query = _searchController.text.toLowerCase();
     setState(() {
-      filteredFriends = friends
-          .where((friend) => friend.toLowerCase().contains(query))
+      filteredConversations = conversations
+          .where((conversation) =>
+              conversation['friend_email'].toLowerCase().contains(query) ||
+              conversation['friend_name'].toLowerCase().contains(query))
           .toList();
     });
   }
 
+  String _lastMessagePreview(Map<String, dynamic> conversation) {
+    final lastMessage = conversation['last_message'];
+    if (lastMessage == null) return "Tap to chat";
+    final content = lastMessage['contenu'] ?? '';
+    return lastMessage['iduser'].toString() == _userId
+        ? "You: $content"
+        : content;
+  }
+
+  void _openConversation(Map<String, dynamic> conversation) async {
+    await Navigator.push(
+      context,
+      MaterialPageRoute(
+        builder: (context) => ConversationPage(
+          friendEmail: conversation['friend_email'],
+          conversationId: conversation['conversation_id'].toString(),
+        ),
+      ),
+    );
+    // Refresh last messages and unread counts
+    _loadUserData();
+  }
+
   void _toggleDarkMode() {
     final isDark = themeNotifier.value == ThemeMode.dark;
     themeNotifier.value = isDark ? ThemeMode.light : ThemeMode.dark;
@@ -195,7 +224,7 @@ class _HomePageState extends State<HomePage> {
                               icon: const Icon(Icons.clear),
                               onPressed: () {
                                 _searchController.clear();
-                                _filterFriends();
+                                _filterConversations();
                               },
                             )
                           : null,
@@ -203,15 +232,15 @@ class _HomePageState extends State<HomePage> {
                   ).animate().fadeIn().slideY(begin: -0.2),
                 ),
                 
-                // Friends List
+                // Conversations List
                 Expanded(
-                  child: filteredFriends.isEmpty
+                  child: filteredConversations.isEmpty
                       ? AppComponents.emptyState(
                           icon: Icons.people_outline,
-                          title: friends.isEmpty
+                          title: conversations.isEmpty
                               ? "No Friends Yet"
                               : "No Results Found",
-                          subtitle: friends.isEmpty
+                          subtitle: conversations.isEmpty
                               ? "Add friends to start conversations"
                               : "Try a different search term",
                         )
@@ -219,8 +248,10 @@ class _HomePageState extends State<HomePage> {
                           padding: const EdgeInsets.symmetric(
                             horizontal: AppTheme.spacing16,
                           ),
-                          itemCount: filteredFriends.length,
+                          itemCount: filteredConversations.length,
                           itemBuilder: (context, index) {
+                            final conversation = filteredConversations[index];
+                            final unread = conversation['unread_count'] as int;
                             return Card(
                               margin: const EdgeInsets.only(
                                 bottom: AppTheme.spacing12,
@@ -231,69 +262,46 @@ class _HomePageState extends State<HomePage> {
                                   vertical: AppTheme.spacing8,
                                 ),
                                 leading: AppComponents.avatar(
-                                  name: filteredFriends[index],
+                                  name: conversation['friend_name'],
                                   size: 50,
                                 ),
                                 title: Text(
-                                  filteredFriends[index],
+                                  conversation['friend_name'],
                                   style: GoogleFonts.outfit(
                                     fontWeight: FontWeight.w600,
                                     fontSize: AppTheme.fontSizeBody,
                                   ),
                                 ),
                                 subtitle: Text(
-                                  "Tap to chat",
+                                  _lastMessagePreview(conversation),
+                                  maxLines: 1,
+                                  overflow: TextOverflow.ellipsis,
                                   style: GoogleFonts.outfit(
                                     fontSize: AppTheme.fontSizeMedium,
                                     color: AppTheme.textSecondaryLight,
+                                    fontWeight: unread > 0
+                                        ? FontWeight.w600
+                                        : FontWeight.normal,
                                   ),
                                 ),
-                                trailing: Icon(
-                                  Icons.chat_bubble_outline,
-                                  color: Theme.of(context).primaryColor,
-                                ),
-                                onTap: () async {
-                                  try {
-                                    final userId =
-                                        await UserPreferences.getUserId();
-                                    final token =
-                                        await UserPreferences.getUserToken();
-
-                                    if (userId != null && token != null) {
-                                      final conversationId =
-                                          await ApiService.getConversationId(
-                                        userId,
-                                        filteredFriends[index],
-                                        token,
-                                      );
-
-                                      Navigator.push(
-                                        context,
-                                        MaterialPageRoute(
-                                          builder: (context) =>
-                                              ConversationPage(
-                                            friendEmail: filteredFriends[index],
-                                            conversationId: conversationId,
-                                          ),
-                                        ),
-                                      );
-                                    }
-                                  } catch (e) {
-                                    ScaffoldMessenger.of(context).showSnackBar(
-                                      SnackBar(
-                                        content: Text(
-                                            'Failed to load conversation: $e'),
-                                        backgroundColor: AppTheme.errorColor,
-                                        behavior: SnackBarBehavior.floating,
-                                        shape: RoundedRectangleBorder(
-                                          borderRadius: BorderRadius.circular(
-                                            AppTheme.radiusMedium,
+                                trailing: unread > 0
+                                    ? CircleAvatar(
+                                        radius: 12,
+                                        backgroundColor:
+                                            Theme.of(context).primaryColor,
+                                        child: Text(
+                                          unread > 99 ? '99+' : '$unread',
+                                          style: GoogleFonts.outfit(
+                                            fontSize: 11,
+                                            color: Colors.white,
                                           ),
                                         ),
+                                      )
+                                    : Icon(
+                                        Icons.chat_bubble_outline,
+                                        color: Theme.of(context).primaryColor,
                                       ),
-                                    );
-                                  }
-                                },
+                                onTap: () => _openConversation(conversation),
                               ),
                             )
                                 .animate()
@@ -109,11 +109,20 @@ class ApiService {
     }
   }
 
-  // Fetch messages for a specific conversation
+  // Fetch messages for a specific conversation, oldest first.
+  // since: only messages newer than this id; before: only older ones;
+  // limit: page size (the latest page when no cursor is given).
   static Future<List<Map<String, dynamic>>> getConversationMessages(
-      String conversationId, String token) async {
+      String conversationId, String token,
+      {int? since, int? before, int? limit}) async {
+    final query = <String, String>{
+      if (since != null) 'since': '$since',
+      if (before != null) 'before': '$before',
+      if (limit != null) 'limit': '$limit',
+    };
     final response = await http.get(
-      Uri.parse('$baseUrl/conversations/$conversationId/messages'),
+      Uri.parse('$baseUrl/conversations/$conversationId/messages')
+          .replace(queryParameters: query.isEmpty ? null : query),
       headers: {
         'Content-Type': 'application/json',
         'Authorization': 'Bearer $token',
@@ -129,6 +138,47 @@ class ApiService {
     }
   }
 
+  // Every conversation of the user, most recent first, with the friend,
+  // the last message and the unread count
+  static Future<List<Map<String, dynamic>>> getInbox(
+      String userId, String token) async {
+    final response = await http.get(
+      Uri.parse('$baseUrl/users/$userId/inbox'),
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer $token',
+      },
+    );
+
+    if (response.statusCode == 200) {
+      return List<Map<String, dynamic>>.from(json.decode(response.body));
+    } else {
+      final errorData = json.decode(response.body);
+      final errorMessage = errorData['message'] ?? 'Failed to load inbox';
+      throw Exception(errorMessage);
+    }
+  }
+
+  // Clear the user's unread count for a conversation
+  static Future<void> markConversationRead(
+      String conversationId, String userId, String token) async {
+    final response = await http.post(
+      Uri.parse('$baseUrl/conversations/$conversationId/read'),
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer $token',
+      },
+      body: jsonEncode({'userId': userId}),
+    );
+
+    if (response.statusCode != 200) {
+      final errorData = json.decode(response.body);
+      final errorMessage =
+          errorData['message'] ?? 'Failed to mark conversation as read';
+      throw Exception(errorMessage);
+    }
+  }
+
   // Fetch conversation ID for a specific user and friend
   static Future<String> getConversationId(
       String userId, String friendEmail, String token) async {
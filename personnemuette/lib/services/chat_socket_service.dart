@@ -0,0 +1,102 @@
+import 'dart:async';
+import 'package:socket_io_client/socket_io_client.dart' as IO;
+import 'package:flutter/foundation.dart';
+import '../utils/user_preferences.dart';
+
+// Real-time chat delivery over the backend Socket.IO server. Kept on its own
+// connection so the sign language page can tear down its socket freely.
+class ChatSocketService {
+  static final ChatSocketService _instance = ChatSocketService._internal();
+  factory ChatSocketService() => _instance;
+  ChatSocketService._internal();
+
+  IO.Socket? socket;
+  final ValueNotifier<bool> connectedNotifier = ValueNotifier(false);
+  final StreamController<Map<String, dynamic>> _messages =
+      StreamController.broadcast();
+
+  Stream<Map<String, dynamic>> get messages => _messages.stream;
+
+  // The server authenticates the connection once, from the login token.
+  Future<void> connect(String baseUrl) async {
+    if (socket != null) return;
+    final token = await UserPreferences.getUserToken();
+    if (socket != null) return; // connected by a concurrent call
+    socket = IO.io(baseUrl, <String, dynamic>{
+      'transports': ['websocket'],
+      'autoConnect': false,
+      'forceNew': true,
+      'auth': {'token': token ?? ''},
+    });
+
+    socket?.onConnect((_) {
+      debugPrint('Connected to chat socket');
+      connectedNotifier.value = true;
+    });
+
+    socket?.on('new_message', (data) {
+      if (data != null) {
+        _messages.add(Map<String, dynamic>.from(data));
+      }
+    });
+
+    socket?.onDisconnect((_) {
+      debugPrint('Disconnected from chat socket');
+      connectedNotifier.value = false;
+    });
+
+    socket?.connect();
+  }
+
+  // Joins the conversation room; the server replies with every message
+  // newer than `since`, so reconnecting clients resume without gaps.
+  Future<List<Map<String, dynamic>>> joinConversation(
+      String conversationId, String userId, int? since) {
+    final completer = Completer<List<Map<String, dynamic>>>();
+    socket?.emitWithAck('join_conversation', {
+      'conversationId': int.parse(conversationId),
+      'userId': int.parse(userId),
+      'since': since,
+    }, ack: (response) {
+      if (response != null && response['status'] == 'ok') {
+        completer.complete(List<Map<String, dynamic>>.from(
+            (response['messages'] as List)
+                .map((msg) => Map<String, dynamic>.from(msg))));
+      } else {
+        completer.completeError(
+            Exception(response?['message'] ?? 'Failed to join conversation'));
+      }
+    });
+    return completer.future;
+  }
+
+  void leaveConversation(String conversationId) {
+    socket?.emit(
+        'leave_conversation', {'conversationId': int.parse(conversationId)});
+  }
+
+  // Resolves with the persisted message once the server has stored it.
+  Future<Map<String, dynamic>> sendMessage(
+      String conversationId, String content) {
+    final completer = Completer<Map<String, dynamic>>();
+    socket?.emitWithAck('send_message', {
+      'conversationId': int.parse(conversationId),
+      'content': content,
+    }, ack: (response) {
+      if (response != null && response['status'] == 'ok') {
+        completer.complete(Map<String, dynamic>.from(response['message']));
+      } else {
+        completer.completeError(
+            Exception(response?['message'] ?? 'Failed to send message'));
+      }
+    });
+    return completer.future;
+  }
+
+  void acknowledge(String conversationId, int messageId) {
+    socket?.emit('message_ack', {
+      'conversationId': int.parse(conversationId),
+      'idmessage': messageId,
+    });
+  }
+}
@@ -1,5 +1,7 @@
+import 'dart:typed_data';
 import 'package:socket_io_client/socket_io_client.dart' as IO;
 import 'package:flutter/foundation.dart';
+import '../utils/user_preferences.dart';
 
 class SocketService {
   static final SocketService _instance = SocketService._internal();
@@ -9,10 +11,13 @@ class SocketService {
   IO.Socket? socket;
   final ValueNotifier<String> predictionNotifier = ValueNotifier("");
 
-  void connect(String baseUrl) {
+  // The server authenticates the connection once, from the login token.
+  Future<void> connect(String baseUrl) async {
+    final token = await UserPreferences.getUserToken();
     socket = IO.io(baseUrl, <String, dynamic>{
       'transports': ['websocket'],
       'autoConnect': false,
+      'auth': {'token': token ?? ''},
     });
 
     socket?.connect();
@@ -38,6 +43,38 @@ class SocketService {
     }
   }
 
+  // Sends only the newest frame(s); the server keeps the sliding window.
+  void streamFrames(List<List<double>> frames) {
+    if (socket != null && socket!.connected) {
+      socket?.emit('stream_frame', {'frames': frames});
+    }
+  }
+
+  // Opt-in binary variant of streamFrames; see backend/modules/frame_codec.py
+  // for the layout (8-byte header followed by little-endian float32 values).
+  void streamFramesPacked(List<List<double>> frames) {
+    if (socket != null && socket!.connected) {
+      socket?.emit('stream_frame', packFrames(frames));
+    }
+  }
+
+  static Uint8List packFrames(List<List<double>> frames) {
+    final featureCount = frames.isEmpty ? 0 : frames.first.length;
+    final data = ByteData(8 + frames.length * featureCount * 4);
+    data.setUint8(0, 1); // version
+    data.setUint8(1, 1); // dtype: float32
+    data.setUint16(2, frames.length, Endian.little);
+    data.setUint16(4, featureCount, Endian.little);
+    var offset = 8;
+    for (final frame in frames) {
+      for (final value in frame) {
+        data.setFloat32(offset, value, Endian.little);
+        offset += 4;
+      }
+    }
+    return data.buffer.asUint8List();
+  }
+
   void dispose() {
     socket?.disconnect();
     socket?.dispose();
@@ -26,10 +26,6 @@ class _SignLanguagePageState extends State<SignLanguagePage> {
   bool _isBusy = false;
   bool get _isMobile => !kIsWeb && (defaultTargetPlatform == TargetPlatform.android || defaultTargetPlatform == TargetPlatform.iOS);
   Timer? _mockTimer;
-  
-  // Sliding window buffer
-  final List<List<double>> _frameBuffer = [];
-  static const int _windowSize = 30;
 
   @override
   void initState() {
@@ -137,14 +133,7 @@ class _SignLanguagePageState extends State<SignLanguagePage> {
     }
 
     final normalized = _normalizeKeypoints(mockKeypoints, 33);
-    _frameBuffer.add(normalized);
-    if (_frameBuffer.length > _windowSize) {
-      _frameBuffer.removeAt(0);
-    }
-
-    if (_frameBuffer.length == _windowSize) {
-      _streamSequenceToBackend();
-    }
+    _streamFrameToBackend(normalized);
 
     if (mounted) {
       setState(() {
@@ -166,16 +155,8 @@ class _SignLanguagePageState extends State<SignLanguagePage> {
       // 1. Coordinate Normalization
       final normalizedKeypoints = _normalizeKeypoints(keypoints, 33);
 
-      // 2. Sliding Window Buffer
-      _frameBuffer.add(normalizedKeypoints);
-      if (_frameBuffer.length > _windowSize) {
-        _frameBuffer.removeAt(0);
-      }
-
-      // 3. Trigger Backend Streaming
-      if (_frameBuffer.length == _windowSize) {
-        _streamSequenceToBackend();
-      }
+      // 2. Stream the frame; the backend keeps the 30-frame sliding window
+      _streamFrameToBackend(normalizedKeypoints);
     }
 
     // Simple heuristic for UI feedback
@@ -221,8 +202,8 @@ class _SignLanguagePageState extends State<SignLanguagePage> {
     return centered.map((val) => val / maxDist).toList();
   }
 
-  void _streamSequenceToBackend() {
-    SocketService().streamSequence(_frameBuffer);
+  void _streamFrameToBackend(List<double> frame) {
+    SocketService().streamFrames([frame]);
   }
 
   InputImage? _inputImageFromCameraImage(CameraImage image) {